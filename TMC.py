@@ -1,9 +1,14 @@
 import sys
 import time
+STARTUP_STARTED = time.perf_counter() # Diukur sebelum import lain untuk anggaran startup
 import json
 import os
 import shutil
-import re
+import copy
+import sqlite3
+import threading
+from datetime import datetime
+from functools import partial
 
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
                              QPushButton, QTextEdit, QLabel, QComboBox, QDialog,
@@ -13,269 +18,49 @@ from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
                              QFileDialog, QTableWidget, QTableWidgetItem,
                              QAbstractItemView, QHeaderView, QStyledItemDelegate,
                              QProgressBar, QSpacerItem, QSizePolicy, QStyle,
-                             QMenuBar)
-from PyQt6.QtCore import QObject, QThread, pyqtSignal, QSettings, Qt, QDir
-from PyQt6.QtGui import QAction, QColor, QFont, QIcon, QPalette, QActionGroup, QPixmap
-
-# --- PERUBAHAN ---: Tambahkan import untuk manipulasi gambar (Pillow)
-# Pastikan Anda sudah menginstal Pillow: pip install Pillow
-try:
-    from PIL import Image, ImageDraw, ImageFont
-except ImportError:
-    print("ERROR: Pillow library not found. Please install it using: pip install Pillow")
-    sys.exit(1)
-
-# Selenium Imports
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, InvalidArgumentException, WebDriverException
-from selenium.webdriver.chrome.service import Service as ChromeService
-from selenium.webdriver.firefox.service import Service as FirefoxService
-from selenium.webdriver.chrome.options import Options as ChromeOptions
-from selenium.webdriver.firefox.options import Options as FirefoxOptions
-from webdriver_manager.chrome import ChromeDriverManager
-from webdriver_manager.firefox import GeckoDriverManager
+                             QMenuBar, QSpinBox)
+from PyQt6.QtCore import QObject, QThread, pyqtSignal, QSettings, Qt, QDir, QTimer
+from PyQt6.QtGui import (QAction, QColor, QFont, QIcon, QPalette, QActionGroup, QPixmap,
+                         QTextCursor, QTextBlockFormat, QTextCharFormat, QTextDocumentFragment)
+
+from tmc import BASE_DIR, RUN_LOG_DIR, RESULT_DB_FILE
+from tmc.actions import ACTIONS_WITHOUT_LOCATOR, ACTIONS_WITH_VALUE
+from tmc.events import RunEvent
+from tmc.history import RunLog, ResultStore
 
 # --- Global Constants ---
 FLOWS_CONFIG_FILE = "flows.json"
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 STYLE_DIR = os.path.join(BASE_DIR, "styles")
-# --- PERUBAHAN ---: Tentukan direktori untuk menyimpan hasil tes
-RESULT_DIR = os.path.join(BASE_DIR, "Result")
+STARTUP_BUDGET_MS = 1000 # Waktu maksimum dari proses mulai hingga jendela tampil
+ENGINE_WARMUP_DELAY_MS = 500
+
 
+def load_engine():
+    """Memuat tmc.engine (Selenium, webdriver_manager, Pillow) saat pertama dibutuhkan. Import ini yang membuat
+    startup lambat, jadi GUI hanya memanggilnya saat Run atau dari thread pemanasan setelah jendela tampil."""
+    import tmc.engine
+    return tmc.engine
 
-# --- Kelas Worker Selenium ---
+
+# --- Worker Qt ---
 class SeleniumWorker(QObject):
+    """Adapter Qt untuk FlowEngine: callback engine diteruskan sebagai sinyal agar engine bisa berjalan di QThread."""
     # --- PERUBAHAN ---: Sinyal diubah untuk mengirimkan data flow hasil tes
     finished = pyqtSignal(tuple, dict)
     progress = pyqtSignal(str)
+    run_event = pyqtSignal(object) # RunEvent
 
-    BY_MAP = {
-        "ID": By.ID, "XPath": By.XPATH, "Name": By.NAME, "Class Name": By.CLASS_NAME,
-        "CSS Selector": By.CSS_SELECTOR, "Link Text": By.LINK_TEXT,
-    }
-
-    def __init__(self, browser, url, username, password, role, flow_settings, test_flows_data):
+    def __init__(self, browser, url, username, password, role, flow_settings, test_flows_data, browser_pool=None):
         super().__init__()
-        self.browser = browser; self.url = url; self.username = username
-        self.password = password; self.role = role
-        self.flow_settings = flow_settings; self.test_flows_data = test_flows_data; self.driver = None
-        self._is_stopped = False
-
-    def stop(self):
-        self._is_stopped = True
-        self.progress.emit(">>> Perintah berhenti diterima oleh worker...")
-
-    def _replace_placeholders(self, value):
-        if not isinstance(value, str): return value
-        return value.replace("{URL}", self.url).replace("{USERNAME}", self.username).replace("{PASSWORD}", self.password).replace("{ROLE}", self.role)
-
-    # --- PERUBAHAN ---: Tambahkan fungsi untuk watermark
-    def _add_watermark_to_screenshot(self, image_path, text, color):
-        try:
-            img = Image.open(image_path).convert("RGBA")
-            draw = ImageDraw.Draw(img)
-
-            try:
-                # Coba gunakan font Arial yang umum
-                font = ImageFont.truetype("arial.ttf", size=60)
-            except IOError:
-                # Jika tidak ada, gunakan font default
-                self.progress.emit("      (Info: Font Arial tidak ditemukan, menggunakan font default untuk watermark.)")
-                font = ImageFont.load_default(size=60)
-
-            # Hitung posisi untuk teks di pojok kanan bawah
-            text_bbox = draw.textbbox((0, 0), text, font=font)
-            text_width = text_bbox[2] - text_bbox[0]
-            text_height = text_bbox[3] - text_bbox[1]
-            
-            margin = 20
-            img_width, img_height = img.size
-            x = img_width - text_width - margin
-            y = img_height - text_height - margin
-
-            # Gambar teks pada gambar
-            draw.text((x, y), text, font=font, fill=color)
-            img.save(image_path, "PNG")
-            self.progress.emit(f"      -> Watermark '{text}' ditambahkan ke screenshot.")
-        except Exception as e:
-            self.progress.emit(f"      (Peringatan: Gagal menambahkan watermark ke screenshot: {e})")
-
-
-    def _execute_action(self, action_data):
-        if self._is_stopped: return
-        action = action_data.get("action")
-        by_string = action_data.get("by")
-        by = self.BY_MAP.get(by_string)
-        selector = self._replace_placeholders(action_data.get("selector"))
-        value = self._replace_placeholders(action_data.get("value"))
-
-        self.progress.emit(f"  - Aksi: {action}, By: {by_string or 'N/A'}, Selector: {selector or 'N/A'}, Value: {value or 'N/A'}")
-
-        if action not in ["Buka URL", "Tunggu URL Mengandung", "Tidur", "Beralih ke Konten Utama"] and (not by or not selector):
-            raise ValueError(f"Aksi '{action}' memerlukan 'By' dan 'Selector' yang valid.")
-
-        wait = WebDriverWait(self.driver, 10)
-
-        if action == "Buka URL":
-            url_to_open = self.url if value == "{URL}" or not value else value
-            self.driver.get(url_to_open)
-        elif action == "Klik Elemen":
-            wait.until(EC.element_to_be_clickable((by, selector))).click()
-        elif action == "Isi Teks":
-            element = wait.until(EC.visibility_of_element_located((by, selector)))
-            element.clear(); element.send_keys(value)
-        elif action == "Beralih ke Iframe":
-            self.progress.emit(f"    -> Beralih fokus ke iframe '{selector}'...")
-            wait.until(EC.frame_to_be_available_and_switch_to_it((by, selector)))
-            self.progress.emit("    -> Berhasil beralih ke iframe.")
-        elif action == "Beralih ke Konten Utama":
-            self.progress.emit("    -> Kembali ke konteks halaman utama...")
-            self.driver.switch_to.default_content()
-            self.progress.emit("    -> Berhasil kembali ke halaman utama.")
-        elif action == "Tunggu Elemen Ada di DOM":
-            wait.until(EC.presence_of_element_located((by, selector)))
-            self.progress.emit("    -> Elemen ditemukan di dalam DOM.")
-        elif action == "Centang Checkbox (Ensure Checked)":
-            element = wait.until(EC.presence_of_element_located((by, selector)))
-            if not element.is_selected(): element.click(); self.progress.emit("    -> Checkbox dicentang.")
-            else: self.progress.emit("    -> Checkbox sudah dalam keadaan tercentang.")
-        elif action == "Hapus Centang Checkbox (Ensure Unchecked)":
-            element = wait.until(EC.presence_of_element_located((by, selector)))
-            if element.is_selected(): element.click(); self.progress.emit("    -> Centang pada checkbox dihapus.")
-            else: self.progress.emit("    -> Checkbox sudah dalam keadaan tidak tercentang.")
-        elif action == "Verifikasi Checkbox Tercentang":
-            element = wait.until(EC.presence_of_element_located((by, selector)))
-            if not element.is_selected(): raise AssertionError(f"Verifikasi Gagal! Checkbox '{selector}' tidak tercentang.")
-            self.progress.emit("    -> Verifikasi Berhasil: Checkbox tercentang.")
-        elif action == "Verifikasi Checkbox Tidak Tercentang":
-            element = wait.until(EC.presence_of_element_located((by, selector)))
-            if element.is_selected(): raise AssertionError(f"Verifikasi Gagal! Checkbox '{selector}' seharusnya tidak tercentang.")
-            self.progress.emit("    -> Verifikasi Berhasil: Checkbox tidak tercentang.")
-        elif action == "Tunggu Elemen Muncul":
-            wait.until(EC.visibility_of_element_located((by, selector)))
-        elif action == "Tunggu URL Mengandung":
-            wait.until(EC.url_contains(value))
-        elif action == "Verifikasi Teks Elemen":
-            element_text = wait.until(EC.visibility_of_element_located((by, selector))).text
-            if value not in element_text:
-                raise AssertionError(f"Verifikasi Gagal! Teks '{value}' tidak ditemukan di elemen. Teks aktual: '{element_text}'")
-            self.progress.emit(f"  - Verifikasi Teks Berhasil!")
-        elif action == "Tunggu Elemen Hilang":
-            self.progress.emit(f"    -> Menunggu elemen '{selector}' untuk hilang...")
-            long_wait = WebDriverWait(self.driver, 25)
-            long_wait.until(EC.invisibility_of_element_located((by, selector)))
-            self.progress.emit(f"    -> Elemen '{selector}' berhasil hilang.")
-        elif action == "Verifikasi Elemen TIDAK Muncul":
-            self.progress.emit(f"  - Verifikasi: Memastikan elemen '{selector}' TIDAK muncul (max 5 detik)...")
-            short_wait = WebDriverWait(self.driver, 5)
-            try:
-                short_wait.until(EC.visibility_of_element_located((by, selector)))
-                raise AssertionError(f"Verifikasi Gagal! Elemen '{selector}' seharusnya TIDAK muncul, tapi ditemukan.")
-            except TimeoutException:
-                self.progress.emit("    -> Verifikasi Berhasil: Elemen tidak muncul seperti yang diharapkan.")
-        elif action == "Tidur":
-            duration = float(value)
-            self.progress.emit(f"    -> Jeda selama {duration} detik...")
-            time.sleep(duration)
-        elif action == "Gulir ke Elemen":
-            element = wait.until(EC.presence_of_element_located((by, selector)))
-            self.driver.execute_script("arguments[0].scrollIntoView({block: 'center', inline: 'center'});", element)
-            self.progress.emit(f"    -> Elemen '{selector}' digulir ke tengah layar.")
-        elif action == "Klik Elemen via JS":
-            element = wait.until(EC.presence_of_element_located((by, selector)))
-            self.driver.execute_script("arguments[0].click();", element)
-            self.progress.emit("    -> Elemen diklik menggunakan JavaScript.")
-        elif action == "Tunggu Elemen Siap Diklik":
-            wait.until(EC.element_to_be_clickable((by, selector)))
-            self.progress.emit("    -> Elemen siap untuk diklik.")
-        else:
-            raise NotImplementedError(f"Aksi '{action}' tidak dikenali.")
+        self.engine = load_engine().FlowEngine(browser, url, username, password, role, flow_settings, test_flows_data, browser_pool)
+        self.engine.finished.connect(self.finished.emit); self.engine.progress.connect(self.progress.emit)
+        self.engine.run_event.connect(self.run_event.emit)
 
     def run_tests(self):
-        self.progress.emit("Memulai rangkaian pengujian...")
-        if not all([self.url, self.username, self.password, self.test_flows_data]):
-            self.finished.emit((False, "Pengujian dibatalkan. Data/alur tes tidak lengkap.", None), {}); return
-        
-        # --- PERUBAHAN ---: Membuat folder Result jika belum ada
-        os.makedirs(RESULT_DIR, exist_ok=True)
-        
-        current_flow_name = "unknown_flow"
-        current_action_data = None # Untuk melacak aksi yang gagal
+        self.engine.run_tests()
 
-        try:
-            if self._is_stopped: raise InterruptedError("Pengujian dihentikan oleh pengguna sebelum dimulai.")
-            self.progress.emit(f"Menyiapkan driver untuk {self.browser}...")
-            if self.browser == "chrome":
-                options = ChromeOptions();
-                if self.flow_settings.get("headless"): options.add_argument("--headless=new")
-                service = ChromeService(ChromeDriverManager().install()); self.driver = webdriver.Chrome(service=service, options=options)
-            elif self.browser == "firefox":
-                options = FirefoxOptions()
-                if self.flow_settings.get("headless"): options.add_argument("--headless")
-                service = FirefoxService(GeckoDriverManager().install()); self.driver = webdriver.Firefox(service=service, options=options)
-            self.driver.maximize_window()
-
-            for flow_name, flow_data in self.test_flows_data.items():
-                current_flow_name = flow_name
-                if self._is_stopped: raise InterruptedError("Pengujian dihentikan oleh pengguna.")
-                self.progress.emit(f"\n--- Menjalankan Alur: {flow_name} ---")
-                
-                actions = flow_data.get('actions', [])
-                for action_data in actions:
-                    current_action_data = action_data
-                    if self._is_stopped: raise InterruptedError("Pengujian dihentikan oleh pengguna.")
-                    self._execute_action(action_data)
-                    action_data['status'] = 'DONE' # --- PERUBAHAN ---: Menandai aksi berhasil
-            
-            self.finished.emit((True, "Semua alur tes berhasil diselesaikan.", None), self.test_flows_data)
-
-        except InterruptedError as e:
-            error_message = f"Pengujian dihentikan: {str(e)}"
-            self.progress.emit(error_message)
-            self.finished.emit((False, error_message, None), self.test_flows_data)
-        except (InvalidArgumentException, ValueError) as e:
-            error_message = f"Error Konfigurasi Aksi: {str(e)}"
-            self.progress.emit(error_message)
-            if current_action_data: current_action_data['status'] = 'FAILED'
-            self.finished.emit((False, error_message, None), self.test_flows_data)
-        except WebDriverException as e:
-            error_message = f"Error WebDriver: Browser mungkin ditutup atau terjadi masalah koneksi.\nDetail: {e.msg}"
-            self.progress.emit(error_message)
-            if current_action_data: current_action_data['status'] = 'FAILED'
-            self.finished.emit((False, error_message, None), self.test_flows_data)
-        except Exception as e:
-            if current_action_data: current_action_data['status'] = 'FAILED'
-            
-            error_message = f"Error pada rangkaian tes '{current_flow_name}': {type(e).__name__}: {str(e)}"
-            self.progress.emit(error_message)
-
-            screenshot_path = None
-            if self.driver:
-                try:
-                    safe_flow_name = re.sub(r'[\\/*?:"<>|]', "", current_flow_name).replace(" ", "_")
-                    timestamp = time.strftime("%Y%m%d-%H%M%S")
-                    screenshot_filename = f"error_{timestamp}_{safe_flow_name}.png"
-                    # --- PERUBAHAN ---: Menyimpan screenshot di folder Result
-                    screenshot_path = os.path.join(RESULT_DIR, screenshot_filename)
-                    self.driver.save_screenshot(screenshot_path)
-                    self.progress.emit(f"Screenshot error disimpan di {screenshot_path}")
-                    # --- PERUBAHAN ---: Panggil fungsi watermark
-                    self._add_watermark_to_screenshot(screenshot_path, "FAILED", color=(255, 0, 0, 255))
-                except Exception as ss_e:
-                    self.progress.emit(f"Gagal menyimpan screenshot: {ss_e}")
-            
-            self.finished.emit((False, error_message, screenshot_path), self.test_flows_data)
-        finally:
-            if self.driver:
-                self.progress.emit("Menutup browser...");
-                try:
-                    if not self.flow_settings.get("headless") and not self._is_stopped: time.sleep(3)
-                    self.driver.quit()
-                except Exception as quit_e:
-                    self.progress.emit(f"Error saat menutup browser: {quit_e}")
+    def stop(self):
+        self.engine.stop()
 
 
 # --- Dialog untuk Menambah Aksi ---
@@ -289,7 +74,8 @@ class ActionDialog(QDialog):
             "Tunggu Elemen Muncul", "Tidur", "Tunggu Elemen Hilang", "Tunggu URL Mengandung",
             "Verifikasi Teks Elemen", "Verifikasi Elemen TIDAK Muncul",
             "Centang Checkbox (Ensure Checked)", "Hapus Centang Checkbox (Ensure Unchecked)",
-            "Verifikasi Checkbox Tercentang", "Verifikasi Checkbox Tidak Tercentang", "Gulir ke Elemen", "Klik Elemen via JS", "Beralih ke Iframe", "Beralih ke Konten Utama" 
+            "Verifikasi Checkbox Tercentang", "Verifikasi Checkbox Tidak Tercentang", "Gulir ke Elemen", "Klik Elemen via JS", "Beralih ke Iframe", "Beralih ke Konten Utama",
+            "Tunggu Halaman Siap"
         ])
         self.by_combo = QComboBox(); self.by_combo.addItems(["ID", "XPath", "Name", "Class Name", "CSS Selector", "Link Text"])
         self.selector_input = QLineEdit(); self.value_input = QLineEdit()
@@ -303,8 +89,8 @@ class ActionDialog(QDialog):
         self.update_ui_for_action(self.action_combo.currentText())
 
     def update_ui_for_action(self, action_text):
-        needs_selector = action_text not in ["Buka URL", "Tunggu URL Mengandung", "Tidur", "Beralih ke Konten Utama"]
-        needs_value = action_text in ["Buka URL", "Isi Teks", "Tunggu URL Mengandung", "Verifikasi Teks Elemen", "Tidur"]
+        needs_selector = action_text not in ACTIONS_WITHOUT_LOCATOR
+        needs_value = action_text in ACTIONS_WITH_VALUE
         self.by_combo.setVisible(needs_selector)
         self.selector_input.setVisible(needs_selector)
         self.value_input.setVisible(needs_value)
@@ -614,7 +400,7 @@ class SettingsDialog(QDialog):
         self.actions_table.itemChanged.connect(self.on_action_type_changed)
         header = self.actions_table.horizontalHeader(); header.setSectionResizeMode(QHeaderView.ResizeMode.Interactive); header.setStretchLastSection(True)
         self.actions_table.setColumnWidth(0, 180); self.actions_table.setColumnWidth(1, 100); self.actions_table.setColumnWidth(2, 250)
-        action_items = ["Buka URL", "Klik Elemen", "Isi Teks", "Tunggu Elemen Muncul", "Tunggu Elemen Hilang", "Tunggu URL Mengandung", "Tidur", "Verifikasi Teks Elemen", "Verifikasi Elemen TIDAK Muncul", "Centang Checkbox (Ensure Checked)", "Hapus Centang Checkbox (Ensure Unchecked)", "Verifikasi Checkbox Tercentang", "Verifikasi Checkbox Tidak Tercentang", "Gulir ke Elemen", "Klik Elemen via JS", "Beralih ke Iframe", "Beralih ke Konten Utama"]
+        action_items = ["Buka URL", "Klik Elemen", "Isi Teks", "Tunggu Elemen Muncul", "Tunggu Elemen Hilang", "Tunggu URL Mengandung", "Tidur", "Verifikasi Teks Elemen", "Verifikasi Elemen TIDAK Muncul", "Centang Checkbox (Ensure Checked)", "Hapus Centang Checkbox (Ensure Unchecked)", "Verifikasi Checkbox Tercentang", "Verifikasi Checkbox Tidak Tercentang", "Gulir ke Elemen", "Klik Elemen via JS", "Beralih ke Iframe", "Beralih ke Konten Utama", "Tunggu Halaman Siap"]
         by_items = ["", "ID", "XPath", "Name", "Class Name", "CSS Selector", "Link Text"]; self.action_delegate = ComboBoxDelegate(action_items, self); self.by_delegate = ComboBoxDelegate(by_items, self); self.actions_table.setItemDelegateForColumn(0, self.action_delegate); self.actions_table.setItemDelegateForColumn(1, self.by_delegate)
         actions_layout.addWidget(self.actions_table)
         
@@ -633,13 +419,74 @@ class SettingsDialog(QDialog):
         self.save_actions_button.setIcon(self.style().standardIcon(QStyle.StandardPixmap.SP_DialogSaveButton))
         self.save_actions_button.clicked.connect(self.save_current_flow_actions)
         self.save_actions_button.setEnabled(False)
-        actions_layout.addWidget(self.save_actions_button, 0, Qt.AlignmentFlag.AlignRight)
+        self.independent_checkbox = QCheckBox("Alur independen (boleh dijalankan paralel di sesi lain)")
+        self.independent_checkbox.setEnabled(False)
+        self.independent_checkbox.toggled.connect(self.on_independent_toggled)
+        save_row_layout = QHBoxLayout(); save_row_layout.addWidget(self.independent_checkbox); save_row_layout.addStretch(); save_row_layout.addWidget(self.save_actions_button)
+        actions_layout.addLayout(save_row_layout)
+        # Dependensi alur untuk penjadwal requires/provides (token dipisah koma, mis. session:logged_in, data:kemasan)
+        self.requires_input = QLineEdit(); self.requires_input.setPlaceholderText("mis. session:logged_in")
+        self.provides_input = QLineEdit(); self.provides_input.setPlaceholderText("mis. data:kelompok_barang")
+        dependency_tooltip = ("Token dipisah koma. Token 'session:'/'page:' berlaku per sesi browser (alur penyedianya dijalankan sebagai setup "
+                              "di tiap sesi); token lain hanya mengatur urutan. Bila ada alur yang memakai requires/provides, alur dijadwalkan "
+                              "sebagai graf dependensi dan cabang yang saling bebas dijalankan paralel.")
+        dependency_row_layout = QHBoxLayout()
+        for label, line_edit in (("Membutuhkan:", self.requires_input), ("Menyediakan:", self.provides_input)):
+            line_edit.setToolTip(dependency_tooltip); line_edit.setEnabled(False)
+            line_edit.editingFinished.connect(self.on_dependencies_edited)
+            dependency_row_layout.addWidget(QLabel(label)); dependency_row_layout.addWidget(line_edit)
+        actions_layout.addLayout(dependency_row_layout)
 
         top_panels_layout.addWidget(self.actions_group_box, 3)
         
         bottom_bar_layout = QHBoxLayout(); bottom_bar_layout.addStretch()
         self.headless_checkbox = QCheckBox("Jalankan Headless"); self.headless_checkbox.setChecked(self.settings.value("flow/headless", False, type=bool))
         bottom_bar_layout.addWidget(self.headless_checkbox)
+        self.keep_browsers_checkbox = QCheckBox("Pertahankan Browser Antar Run"); self.keep_browsers_checkbox.setChecked(self.settings.value("flow/keep_browsers", False, type=bool))
+        self.keep_browsers_checkbox.setToolTip("Browser tidak ditutup setelah run; cookie & storage dibersihkan lalu dipakai ulang pada run berikutnya.")
+        bottom_bar_layout.addWidget(self.keep_browsers_checkbox)
+        self.smart_sleep_checkbox = QCheckBox("Tidur Pintar"); self.smart_sleep_checkbox.setChecked(self.settings.value("flow/smart_sleep", False, type=bool))
+        self.smart_sleep_checkbox.setToolTip("Aksi 'Tidur' berhenti lebih awal begitu halaman idle; nilai Tidur menjadi batas maksimum.")
+        bottom_bar_layout.addWidget(self.smart_sleep_checkbox)
+        self.batch_actions_checkbox = QCheckBox("Gabungkan Aksi Form"); self.batch_actions_checkbox.setChecked(self.settings.value("flow/batch_actions", False, type=bool))
+        self.batch_actions_checkbox.setToolTip("Aksi isi teks/checkbox/gulir/verifikasi teks yang berurutan dijalankan dalam satu skrip. Nilai diisi via JavaScript (tanpa event keyboard).")
+        bottom_bar_layout.addWidget(self.batch_actions_checkbox)
+        self.trace_checkbox = QCheckBox("Simpan Trace"); self.trace_checkbox.setChecked(self.settings.value("flow/trace", False, type=bool))
+        self.trace_checkbox.setToolTip("Tulis timeline run (alur, aksi, tunggu, screenshot) ke Result/trace_*.json dalam format Trace Event/Perfetto.")
+        bottom_bar_layout.addWidget(self.trace_checkbox)
+        self.step_screenshots_checkbox = QCheckBox("Screenshot Tiap Langkah"); self.step_screenshots_checkbox.setChecked(self.settings.value("flow/step_screenshots", False, type=bool))
+        self.step_screenshots_checkbox.setToolTip("Ambil frame setelah setiap aksi. Frame dikecilkan, di-dedup dan disimpan sekali per isi di Result/frames.")
+        bottom_bar_layout.addWidget(self.step_screenshots_checkbox)
+        self.auth_cache_checkbox = QCheckBox("Cache Sesi Login"); self.auth_cache_checkbox.setChecked(self.settings.value("flow/auth_cache", False, type=bool))
+        self.auth_cache_checkbox.setToolTip("Simpan cookie & storage setelah login berhasil (berlaku 30 menit) dan lewati alur login selama sesi masih valid.")
+        bottom_bar_layout.addWidget(self.auth_cache_checkbox)
+        self.retry_budget_spin = QSpinBox(); self.retry_budget_spin.setRange(0, 500)
+        self.retry_budget_spin.setValue(self.settings.value("flow/retry_budget", 20, type=int))
+        self.retry_budget_spin.setToolTip("Jumlah retry maksimum per run untuk exception sementara (mis. StaleElementReferenceException). "
+                                          "Kebijakan per jenis aksi/aksi diatur lewat 'retry' di flows.json. 0 = tanpa retry.")
+        bottom_bar_layout.addWidget(QLabel("Anggaran Retry:")); bottom_bar_layout.addWidget(self.retry_budget_spin)
+        self.flight_recorder_spin = QSpinBox(); self.flight_recorder_spin.setRange(0, 60); self.flight_recorder_spin.setSuffix(" frame")
+        self.flight_recorder_spin.setValue(self.settings.value("flow/flight_recorder_frames", 0, type=int))
+        self.flight_recorder_spin.setToolTip("Simpan N frame terakhir per sesi di memori dan tulis sebagai animasi di samping screenshot error bila gagal. 0 = nonaktif.")
+        bottom_bar_layout.addWidget(QLabel("Rekaman Gagal:")); bottom_bar_layout.addWidget(self.flight_recorder_spin)
+        self.negative_window_spin = QSpinBox(); self.negative_window_spin.setRange(0, 5000); self.negative_window_spin.setSingleStep(100); self.negative_window_spin.setSuffix(" ms")
+        self.negative_window_spin.setValue(self.settings.value("flow/negative_window_ms", 0, type=int))
+        self.negative_window_spin.setToolTip("Verifikasi 'TIDAK Muncul' lolos setelah halaman stabil selama jendela ini. 0 = tunggu penuh 5 detik.")
+        bottom_bar_layout.addWidget(QLabel("Jendela Verifikasi Negatif:")); bottom_bar_layout.addWidget(self.negative_window_spin)
+        self.log_max_lines_spin = QSpinBox(); self.log_max_lines_spin.setRange(0, 500000); self.log_max_lines_spin.setSingleStep(1000)
+        self.log_max_lines_spin.setValue(self.settings.value("log/max_lines", LogView.DEFAULT_MAX_LINES, type=int))
+        self.log_max_lines_spin.setToolTip("Jumlah baris log maksimum per tab; baris tertua dibuang. 0 = tanpa batas.")
+        bottom_bar_layout.addWidget(QLabel("Batas Baris Log:")); bottom_bar_layout.addWidget(self.log_max_lines_spin)
+        self.screenshot_format_combo = QComboBox(); self.screenshot_format_combo.addItems(["png", "jpeg", "webp"])
+        self.screenshot_format_combo.setCurrentText(self.settings.value("flow/screenshot_format", "png"))
+        self.screenshot_quality_spin = QSpinBox(); self.screenshot_quality_spin.setRange(1, 100)
+        self.screenshot_quality_spin.setValue(self.settings.value("flow/screenshot_quality", 85, type=int))
+        self.screenshot_quality_spin.setToolTip("Kualitas JPEG/WebP (diabaikan untuk PNG).")
+        bottom_bar_layout.addWidget(QLabel("Screenshot:")); bottom_bar_layout.addWidget(self.screenshot_format_combo); bottom_bar_layout.addWidget(self.screenshot_quality_spin)
+        self.parallel_sessions_spin = QSpinBox(); self.parallel_sessions_spin.setRange(1, 8)
+        self.parallel_sessions_spin.setValue(self.settings.value("flow/parallel_sessions", 1, type=int))
+        self.parallel_sessions_spin.setToolTip("Jumlah sesi browser. Alur independen dibagi ke sesi-sesi ini.")
+        bottom_bar_layout.addWidget(QLabel("Sesi Paralel:")); bottom_bar_layout.addWidget(self.parallel_sessions_spin)
         main_tab_layout.addLayout(bottom_bar_layout)
         
         self.tabs.addTab(flow_widget, "Management Flow (Codeless)")
@@ -677,10 +524,14 @@ class SettingsDialog(QDialog):
         flow_name = current_flow_item.text()
         new_actions = []
         for row in range(self.actions_table.rowCount()):
+            # Kunci lain milik aksi (mis. "retry") tidak ada di tabel dan ikut baris saat dipindah, jadi dipertahankan
+            source_item = self.actions_table.item(row, 0)
             action_data = {}
             for col, key in self.column_to_key_map.items():
                 item = self.actions_table.item(row, col)
                 action_data[key] = item.text() if item else ""
+            for key, value in ((source_item.data(Qt.ItemDataRole.UserRole) if source_item else None) or {}).items():
+                action_data.setdefault(key, value)
             new_actions.append(action_data)
         self.flows_data[flow_name]['actions'] = new_actions
         self.save_flows_to_file()
@@ -692,10 +543,18 @@ class SettingsDialog(QDialog):
         if not current_item:
             self.actions_group_box.setTitle("Langkah/Aksi untuk Alur: -")
             self.save_actions_button.setEnabled(False)
+            self.independent_checkbox.setEnabled(False)
+            for line_edit in (self.requires_input, self.provides_input): line_edit.clear(); line_edit.setEnabled(False)
             self.actions_table.blockSignals(False)
             return
         self.save_actions_button.setEnabled(True)
         flow_name = current_item.text()
+        self.independent_checkbox.blockSignals(True)
+        self.independent_checkbox.setEnabled(True)
+        self.independent_checkbox.setChecked(bool(self.flows_data.get(flow_name, {}).get('independent')))
+        self.independent_checkbox.blockSignals(False)
+        for key, line_edit in (("requires", self.requires_input), ("provides", self.provides_input)):
+            line_edit.setEnabled(True); line_edit.setText(", ".join(self.flows_data.get(flow_name, {}).get(key, [])))
         self.actions_group_box.setTitle(f"Langkah/Aksi untuk Alur: {flow_name}")
         actions = self.flows_data.get(flow_name, {}).get('actions', [])
         self.actions_table.setRowCount(len(actions))
@@ -704,9 +563,30 @@ class SettingsDialog(QDialog):
             for col, key in self.column_to_key_map.items():
                 value = action_data.get(key, ""); item = QTableWidgetItem(str(value if value is not None else ""))
                 self.actions_table.setItem(row, col, item)
+            self.actions_table.item(row, 0).setData(Qt.ItemDataRole.UserRole, action_data)
             self._update_row_editability(row, action_text)
         self.actions_table.blockSignals(False)
 
+    def on_independent_toggled(self, checked):
+        current_flow_item = self.flow_list.currentItem()
+        if not current_flow_item: return
+        flow_data = self.flows_data[current_flow_item.text()]
+        if checked: flow_data['independent'] = True
+        else: flow_data.pop('independent', None)
+        self.save_flows_to_file()
+
+    def on_dependencies_edited(self):
+        current_flow_item = self.flow_list.currentItem()
+        if not current_flow_item: return
+        flow_data = self.flows_data[current_flow_item.text()]; changed = False
+        for key, line_edit in (("requires", self.requires_input), ("provides", self.provides_input)):
+            tokens = [token.strip() for token in line_edit.text().split(",") if token.strip()]
+            if tokens == flow_data.get(key, []): continue
+            if tokens: flow_data[key] = tokens
+            else: flow_data.pop(key, None)
+            changed = True
+        if changed: self.save_flows_to_file()
+
     def load_flows(self):
         try:
             with open(FLOWS_CONFIG_FILE, 'r') as f: self.flows_data = json.load(f)
@@ -716,7 +596,7 @@ class SettingsDialog(QDialog):
         if self.flows_data:
             for name, data in self.flows_data.items():
                 if isinstance(data, dict) and 'role' in data:
-                    self.flows_data[name] = {'actions': data.get('actions', [])}
+                    self.flows_data[name] = {key: value for key, value in data.items() if key != 'role'}
                     needs_resave = True
         if needs_resave:
             self.save_flows_to_file()
@@ -729,8 +609,8 @@ class SettingsDialog(QDialog):
         super().accept()
 
     def _update_row_editability(self, row, action_text):
-        selector_needed = action_text not in ["Buka URL", "Tunggu URL Mengandung", "Tidur", "Beralih ke Konten Utama"]
-        value_needed = action_text in ["Buka URL", "Isi Teks", "Tunggu URL Mengandung", "Verifikasi Teks Elemen", "Tidur"]
+        selector_needed = action_text not in ACTIONS_WITHOUT_LOCATOR
+        value_needed = action_text in ACTIONS_WITH_VALUE
         disabled_color = self.palette().color(QPalette.ColorRole.Window).lighter(110)
         base_color = self.palette().color(QPalette.ColorRole.Base)
         for col, item_key in [(1, "by"), (2, "selector"), (3, "value")]:
@@ -786,6 +666,19 @@ class SettingsDialog(QDialog):
         active_env_item = self.environments_list.currentItem()
         self.settings.setValue("active_environment", active_env_item.text() if active_env_item else "")
         self.settings.setValue("flow/headless", self.headless_checkbox.isChecked())
+        self.settings.setValue("flow/keep_browsers", self.keep_browsers_checkbox.isChecked())
+        self.settings.setValue("flow/smart_sleep", self.smart_sleep_checkbox.isChecked())
+        self.settings.setValue("flow/batch_actions", self.batch_actions_checkbox.isChecked())
+        self.settings.setValue("flow/trace", self.trace_checkbox.isChecked())
+        self.settings.setValue("flow/step_screenshots", self.step_screenshots_checkbox.isChecked())
+        self.settings.setValue("flow/auth_cache", self.auth_cache_checkbox.isChecked())
+        self.settings.setValue("flow/retry_budget", self.retry_budget_spin.value())
+        self.settings.setValue("flow/flight_recorder_frames", self.flight_recorder_spin.value())
+        self.settings.setValue("flow/negative_window_ms", self.negative_window_spin.value())
+        self.settings.setValue("log/max_lines", self.log_max_lines_spin.value())
+        self.settings.setValue("flow/screenshot_format", self.screenshot_format_combo.currentText())
+        self.settings.setValue("flow/screenshot_quality", self.screenshot_quality_spin.value())
+        self.settings.setValue("flow/parallel_sessions", self.parallel_sessions_spin.value())
         active_flows = []
         for i in range(self.flow_list.count()):
             item = self.flow_list.item(i)
@@ -856,6 +749,93 @@ class SettingsDialog(QDialog):
         self.actions_table.selectRow(new_row)
 
 
+# --- Dialog Riwayat & Analitik ---
+class HistoryDialog(QDialog):
+    def __init__(self, result_store, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Riwayat & Analitik Run"); self.resize(1100, 600)
+        self.result_store = result_store
+        layout = QVBoxLayout(self); filter_layout = QHBoxLayout()
+        self.flow_filter = QComboBox(); self.flaky_only_checkbox = QCheckBox("Hanya langkah flaky")
+        refresh_button = QPushButton("Muat Ulang"); refresh_button.clicked.connect(self.refresh)
+        filter_layout.addWidget(QLabel("Alur:")); filter_layout.addWidget(self.flow_filter, 1); filter_layout.addWidget(self.flaky_only_checkbox); filter_layout.addWidget(refresh_button)
+        self.table = QTableWidget(); self.table.setColumnCount(len(ResultStore.REPORT_COLUMNS)); self.table.setHorizontalHeaderLabels(ResultStore.REPORT_COLUMNS)
+        self.table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers); self.table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.table.verticalHeader().setVisible(False); self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
+        self.summary_label = QLabel()
+        layout.addLayout(filter_layout); layout.addWidget(self.table, 1); layout.addWidget(self.summary_label)
+        self.flow_filter.currentIndexChanged.connect(self.populate); self.flaky_only_checkbox.toggled.connect(self.populate)
+        self.refresh()
+
+    def refresh(self):
+        try:
+            self.result_store.refresh_stats(); self.report = self.result_store.step_report()
+        except sqlite3.Error as e:
+            self.report = []; self.summary_label.setText(f"Gagal membaca riwayat: {e}")
+        selected = self.flow_filter.currentText()
+        self.flow_filter.blockSignals(True); self.flow_filter.clear(); self.flow_filter.addItem("Semua Alur")
+        self.flow_filter.addItems(sorted({entry["flow"] for entry in self.report}))
+        self.flow_filter.setCurrentIndex(max(0, self.flow_filter.findText(selected))); self.flow_filter.blockSignals(False)
+        self.populate()
+
+    def populate(self):
+        flow_name = self.flow_filter.currentText() if self.flow_filter.currentIndex() > 0 else None
+        rows = [entry for entry in self.report if (not flow_name or entry["flow"] == flow_name) and (entry["flaky"] or not self.flaky_only_checkbox.isChecked())]
+        self.table.setRowCount(len(rows))
+        for row, entry in enumerate(rows):
+            for column, text in enumerate(ResultStore.format_report_row(entry)):
+                item = QTableWidgetItem(text)
+                if entry["flaky"]: item.setForeground(QColor("#c0392b"))
+                elif entry["kind"] == "flow": font = item.font(); font.setBold(True); item.setFont(font)
+                self.table.setItem(row, column, item)
+        flaky_count = sum(1 for entry in rows if entry["flaky"])
+        self.summary_label.setText(f"{len(rows)} baris, {flaky_count} langkah flaky. Statistik dihitung dari {ResultStore.STATS_WINDOW} hasil terakhir per langkah.")
+
+
+# --- Tampilan Log Bertumpuk ---
+class LogView(QTextEdit):
+    """QTextEdit read-only yang menampung pesan lalu menuliskannya sekaligus lewat timer. Jumlah baris dibatasi
+    sehingga run panjang atau paralel tidak membuat GUI tersendat dan memori terus naik."""
+    FLUSH_INTERVAL_MS = 100
+    DEFAULT_MAX_LINES = 5000
+
+    def __init__(self, max_lines=DEFAULT_MAX_LINES, parent=None):
+        super().__init__(parent)
+        self.setObjectName("LogArea"); self.setReadOnly(True)
+        self._pending = []
+        self._flush_timer = QTimer(self); self._flush_timer.setSingleShot(True)
+        self._flush_timer.setInterval(self.FLUSH_INTERVAL_MS); self._flush_timer.timeout.connect(self.flush)
+        self.set_max_lines(max_lines)
+
+    def set_max_lines(self, max_lines):
+        self.document().setMaximumBlockCount(max(0, int(max_lines or 0))) # 0 = tanpa batas
+
+    def append(self, message):
+        self._pending.append(message)
+        if not self._flush_timer.isActive(): self._flush_timer.start()
+
+    def flush(self):
+        if not self._pending: return
+        pending, self._pending = self._pending, []
+        scrollbar = self.verticalScrollBar(); at_bottom = scrollbar.value() >= scrollbar.maximum() - 4
+        cursor = QTextCursor(self.document()); cursor.movePosition(QTextCursor.MoveOperation.End)
+        cursor.beginEditBlock()
+        for message in pending:
+            if not self.document().isEmpty(): cursor.insertBlock(QTextBlockFormat(), QTextCharFormat())
+            if Qt.mightBeRichText(message): cursor.insertHtml(message)
+            else: cursor.setCharFormat(QTextCharFormat()); cursor.insertText(message)
+        cursor.endEditBlock()
+        if at_bottom: scrollbar.setValue(scrollbar.maximum())
+
+    def clear(self):
+        self._pending.clear(); self._flush_timer.stop()
+        super().clear()
+
+    def toPlainText(self):
+        self.flush()
+        return super().toPlainText()
+
+
 # --- Jendela Utama Aplikasi ---
 class TestRunnerApp(QMainWindow):
     def __init__(self):
@@ -866,9 +846,26 @@ class TestRunnerApp(QMainWindow):
         self.environments_data = {}; self.worker = None; self.thread = None
         self.total_test_steps = 0; self.current_test_step = 0
         self.active_workers = []
+        self.run_log = None
+        self.result_store = ResultStore(RESULT_DB_FILE)
+        self.browser_pool = None # Dibuat saat run pertama dengan 'Pertahankan Browser'
         self.last_error_screenshot_path = None
         self._create_actions(); self._create_menu_bar(); self._create_central_widget()
         self._load_and_set_environments(); self._apply_theme_on_startup()
+        QTimer.singleShot(ENGINE_WARMUP_DELAY_MS, self._warm_up_engine)
+
+    def _warm_up_engine(self):
+        # Import Selenium di latar selagi pengguna memilih environment; import saat Run akan menunggu bila belum selesai
+        threading.Thread(target=load_engine, name="tmc-warmup", daemon=True).start()
+
+    def report_startup_time(self):
+        startup_ms = (time.perf_counter() - STARTUP_STARTED) * 1000
+        heavy_modules = [name for name in ("tmc.engine", "selenium", "webdriver_manager", "PIL") if name in sys.modules]
+        within_budget = startup_ms <= STARTUP_BUDGET_MS and not heavy_modules
+        message = f"Startup: {startup_ms:.0f} ms (anggaran {STARTUP_BUDGET_MS} ms)"
+        if heavy_modules: message += f"; modul berat termuat saat startup: {', '.join(heavy_modules)}"
+        self.log(message if within_budget else f"(Peringatan) {message}")
+        return startup_ms, within_budget
         
     def _create_central_widget(self):
         self.central_widget = QWidget()
@@ -879,7 +876,7 @@ class TestRunnerApp(QMainWindow):
         content_layout = QVBoxLayout(); content_layout.setContentsMargins(10, 10, 10, 10); content_layout.setSpacing(10)
         self._create_header(); self._create_main_toolbar(); self._create_drives_table(); self._create_log_area(); self._create_progress_bar()
         content_layout.addWidget(self.drives_group_box); content_layout.addWidget(self.analyzing_label)
-        content_layout.addWidget(self.log_area, 1); content_layout.addWidget(self.legend_and_progress_widget)
+        content_layout.addWidget(self.log_tabs, 1); content_layout.addWidget(self.legend_and_progress_widget)
         self.main_layout.addLayout(content_layout)
 
     def _create_actions(self):
@@ -934,26 +931,46 @@ class TestRunnerApp(QMainWindow):
         process_group = QGroupBox("Process"); process_layout = QHBoxLayout(process_group); self.stop_button = create_tool_button("Stop", QStyle.StandardPixmap.SP_MediaStop); self.stop_button.setEnabled(False); process_layout.addWidget(self.stop_button)
         others_group = QGroupBox("Others Features"); others_layout = QHBoxLayout(others_group); self.settings_button_main = create_tool_button("Pengaturan", QStyle.StandardPixmap.SP_FileDialogDetailedView)
         self.export_log_button = create_tool_button("Export Log", QStyle.StandardPixmap.SP_DialogSaveButton)
-        others_layout.addWidget(self.settings_button_main); others_layout.addWidget(self.export_log_button)
+        self.history_button = create_tool_button("Riwayat", QStyle.StandardPixmap.SP_FileDialogInfoView)
+        others_layout.addWidget(self.settings_button_main); others_layout.addWidget(self.export_log_button); others_layout.addWidget(self.history_button)
         home_layout.addWidget(defrag_group); home_layout.addWidget(process_group); home_layout.addWidget(others_group); home_layout.addStretch(); self.tabs.addTab(home_tab, "Home")
         options_tab = QWidget(); options_layout = QFormLayout(options_tab); options_layout.setContentsMargins(20, 20, 20, 20); self.browser_combo_options = QComboBox(); self.browser_combo_options.addItems(["chrome", "firefox"]); options_layout.addRow(QLabel("<b>Browser for testing:</b>"), self.browser_combo_options); self.tabs.addTab(options_tab, "Options")
         help_tab = QWidget(); help_layout = QVBoxLayout(help_tab); help_layout.addWidget(QLabel("Bantuan dan Informasi Aplikasi")); self.tabs.addTab(help_tab, "Help")
         self.analyze_button.clicked.connect(self.start_test); self.stop_button.clicked.connect(self.stop_test); self.settings_button_main.clicked.connect(self.open_settings_dialog)
-        self.export_log_button.clicked.connect(self.export_log)
+        self.export_log_button.clicked.connect(self.export_log); self.history_button.clicked.connect(self.open_history_dialog)
 
     def _create_drives_table(self):
         self.drives_group_box = QGroupBox("List Data"); layout = QVBoxLayout(self.drives_group_box); layout.setContentsMargins(5, 5, 5, 5)
-        self.drives_table = QTableWidget(); self.drives_table.setColumnCount(3); self.drives_table.setHorizontalHeaderLabels(["Env", "Site URL", "Active User (Role)"]); self.drives_table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows); self.drives_table.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+        self.drives_table = QTableWidget(); self.drives_table.setColumnCount(3); self.drives_table.setHorizontalHeaderLabels(["Env", "Site URL", "Active User (Role)"]); self.drives_table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows); self.drives_table.setSelectionMode(QAbstractItemView.SelectionMode.ExtendedSelection)
         self.drives_table.setEditTriggers(QAbstractItemView.EditTrigger.DoubleClicked)
         self.credential_delegate = CredentialDelegate(self)
         self.drives_table.setItemDelegateForColumn(2, self.credential_delegate)
         self.drives_table.verticalHeader().setVisible(False); self.drives_table.setShowGrid(True)
         header = self.drives_table.horizontalHeader(); header.setSectionResizeMode(0, QHeaderView.ResizeMode.ResizeToContents); header.setSectionResizeMode(1, QHeaderView.ResizeMode.Stretch); header.setSectionResizeMode(2, QHeaderView.ResizeMode.Stretch)
         layout.addWidget(self.drives_table); self.drives_table.currentItemChanged.connect(self.on_drive_selected)
+        self.drives_table.itemSelectionChanged.connect(lambda: self.on_drive_selected(self.drives_table.currentItem(), None))
 
     def _create_log_area(self):
         self.analyzing_label = QLabel("Select a drive and click Analyze or Defrag."); self.analyzing_label.setObjectName("AnalyzingLabel")
-        self.log_area = QTextEdit(); self.log_area.setObjectName("LogArea"); self.log_area.setReadOnly(True)
+        self.log_area = LogView(self.settings.value("log/max_lines", LogView.DEFAULT_MAX_LINES, type=int))
+        self.log_tabs = QTabWidget(); self.log_tabs.addTab(self.log_area, "Ringkasan")
+
+    def _reset_run_views(self):
+        while self.log_tabs.count() > 1:
+            page = self.log_tabs.widget(1); self.log_tabs.removeTab(1); page.deleteLater()
+        self.log_area.set_max_lines(self.settings.value("log/max_lines", LogView.DEFAULT_MAX_LINES, type=int))
+        self.log_area.clear(); self.log_tabs.setCurrentIndex(0)
+
+    def _create_run_view(self, env_name, total_steps):
+        page = QWidget(); layout = QVBoxLayout(page); layout.setContentsMargins(0, 0, 0, 0)
+        log_view = LogView(self.settings.value("log/max_lines", LogView.DEFAULT_MAX_LINES, type=int))
+        progress_bar = QProgressBar(); progress_bar.setTextVisible(True); progress_bar.setFormat(f"{env_name}: %p%")
+        progress_bar.setMaximum(total_steps if total_steps > 0 else 100); progress_bar.setValue(0)
+        layout.addWidget(log_view, 1); layout.addWidget(progress_bar)
+        self.log_tabs.addTab(page, env_name)
+        return {'env': env_name, 'page': page, 'log_view': log_view, 'progress_bar': progress_bar,
+                'total_steps': total_steps, 'current_step': 0, 'result': None, 'worker': None, 'thread': None,
+                'started_at': None, 'artifacts': []}
 
     def _create_progress_bar(self):
         self.legend_and_progress_widget = QWidget(); layout = QHBoxLayout(self.legend_and_progress_widget); layout.setContentsMargins(0, 5, 0, 5)
@@ -988,8 +1005,9 @@ class TestRunnerApp(QMainWindow):
 
     def on_drive_selected(self, current, previous):
         if not current: self.analyzing_label.setText("No drive selected."); return
-        env_name = self.drives_table.item(current.row(), 0).text().strip()
-        self.analyzing_label.setText(f"Ready to run tests on: {env_name}")
+        selected_rows = sorted(index.row() for index in self.drives_table.selectionModel().selectedRows()) or [current.row()]
+        env_names = [self.drives_table.item(row, 0).text().strip() for row in selected_rows]
+        self.analyzing_label.setText(f"Ready to run tests on: {', '.join(env_names)}")
 
     def open_settings_dialog(self):
         dialog = SettingsDialog(self)
@@ -997,6 +1015,9 @@ class TestRunnerApp(QMainWindow):
             self.log("Settings saved."); self._load_and_set_environments()
         else: self.log("Settings changes canceled.")
             
+    def open_history_dialog(self):
+        HistoryDialog(self.result_store, self).exec()
+
     def set_controls_enabled(self, enabled):
         self.analyze_button.setEnabled(enabled); self.tabs.setEnabled(enabled); self.settings_button_main.setEnabled(enabled); self.drives_table.setEnabled(enabled); self.stop_button.setEnabled(not enabled)
 
@@ -1005,22 +1026,21 @@ class TestRunnerApp(QMainWindow):
         self._load_and_set_environments()
 
     def export_log(self):
-        log_content = self.log_area.toPlainText()
-        if not log_content.strip():
+        # Log lengkap sudah ada di disk (Result/logs); export cukup menyalin file run terakhir
+        if not self.run_log:
             QMessageBox.information(self, "Export Log", "Tidak ada log untuk di-export.")
             return
 
         timestamp = time.strftime("%Y%m%d-%H%M%S")
-        default_filename = os.path.join(os.getcwd(), f"test_log_{timestamp}.txt")
+        default_filename = os.path.join(os.getcwd(), f"test_log_{timestamp}.jsonl")
         
-        filePath, _ = QFileDialog.getSaveFileName(self, "Save Log File", default_filename, "Text Files (*.txt);;All Files (*)")
+        filePath, _ = QFileDialog.getSaveFileName(self, "Save Log File", default_filename, "JSON Lines (*.jsonl);;All Files (*)")
 
         if not filePath:
             return
 
         try:
-            with open(filePath, 'w', encoding='utf-8') as f:
-                f.write(log_content)
+            self.run_log.export(filePath)
             
             if self.last_error_screenshot_path and os.path.exists(self.last_error_screenshot_path):
                 dir_name = os.path.dirname(filePath)
@@ -1036,16 +1056,16 @@ class TestRunnerApp(QMainWindow):
     
     def start_test(self):
         self.last_error_screenshot_path = None
-        selected_rows = self.drives_table.selectionModel().selectedRows()
+        selected_rows = sorted(index.row() for index in self.drives_table.selectionModel().selectedRows())
         if not selected_rows:
             QMessageBox.warning(self, "No Environment Selected", "Please select an environment from the 'Drives Available' list to test."); return
 
-        selected_row = selected_rows[0].row(); selected_env = self.drives_table.item(selected_row, 0).text().strip()
-        self.set_controls_enabled(False); self.log_area.clear(); self.progress_bar.setValue(0)
-        self.log(f"Preparing to test environment: '{selected_env}'..."); self.analyzing_label.setText(f"Analyzing {selected_env}...")
-        
-        env_details = self.environments_data.get(selected_env, {})
-        url = env_details.get("url", "")
+        selected_envs = [self.drives_table.item(row, 0).text().strip() for row in selected_rows]
+        if self.run_log: self.run_log.close()
+        self.run_log = RunLog(os.path.join(RUN_LOG_DIR, f"run_{time.strftime('%Y%m%d-%H%M%S')}.jsonl"))
+        self.set_controls_enabled(False); self._reset_run_views(); self.progress_bar.setValue(0)
+        self.log(f"Preparing to test environment: {', '.join(repr(env) for env in selected_envs)}...")
+        self.analyzing_label.setText(f"Analyzing {', '.join(selected_envs)}...")
         
         try:
             with open(FLOWS_CONFIG_FILE, 'r') as f: all_flows = json.load(f)
@@ -1055,40 +1075,80 @@ class TestRunnerApp(QMainWindow):
         active_flow_names = self.settings.value("active_flows", [], type=list)
         if not active_flow_names:
             QMessageBox.warning(self, "No Tests", "Tidak ada alur tes yang dicentang untuk dijalankan. Silakan aktifkan di Pengaturan."); self.set_controls_enabled(True); return
-        
-        self.log(f"Menggunakan kredensial yang aktif untuk environment '{selected_env}'...")
-        credentials = env_details.get("credentials", [])
-        active_user_name = env_details.get("active_credential", "")
-        
-        target_cred = next((c for c in credentials if c.get("username") == active_user_name), None)
-        
-        if not target_cred:
-            QMessageBox.critical(self, "Error Kredensial", f"Kredensial aktif '{active_user_name}' tidak ditemukan di environment '{selected_env}'.\n\nSilakan periksa Pengaturan.")
-            self.set_controls_enabled(True)
-            return
 
-        username = target_cred['username']
-        password = target_cred['password']
-        role = target_cred.get('role', '') # Role yang sebenarnya digunakan untuk tes
-        self.log(f"Tes akan dijalankan menggunakan user: {username} (Role: {role or 'N/A'})")
-        
         test_flows_to_run = {name: all_flows[name] for name in all_flows if name in active_flow_names}
+        steps_per_run = sum(len(data.get('actions', [])) for data in test_flows_to_run.values())
+        flow_settings = {"headless": self.settings.value("flow/headless", False, type=bool),
+                         "parallel_sessions": self.settings.value("flow/parallel_sessions", 1, type=int),
+                         "smart_sleep": self.settings.value("flow/smart_sleep", False, type=bool),
+                         "batch_actions": self.settings.value("flow/batch_actions", False, type=bool),
+                         "trace": self.settings.value("flow/trace", False, type=bool),
+                         "step_screenshots": self.settings.value("flow/step_screenshots", False, type=bool),
+                         "auth_cache": self.settings.value("flow/auth_cache", False, type=bool),
+                         "retry_budget": self.settings.value("flow/retry_budget", 20, type=int),
+                         "flight_recorder_frames": self.settings.value("flow/flight_recorder_frames", 0, type=int),
+                         "negative_window_ms": self.settings.value("flow/negative_window_ms", 0, type=int),
+                         "screenshot_format": self.settings.value("flow/screenshot_format", "png"),
+                         "screenshot_quality": self.settings.value("flow/screenshot_quality", 85, type=int)}
+        keep_browsers = self.settings.value("flow/keep_browsers", False, type=bool)
+        if keep_browsers and self.browser_pool is None: self.browser_pool = load_engine().BrowserPool()
+        elif not keep_browsers and self.browser_pool is not None and len(self.browser_pool): self.browser_pool.shutdown()
+
+        for selected_env in selected_envs:
+            env_details = self.environments_data.get(selected_env, {})
+            url = env_details.get("url", "")
+
+            self.log(f"Menggunakan kredensial yang aktif untuk environment '{selected_env}'...")
+            credentials = env_details.get("credentials", [])
+            active_user_name = env_details.get("active_credential", "")
             
-        self.total_test_steps = sum(len(data.get('actions', [])) for data in test_flows_to_run.values())
+            target_cred = next((c for c in credentials if c.get("username") == active_user_name), None)
+            
+            if not target_cred:
+                QMessageBox.critical(self, "Error Kredensial", f"Kredensial aktif '{active_user_name}' tidak ditemukan di environment '{selected_env}'.\n\nSilakan periksa Pengaturan.")
+                self.log(f"Environment '{selected_env}' dilewati karena kredensial aktif tidak ditemukan.")
+                continue
+
+            username = target_cred['username']
+            password = target_cred['password']
+            role = target_cred.get('role', '') # Role yang sebenarnya digunakan untuk tes
+            self.log(f"Tes akan dijalankan menggunakan user: {username} (Role: {role or 'N/A'})")
+
+            run = self._create_run_view(selected_env, steps_per_run)
+            run.update(url=url, username=username, browser=self.browser_combo_options.currentText())
+            # Setiap environment menandai status aksi pada salinan flow miliknya sendiri
+            thread = QThread()
+            worker = SeleniumWorker(browser=self.browser_combo_options.currentText(), url=url, 
+                                    username=username, password=password, role=role, 
+                                    flow_settings=flow_settings, test_flows_data=copy.deepcopy(test_flows_to_run),
+                                    browser_pool=self.browser_pool if keep_browsers else None)
+            run['worker'] = worker; run['thread'] = thread
+
+            worker.moveToThread(thread); thread.started.connect(worker.run_tests)
+            worker.finished.connect(partial(self.on_test_finished, run)); worker.progress.connect(run['log_view'].append)
+            worker.run_event.connect(partial(self.on_worker_event, run))
+            # Log dan event ditulis langsung dari thread worker agar tetap tersimpan meski GUI tersendat/crash
+            worker.progress.connect(partial(self.run_log.log, selected_env), Qt.ConnectionType.DirectConnection)
+            worker.run_event.connect(partial(self.run_log.event, selected_env), Qt.ConnectionType.DirectConnection)
+            worker.finished.connect(thread.quit); worker.finished.connect(worker.deleteLater)
+            thread.finished.connect(thread.deleteLater)
+            self.active_workers.append(run)
+            self.worker, self.thread = worker, thread
+
+        if not self.active_workers:
+            self.set_controls_enabled(True); self.analyzing_label.setText("Tidak ada environment yang dapat dijalankan."); return
+
+        self.total_test_steps = steps_per_run * len(self.active_workers)
         self.current_test_step = 0; self.progress_bar.setMaximum(self.total_test_steps if self.total_test_steps > 0 else 100)
+        if len(self.active_workers) == 1: self.log_tabs.setCurrentWidget(self.active_workers[0]['page'])
+        for run in self.active_workers: run['thread'].start()
 
-        flow_settings = {"headless": self.settings.value("flow/headless", False, type=bool)}
-        self.thread = QThread()
-        self.worker = SeleniumWorker(browser=self.browser_combo_options.currentText(), url=url, 
-                                     username=username, password=password, role=role, 
-                                     flow_settings=flow_settings, test_flows_data=test_flows_to_run)
-            
-        self.worker.moveToThread(self.thread); self.thread.started.connect(self.worker.run_tests)
-        self.worker.finished.connect(self.on_test_finished); self.worker.progress.connect(self.log)
-        self.worker.finished.connect(self.thread.quit); self.worker.finished.connect(self.worker.deleteLater)
-        self.thread.finished.connect(self.thread.deleteLater)
-        self.active_workers.append({'worker': self.worker, 'thread': self.thread})
-        self.thread.start()
+    def closeEvent(self, event):
+        for run in self.active_workers:
+            if run.get('worker') and run.get('result') is None: run['worker'].stop()
+        if self.browser_pool is not None: self.browser_pool.shutdown()
+        if self.run_log: self.run_log.close()
+        super().closeEvent(event)
 
     def stop_test(self):
         if not self.active_workers:
@@ -1097,53 +1157,101 @@ class TestRunnerApp(QMainWindow):
 
         self.log("\n>>> MENGIRIM PERINTAH BERHENTI...")
         for item in self.active_workers:
-            if item.get('worker'):
+            if item.get('worker') and item.get('result') is None:
                 item['worker'].stop()
         
         self.log(">>> Menunggu aksi yang sedang berjalan selesai sebelum berhenti sepenuhnya.")
         self.stop_button.setEnabled(False)
 
     def log(self, message):
-        self.log_area.append(message)
-        if message.strip().startswith("- Aksi:"):
-            self.current_test_step += 1
-            if self.total_test_steps > 0: self.progress_bar.setValue(self.current_test_step)
+        self.log_area.append(message); self._record(None, message)
+
+    def log_run(self, run, message):
+        run['log_view'].append(message); self._record(run['env'], message)
+
+    def _record(self, env, message):
+        if not self.run_log: return
+        if Qt.mightBeRichText(message): message = QTextDocumentFragment.fromHtml(message).toPlainText()
+        self.run_log.log(env, message)
+
+    def on_worker_event(self, run, event):
+        if event.kind == RunEvent.RUN_START:
+            # Jumlah aksi sebenarnya dari rencana yang terkompilasi menggantikan perkiraan awal
+            total = event.data.get("total_actions", run['total_steps'])
+            self.total_test_steps += total - run['total_steps']; run['total_steps'] = total
+            run['progress_bar'].setMaximum(total if total > 0 else 100)
+            self.progress_bar.setMaximum(self.total_test_steps if self.total_test_steps > 0 else 100)
+            run['started_at'] = datetime.fromtimestamp(event.ts).isoformat(timespec="milliseconds")
+        elif event.kind == RunEvent.ARTIFACT:
+            run['artifacts'].append({"flow": event.flow, "index": event.index, "created_at": datetime.fromtimestamp(event.ts).isoformat(timespec="milliseconds"), **event.data})
+        elif event.kind == RunEvent.ACTION_END:
+            run['current_step'] += 1; self.current_test_step += 1
+            if run['total_steps'] > 0: run['progress_bar'].setValue(min(run['current_step'], run['total_steps']))
+            if self.total_test_steps > 0: self.progress_bar.setValue(min(self.current_test_step, self.total_test_steps))
 
     # --- PERUBAHAN ---: Metode ini sekarang menerima data flow hasil
-    def on_test_finished(self, result, result_flows):
+    def on_test_finished(self, run, result, result_flows):
         success, message, screenshot_path = result
+        env_name = run['env']; run['result'] = result
         if not success and screenshot_path:
             self.last_error_screenshot_path = screenshot_path
         
-        # --- PERUBAHAN ---: Simpan hasil flow ke file JSON di folder Result
+        # Simpan hasil flow ke riwayat SQLite di folder Result
         if result_flows:
-            timestamp = time.strftime("%Y%m%d-%H%M%S")
-            result_filename = f"test_result_{timestamp}.json"
-            result_filepath = os.path.join(RESULT_DIR, result_filename)
             try:
-                with open(result_filepath, 'w', encoding='utf-8') as f:
-                    json.dump(result_flows, f, indent=4)
-                self.log(f"\n--- Laporan hasil tes disimpan di: {result_filepath} ---")
-            except Exception as e:
-                self.log(f"\n(Peringatan: Gagal menyimpan laporan hasil tes: {e})")
+                run_id = self.result_store.record_run(env_name, run['url'], run['browser'], run['username'], run['started_at'],
+                                                      result, result_flows, run['artifacts'])
+                self.log_run(run, f"\n--- Hasil tes disimpan ke {self.result_store.path} (run #{run_id}) ---")
+            except (sqlite3.Error, OSError) as e:
+                self.log_run(run, f"\n(Peringatan: Gagal menyimpan laporan hasil tes: {e})")
+        
+        run['progress_bar'].setMaximum(max(run['total_steps'], 1)); run['progress_bar'].setValue(run['progress_bar'].maximum())
+        if success: final_message, color = "COMPLETED", "#27ae60"
+        else: final_message, color = "FAILED", "#c0392b"
+        self.log_tabs.setTabText(self.log_tabs.indexOf(run['page']), f"{env_name} ({final_message})")
         
+        self.log_run(run, f"<br><font color='{color}'>--- <b>RESULT: {final_message}</b> ---</font>")
+        self.log_run(run, f"<font color='{color}'>{message}</font>")
+        if screenshot_path: self.log_run(run, f"Error screenshot: {os.path.abspath(screenshot_path)}")
+
+        if all(item.get('result') is not None for item in self.active_workers):
+            self._finish_all_runs()
+
+    def _finish_all_runs(self):
         self.progress_bar.setValue(self.progress_bar.maximum())
-        current_env_item = self.drives_table.currentItem()
-        env_name = self.drives_table.item(current_env_item.row(), 0).text().strip() if current_env_item else "the operation"
-        if success:
-            final_message, color = "COMPLETED", "#27ae60"; self.analyzing_label.setText(f"Analysis of {env_name} completed.")
+        failed_envs = [run['env'] for run in self.active_workers if not run['result'][0]]
+        env_names = ", ".join(run['env'] for run in self.active_workers)
+        if not failed_envs:
+            final_message, color = "COMPLETED", "#27ae60"; self.analyzing_label.setText(f"Analysis of {env_names} completed.")
         else:
-            final_message, color = "FAILED", "#c0392b"; self.analyzing_label.setText(f"Operation on {env_name} failed.")
-        
-        self.log_area.append(f"<br><font color='{color}'>--- <b>RESULT: {final_message}</b> ---</font>")
-        self.log_area.append(f"<font color='{color}'>{message}</font>")
+            final_message, color = "FAILED", "#c0392b"; self.analyzing_label.setText(f"Operation on {', '.join(failed_envs)} failed.")
+
+        self.log(f"<br><font color='{color}'>--- <b>RESULT: {final_message}</b> ---</font>")
+        for run in self.active_workers:
+            run_success, run_message, screenshot_path = run['result']
+            run_color = "#27ae60" if run_success else "#c0392b"
+            self.log(f"<font color='{run_color}'><b>{run['env']}</b>: {'COMPLETED' if run_success else 'FAILED'}</font>")
+            if not run_success:
+                self.log(f"<font color='{run_color}'>{run_message}</font>")
+                if screenshot_path: self.log(f"Error screenshot: {os.path.abspath(screenshot_path)}")
+        if len(self.active_workers) > 1:
+            self.log(f"Ringkasan: {len(self.active_workers) - len(failed_envs)} dari {len(self.active_workers)} environment berhasil.")
 
-        if screenshot_path: self.log(f"Error screenshot: {os.path.abspath(screenshot_path)}")
         self.set_controls_enabled(True)
         self.active_workers.clear()
+        self.run_log.flush()
 
 if __name__ == '__main__':
-    app = QApplication(sys.argv)
+    if sys.argv[1:2] == ["report"]:
+        from tmc.cli import main
+        sys.exit(main(sys.argv[1:]))
+    # --startup-check: ukur waktu hingga jendela tampil lalu keluar (kode 1 bila melewati anggaran), untuk CI
+    startup_check = "--startup-check" in sys.argv
+    app = QApplication([arg for arg in sys.argv if arg != "--startup-check"])
     window = TestRunnerApp()
     window.show()
+    startup_ms, within_budget = window.report_startup_time()
+    if startup_check:
+        print(f"Startup: {startup_ms:.0f} ms (anggaran {STARTUP_BUDGET_MS} ms){'' if within_budget else ' - MELEWATI ANGGARAN'}")
+        sys.exit(0 if within_budget else 1)
     sys.exit(app.exec())
\ No newline at end of file
@@ -0,0 +1,56 @@
+import threading
+import time
+
+import pytest
+from selenium.common.exceptions import InvalidElementStateException
+
+import tmc.engine
+from tmc.engine import FlowEngine
+
+
+class FakeDriver:
+    """Driver palsu: 'Buka URL' pertama (login) menunggu sesi lain di barrier agar login berjalan bersamaan di kedua sesi."""
+    def __init__(self, barrier, fail, delay):
+        self.barrier = barrier; self.fail = fail; self.delay = delay; self.current_url = "about:blank"
+
+    def get(self, url):
+        if self.barrier is not None:
+            self.barrier.wait(); self.barrier = None; time.sleep(self.delay)
+            if self.fail: raise InvalidElementStateException("login ditolak")
+        self.current_url = url
+
+    def execute(self, command, params=None): return {"value": None}
+
+    def quit(self): pass
+
+
+def flows():
+    return {
+        "01. Login": {"provides": ["session:logged_in"], "actions": [{"action": "Buka URL", "value": "{URL}"}]},
+        "02. A": {"requires": ["session:logged_in"], "actions": [{"action": "Buka URL", "value": "{URL}/a"}]},
+        "03. B": {"requires": ["session:logged_in"], "actions": [{"action": "Buka URL", "value": "{URL}/b"}]},
+    }
+
+
+@pytest.mark.parametrize("failing_finishes_first", [True, False])
+def test_setup_flow_failure_in_one_session_wins_merge(monkeypatch, tmp_path, failing_finishes_first):
+    monkeypatch.setattr(tmc.engine, "RESULT_DIR", str(tmp_path))
+    barrier = threading.Barrier(2, timeout=10); created = []; lock = threading.Lock()
+
+    def create_driver(self, log=None):
+        with lock:
+            fail = not created
+            delay = (0.0 if fail else 0.2) if failing_finishes_first else (0.2 if fail else 0.0)
+            created.append(FakeDriver(barrier, fail, delay))
+            return created[-1]
+
+    monkeypatch.setattr(FlowEngine, "_create_driver", create_driver)
+    data = flows()
+    engine = FlowEngine("chrome", "https://contoh.test", "user", "rahasia", "admin", {"headless": True, "parallel_sessions": 2}, data)
+    success, _, _ = engine.run_tests()
+
+    assert not success and len(created) == 2
+    login = engine.test_flows_data["01. Login"]
+    assert login["actions"][0]["status"] == "FAILED"
+    assert login["actions"][0]["error"] == "InvalidElementStateException"
+    assert "timing" in login
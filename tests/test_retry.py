@@ -0,0 +1,62 @@
+import pytest
+
+from tmc.engine import FlowEngine
+from tmc.retry import RetryPolicy
+
+
+def make_engine():
+    return FlowEngine("Chrome", "https://contoh.test", "user", "rahasia", "admin", {}, {})
+
+
+def flow(retry=None, action_retry=None):
+    action = {"action": "Klik Elemen", "by": "ID", "selector": "tombol"}
+    if action_retry is not None: action["retry"] = action_retry
+    data = {"actions": [{"action": "Buka URL", "value": "{URL}"}, action]}
+    if retry is not None: data["retry"] = retry
+    return data
+
+
+@pytest.mark.parametrize("policy, message", [
+    ({"on": "TimeoutException"}, "'on' harus berupa daftar"),
+    ({"on": ["TimeoutException", 3]}, "'on' harus berupa daftar"),
+    ({"attempts": "three"}, "'attempts' harus berupa bilangan bulat"),
+    ({"attempts": 0}, "'attempts' harus berupa bilangan bulat"),
+    ({"attempts": True}, "'attempts' harus berupa bilangan bulat"),
+    ({"backoff_ms": "100"}, "'backoff_ms' harus berupa angka"),
+    ({"factor": None}, "'factor' harus berupa angka"),
+    ({"max_backoff_ms": "1s"}, "'max_backoff_ms' harus berupa angka"),
+    ({"delay_ms": 100}, "kunci tidak dikenal: delay_ms"),
+    (True, "harus berupa objek kebijakan atau false"),
+    (["TimeoutException"], "harus berupa objek kebijakan atau false"),
+])
+def test_check_rejects_malformed_policy(policy, message):
+    with pytest.raises(ValueError, match=message): RetryPolicy.check(policy)
+
+
+def test_check_accepts_valid_policies():
+    RetryPolicy.check(False)
+    RetryPolicy.check({"on": ["TimeoutException"], "attempts": 3, "backoff_ms": 100, "factor": 2.0, "max_backoff_ms": None})
+
+
+@pytest.mark.parametrize("policy", [{"on": "TimeoutException"}, {"attempts": "three"}, {"delay_ms": 100}])
+def test_compile_flow_rejects_bad_action_retry(policy):
+    with pytest.raises(ValueError, match=r"^Alur 'Form', aksi #2: retry: "):
+        make_engine().compile_flow("Form", flow(action_retry=policy))
+
+
+@pytest.mark.parametrize("retry, message", [
+    ({"*": {"attempts": "three"}}, r"^Alur 'Form', retry\['\*'\]: 'attempts'"),
+    ({"Klik Elemen": {"on": "TimeoutException"}}, r"^Alur 'Form', retry\['Klik Elemen'\]: 'on'"),
+    ({"Klik Elemen": {"delay_ms": 5}}, r"^Alur 'Form', retry\['Klik Elemen'\]: kunci tidak dikenal"),
+    ({"Klik Tombol": {"attempts": 2}}, r"^Alur 'Form', retry: jenis aksi 'Klik Tombol' tidak dikenali"),
+    ([{"attempts": 2}], r"^Alur 'Form', retry: harus berupa peta"),
+])
+def test_compile_flow_rejects_bad_flow_retry(retry, message):
+    with pytest.raises(ValueError, match=message):
+        make_engine().compile_flow("Form", flow(retry=retry))
+
+
+def test_compile_flow_resolves_policy_once():
+    plan = make_engine().compile_flow("Form", flow(retry={"*": {"attempts": 4}}, action_retry={"backoff_ms": 50}))
+    assert plan[1].retry.attempts == 4 and plan[1].retry.backoff_ms == 50
+    assert make_engine().compile_flow("Form", flow(retry=False))[1].retry is None
@@ -0,0 +1,48 @@
+import json
+
+import pytest
+
+from tmc.cli import main
+from tmc.shard import check_shard_set, merge_shard_results
+
+
+def document(k, n, selected, setup=("01. Login",), order=("01. Login", "02. A", "03. B", "04. C")):
+    flows = {name: {"actions": [{"action": "Buka URL", "value": "{URL}", "status": "DONE"}]} for name in selected}
+    return {"shard": [k, n], "selected": list(selected), "setup": list(setup), "order": list(order),
+            "runs": [{"env": "DEV", "url": "https://contoh.test", "browser": "chrome", "username": "user", "started_at": None,
+                      "result": [True, "OK", None], "flows": flows, "artifacts": []}]}
+
+
+def write(tmp_path, name, content):
+    path = tmp_path / name; path.write_text(json.dumps(content), encoding="utf-8"); return str(path)
+
+
+def test_check_shard_set_accepts_one_split_sharing_setup_flows():
+    check_shard_set([document(1, 2, ["01. Login", "02. A", "04. C"]), document(2, 2, ["01. Login", "03. B"])])
+
+
+def test_check_shard_set_rejects_duplicate_shard():
+    with pytest.raises(ValueError, match=r"shard 1/2 diberikan lebih dari sekali"):
+        check_shard_set([document(1, 2, ["01. Login", "02. A"]), document(1, 2, ["01. Login", "03. B"])])
+
+
+def test_check_shard_set_rejects_overlapping_selected():
+    with pytest.raises(ValueError, match=r"Alur '02. A' ada di shard 1/2 dan 2/2"):
+        check_shard_set([document(1, 2, ["01. Login", "02. A"]), document(2, 2, ["01. Login", "02. A", "03. B"])])
+
+
+def test_check_shard_set_rejects_different_counts():
+    with pytest.raises(ValueError, match="jumlah shard yang berbeda"):
+        check_shard_set([document(1, 2, ["01. Login", "02. A"]), document(2, 3, ["01. Login", "03. B"])])
+
+
+@pytest.mark.parametrize("second", [document(1, 2, ["01. Login", "03. B"]), document(2, 2, ["01. Login", "02. A"])])
+def test_merge_command_rejects_inconsistent_shards(tmp_path, capsys, second):
+    first = write(tmp_path, "shard-1of2.json", document(1, 2, ["01. Login", "02. A"]))
+    assert main(["merge", first, write(tmp_path, "shard-2of2.json", second), "--no-history"]) == 2
+
+
+def test_merge_keeps_flows_json_order():
+    merged = merge_shard_results([document(2, 2, ["01. Login", "03. B"]), document(1, 2, ["01. Login", "02. A", "04. C"])])
+    assert list(merged[0]["flows"]) == ["01. Login", "02. A", "03. B", "04. C"]
+    assert merged[0]["result"][0]
@@ -0,0 +1,12 @@
+"""TMC: test runner Selenium berbasis flows.json (GUI di TMC.py, CLI lewat `python -m tmc`)."""
+import os
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# --- PERUBAHAN ---: Tentukan direktori untuk menyimpan hasil tes
+RESULT_DIR = os.path.join(BASE_DIR, "Result")
+RUN_LOG_DIR = os.path.join(RESULT_DIR, "logs")
+RESULT_DB_FILE = os.path.join(RESULT_DIR, "results.db")
+FRAMES_DIR = os.path.join(RESULT_DIR, "frames")
+DRIVER_CACHE_FILE = os.path.join(BASE_DIR, "drivers", "driver_cache.json")
+CHECKPOINT_DIR = os.path.join(RESULT_DIR, "checkpoints")
+SESSION_CACHE_DIR = os.path.join(RESULT_DIR, "sessions")
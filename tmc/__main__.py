@@ -0,0 +1,5 @@
+import sys
+
+from tmc.cli import main
+
+sys.exit(main())
@@ -0,0 +1,5 @@
+"""Katalog aksi flows.json yang dibutuhkan dialog editor tanpa memuat Selenium."""
+
+ACTIONS_WITHOUT_LOCATOR = {"Buka URL", "Tunggu URL Mengandung", "Tidur", "Beralih ke Konten Utama", "Tunggu Halaman Siap"}
+ACTIONS_WITH_VALUE = {"Buka URL", "Isi Teks", "Tunggu URL Mengandung", "Verifikasi Teks Elemen", "Tidur", "Tunggu Halaman Siap",
+                      "Verifikasi Elemen TIDAK Muncul"}
@@ -0,0 +1,202 @@
+"""Pasca-proses artefak run di thread latar: screenshot (watermark, encode PNG/JPEG/WebP), frame per langkah
+yang di-dedup, dan rekaman frame terakhir saat gagal."""
+import io
+import os
+import sys
+import hashlib
+import threading
+import collections
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+
+# Pastikan Anda sudah menginstal Pillow: pip install Pillow
+try:
+    from PIL import Image, ImageDraw, ImageFont, features
+except ImportError:
+    print("ERROR: Pillow library not found. Please install it using: pip install Pillow")
+    sys.exit(1)
+
+# format -> (nama format Pillow, ekstensi file)
+IMAGE_FORMATS = {"png": ("PNG", ".png"), "jpeg": ("JPEG", ".jpg"), "webp": ("WEBP", ".webp")}
+DEFAULT_QUALITY = 85
+
+
+@lru_cache(maxsize=8)
+def load_font(size):
+    """Font watermark (Arial bila tersedia, selain itu font bawaan Pillow). Dimuat sekali per ukuran.
+    Mengembalikan (font, True bila Arial ditemukan)."""
+    try:
+        return ImageFont.truetype("arial.ttf", size=size), True
+    except IOError:
+        return ImageFont.load_default(size=size), False
+
+
+def draw_watermark(image, text, color, size=60, margin=20):
+    """Menggambar teks di pojok kanan bawah gambar RGBA. Mengembalikan True bila Arial dipakai."""
+    font, font_found = load_font(size)
+    draw = ImageDraw.Draw(image)
+    text_bbox = draw.textbbox((0, 0), text, font=font)
+    text_width = text_bbox[2] - text_bbox[0]
+    text_height = text_bbox[3] - text_bbox[1]
+    img_width, img_height = image.size
+    draw.text((img_width - text_width - margin, img_height - text_height - margin), text, font=font, fill=color)
+    return font_found
+
+
+def encode_image(image, image_format="png", quality=DEFAULT_QUALITY):
+    pil_format, _ = IMAGE_FORMATS[image_format]
+    if pil_format == "JPEG": image = image.convert("RGB") # JPEG tidak mendukung alpha
+    buffer = io.BytesIO()
+    if pil_format == "PNG": image.save(buffer, pil_format, optimize=False)
+    else: image.save(buffer, pil_format, quality=quality)
+    return buffer.getvalue()
+
+
+def screenshot_path(base_path, image_format="png"):
+    return base_path + IMAGE_FORMATS[image_format][1]
+
+
+def save_screenshot(png_bytes, path, image_format="png", quality=DEFAULT_QUALITY, watermark=None, color=(255, 0, 0, 255)):
+    """Memproses bytes PNG dari driver di memori (tanpa simpan-lalu-buka-ulang) dan menulis hasilnya ke `path`.
+    Mengembalikan True bila font Arial tersedia (None bila tanpa watermark)."""
+    image = Image.open(io.BytesIO(png_bytes))
+    font_found = None
+    if watermark:
+        image = image.convert("RGBA"); font_found = draw_watermark(image, watermark, color)
+    data = png_bytes if image_format == "png" and not watermark else encode_image(image, image_format, quality)
+    with open(path, 'wb') as f: f.write(data)
+    return font_found
+
+
+class ArtifactProcessor:
+    """Executor latar bersama untuk pasca-proses artefak, sehingga thread tes tidak menunggu encode dan tulis file."""
+    MAX_WORKERS = 2
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, max_workers=MAX_WORKERS):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tmc-artifact")
+
+    @classmethod
+    def shared(cls):
+        with cls._shared_lock:
+            if cls._shared is None: cls._shared = cls()
+            return cls._shared
+
+    def submit(self, fn, *args, **kwargs):
+        return self._executor.submit(fn, *args, **kwargs)
+
+
+def dhash(image, size=16):
+    """Difference hash (size x size bit): frame yang mirip menghasilkan hash dengan jarak Hamming kecil."""
+    pixels = list(image.convert("L").resize((size + 1, size), Image.Resampling.BILINEAR).getdata())
+    bits = 0
+    for row in range(size):
+        for column in range(size):
+            bits = (bits << 1) | (pixels[row * (size + 1) + column] > pixels[row * (size + 1) + column + 1])
+    return bits
+
+
+class FrameStore:
+    """Penyimpanan frame per-langkah yang content-addressed: frame dikecilkan dan dikompres, diberi id dari sha256
+    isinya, dan frame yang identik/nyaris identik (dHash) memakai ulang id yang sudah ada. Aman dipakai dari
+    beberapa thread."""
+    MAX_WIDTH = 960
+    IMAGE_FORMAT = "webp"
+    QUALITY = 60
+    NEAR_DUPLICATE_DISTANCE = 2 # Jarak Hamming dHash (256 bit) maksimum untuk dianggap frame yang sama
+    RECENT_FRAMES = 64
+
+    def __init__(self, root):
+        self.root = root
+        self._lock = threading.Lock()
+        self._by_raw_hash = {} # sha256 bytes PNG mentah -> frame_id
+        self._recent = [] # [(dhash, frame_id)] frame unik terakhir
+        self._stored_ids = set() # frame_id yang sudah ada di disk
+        self.stats = {"frames": 0, "stored": 0, "duplicates": 0, "bytes": 0}
+
+    def path_for(self, frame_id):
+        return os.path.join(self.root, frame_id[:2], frame_id + IMAGE_FORMATS[self.IMAGE_FORMAT][1])
+
+    def add(self, png_bytes):
+        """Menyimpan satu frame (bytes PNG dari driver) dan mengembalikan frame_id-nya."""
+        raw_hash = hashlib.sha256(png_bytes).hexdigest()
+        with self._lock:
+            self.stats["frames"] += 1
+            if raw_hash in self._by_raw_hash:
+                self.stats["duplicates"] += 1; return self._by_raw_hash[raw_hash]
+
+        image = Image.open(io.BytesIO(png_bytes)); image.load()
+        fingerprint = dhash(image)
+        with self._lock:
+            similar = next((frame_id for other, frame_id in reversed(self._recent)
+                            if bin(fingerprint ^ other).count("1") <= self.NEAR_DUPLICATE_DISTANCE), None)
+            if similar:
+                self._by_raw_hash[raw_hash] = similar; self.stats["duplicates"] += 1
+                return similar
+
+        if image.width > self.MAX_WIDTH:
+            image = image.resize((self.MAX_WIDTH, round(image.height * self.MAX_WIDTH / image.width)), Image.Resampling.LANCZOS)
+        data = encode_image(image, self.IMAGE_FORMAT, self.QUALITY)
+        frame_id = hashlib.sha256(data).hexdigest()[:20]
+        path = self.path_for(frame_id)
+        with self._lock:
+            # Cek dan simpan dalam satu langkah: frame yang sama dari thread lain (atau dari run sebelumnya) dihitung
+            # sebagai duplikat, sehingga frames == stored + duplicates
+            if frame_id in self._stored_ids or os.path.exists(path):
+                self.stats["duplicates"] += 1
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                temporary_path = f"{path}.{threading.get_ident()}.tmp"
+                with open(temporary_path, 'wb') as f: f.write(data)
+                os.replace(temporary_path, path)
+                self.stats["stored"] += 1; self.stats["bytes"] += len(data)
+            self._stored_ids.add(frame_id)
+            self._by_raw_hash[raw_hash] = frame_id
+            self._recent = (self._recent + [(fingerprint, frame_id)])[-self.RECENT_FRAMES:]
+        return frame_id
+
+
+class FrameRecorder:
+    """Ring buffer frame terakhir per sesi ("flight recorder"). Frame disimpan sebagai bytes PNG dari driver, dibatasi
+    jumlah dan total ukurannya; hanya ditulis ke disk (lewat `save_animation`) saat sebuah aksi gagal."""
+    DEFAULT_MAX_MB = 16
+
+    def __init__(self, max_frames, max_mb=DEFAULT_MAX_MB):
+        self.max_frames = max_frames; self.max_bytes = int(max_mb * 1024 * 1024)
+        self._frames = collections.deque(); self._bytes = 0
+
+    def add(self, png_bytes, caption=""):
+        self._frames.append((png_bytes, caption)); self._bytes += len(png_bytes)
+        while len(self._frames) > 1 and (len(self._frames) > self.max_frames or self._bytes > self.max_bytes):
+            dropped, _ = self._frames.popleft(); self._bytes -= len(dropped)
+
+    def frames(self):
+        return list(self._frames)
+
+    def __len__(self):
+        return len(self._frames)
+
+
+ANIMATION_FORMAT = "webp" if features.check_module("webp") else "gif"
+
+
+def animation_path(base_path):
+    return f"{base_path}.{ANIMATION_FORMAT}"
+
+
+def save_animation(frames, path, frame_ms=800, max_width=800):
+    """Menulis [(bytes PNG, keterangan)] sebagai animasi WebP (atau GIF bila WebP animasi tidak didukung Pillow)."""
+    font, _ = load_font(18)
+    images = []
+    for png_bytes, caption in frames:
+        image = Image.open(io.BytesIO(png_bytes)).convert("RGB")
+        if image.width > max_width:
+            image = image.resize((max_width, round(image.height * max_width / image.width)), Image.Resampling.LANCZOS)
+        if caption:
+            draw = ImageDraw.Draw(image)
+            draw.rectangle(draw.textbbox((6, 6), caption, font=font), fill=(0, 0, 0))
+            draw.text((6, 6), caption, font=font, fill=(255, 255, 0))
+        images.append(image)
+    options = {"quality": 70} if ANIMATION_FORMAT == "webp" else {}
+    images[0].save(path, save_all=True, append_images=images[1:], duration=frame_ms, loop=0, **options)
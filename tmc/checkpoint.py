@@ -0,0 +1,196 @@
+"""Checkpoint sesi browser per alur (cookie, local/session storage, URL) untuk melanjutkan run yang gagal,
+dan cache snapshot sesi login agar alur login tidak perlu diulang setiap run.
+
+Bila flow_settings 'checkpoints' aktif (run/resume CLI), setelah setiap alur selesai keadaan browser sesi disimpan
+ke Result/checkpoints/<host>_<username>.json; saat gagal, alur/aksi yang gagal dan keadaan browser saat itu ikut
+dicatat. `python -m tmc resume` membuka browser baru, memulihkan keadaan tersebut dan melanjutkan dari alur (atau
+aksi) yang gagal.
+File checkpoint dan snapshot sesi berisi cookie login; perlakukan seperti kredensial.
+"""
+import os
+import re
+import json
+import time
+import hashlib
+import threading
+from datetime import datetime
+from urllib.parse import urlsplit
+
+from tmc import CHECKPOINT_DIR, SESSION_CACHE_DIR
+
+# Storage diambil dari halaman utama walau fokus driver sedang di dalam iframe (bila origin-nya sama)
+CAPTURE_STORAGE_SCRIPT = """
+const dump = (storage) => {
+    const items = {};
+    for (let i = 0; i < storage.length; i++) { const key = storage.key(i); items[key] = storage.getItem(key); }
+    return items;
+};
+const inFrame = window.top !== window.self;
+try { return {in_frame: inFrame, local: dump(window.top.localStorage), session: dump(window.top.sessionStorage)}; }
+catch (e) { return {in_frame: inFrame, local: {}, session: {}}; }
+"""
+
+RESTORE_STORAGE_SCRIPT = """
+const [local, session] = arguments;
+try {
+    for (const [key, value] of Object.entries(local || {})) window.localStorage.setItem(key, value);
+    for (const [key, value] of Object.entries(session || {})) window.sessionStorage.setItem(key, value);
+    return true;
+} catch (e) { return false; }
+"""
+
+CLEAR_STORAGE_SCRIPT = "try { window.localStorage.clear(); window.sessionStorage.clear(); } catch (e) {}"
+
+COOKIE_FIELDS = ("name", "value", "path", "domain", "secure", "httpOnly", "expiry", "sameSite")
+
+
+def checkpoint_path(url, username, tag=None):
+    """Satu file checkpoint per environment (host URL) dan kredensial, dan per shard (`tag`) bila run dibagi."""
+    host = urlsplit(url).netloc or url
+    return os.path.join(CHECKPOINT_DIR, re.sub(r'[^A-Za-z0-9._-]+', "_", "_".join(filter(None, (host, username, tag)))) + ".json")
+
+
+def capture_state(driver):
+    """Keadaan browser yang bisa dipulihkan: URL halaman utama, cookie dan isi local/session storage origin-nya.
+    `in_frame` mencatat bahwa fokus driver sedang di dalam iframe (iframe itu sendiri tidak ikut dipulihkan).
+    current_url WebDriver selalu URL halaman utama, bukan dokumen iframe yang sedang difokuskan."""
+    storage = driver.execute_script(CAPTURE_STORAGE_SCRIPT) or {}
+    cookies = [{key: cookie[key] for key in COOKIE_FIELDS if key in cookie} for cookie in driver.get_cookies()]
+    return {"url": driver.current_url, "cookies": cookies, "in_frame": bool(storage.get("in_frame")),
+            "local_storage": storage.get("local") or {}, "session_storage": storage.get("session") or {}}
+
+
+def restore_state(driver, state):
+    """Memulihkan keadaan dari `capture_state` ke browser baru. Cookie dan storage hanya bisa dipasang pada origin
+    yang sedang dibuka, jadi URL tujuan dibuka dua kali: sebelum dan sesudah pemulihan.
+    Mengembalikan jumlah cookie yang berhasil dipasang."""
+    from selenium.common.exceptions import WebDriverException
+    driver.get(state["url"])
+    restored = 0
+    for cookie in state.get("cookies", []):
+        if isinstance(cookie.get("expiry"), float): cookie = {**cookie, "expiry": int(cookie["expiry"])}
+        try: driver.add_cookie(cookie); restored += 1
+        except WebDriverException: pass # Cookie domain lain (mis. SSO) tidak bisa dipasang dari origin ini
+    driver.execute_script(RESTORE_STORAGE_SCRIPT, state.get("local_storage"), state.get("session_storage"))
+    driver.get(state["url"])
+    return restored
+
+
+def clear_state(driver):
+    driver.delete_all_cookies(); driver.execute_script(CLEAR_STORAGE_SCRIPT)
+
+
+def write_private_json(path, data):
+    """Tulis atomik (file sementara lalu replace) dengan izin hanya untuk pemilik karena isinya berupa cookie sesi."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temporary_path = f"{path}.{threading.get_ident()}.tmp"
+    with open(os.open(temporary_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(temporary_path, path)
+
+
+def load_checkpoint(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f: return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def frame_steps(actions, index):
+    """Indeks aksi 'Beralih ke Iframe' yang masih berlaku sebelum aksi ke-`index` (setelah 'Beralih ke Konten Utama'
+    terakhir), yaitu langkah yang memasuki kembali iframe tempat aksi itu berjalan."""
+    steps = []
+    for position, action_data in enumerate(actions[:index]):
+        if action_data.get("action") == "Beralih ke Konten Utama": steps = []
+        elif action_data.get("action") == "Beralih ke Iframe": steps.append(position)
+    return steps
+
+
+def resume_point(checkpoint, from_action=False, flows=None):
+    """Titik lanjut dari checkpoint run yang gagal, atau None bila run tersebut tidak gagal.
+
+    Default-nya alur yang gagal diulang dari awal dengan keadaan browser setelah alur terakhir yang selesai di sesi
+    itu. Dengan `from_action`, run dilanjutkan tepat dari aksi yang gagal dengan keadaan browser saat gagal
+    (bila keadaan itu sempat diambil). Bila aksi itu gagal di dalam iframe, langkah 'Beralih ke Iframe' alur tersebut
+    (`frame_steps`) dijalankan ulang lebih dulu; ValueError bila iframe-nya dimasuki di luar alur itu."""
+    failure = (checkpoint or {}).get("failure")
+    if not failure: return None
+    remaining = [name for name in checkpoint["flows"] if name not in checkpoint["completed"]]
+    flow_state = checkpoint["sessions"].get(str(failure["session"]), {}).get("state")
+    point = {"flows": remaining, "start_flow": failure["flow"], "start_index": 0, "state": flow_state, "flow_state": flow_state, "frame_steps": []}
+    if from_action and failure.get("state") and failure.get("index") is not None:
+        point.update(start_index=failure["index"], state=failure["state"])
+        if failure["state"].get("in_frame"):
+            actions = ((flows or {}).get(failure["flow"]) or {}).get("actions", [])
+            point["frame_steps"] = frame_steps(actions, failure["index"])
+            if not point["frame_steps"]:
+                raise ValueError(f"Aksi #{failure['index'] + 1} alur '{failure['flow']}' gagal di dalam iframe yang tidak dimasuki "
+                                 "oleh alur itu sendiri, jadi iframe-nya tidak bisa dipulihkan. Lanjutkan tanpa --from-action.")
+    return point
+
+
+class CheckpointFile:
+    """Checkpoint satu run, ditulis ulang secara atomik setiap ada alur selesai atau kegagalan. Aman dipakai dari
+    beberapa sesi paralel."""
+
+    def __init__(self, path, browser, url, username, flows, initial_state=None):
+        self.path = path
+        self._lock = threading.Lock()
+        self.data = {"browser": browser, "url": url, "username": username, "started_at": self._now(), "updated_at": None,
+                     "flows": list(flows), "completed": [], "sessions": {}, "failure": None, "initial_state": initial_state}
+
+    @staticmethod
+    def _now():
+        return datetime.now().isoformat(timespec="milliseconds")
+
+    def flow_done(self, session_index, flow_name, state):
+        with self._lock:
+            self.data["completed"].append(flow_name)
+            self.data["sessions"][str(session_index)] = {"after_flow": flow_name, "state": state}
+            self._save_locked()
+
+    def failed(self, session_index, flow_name, index, state):
+        with self._lock:
+            if self.data["failure"]: return # Kegagalan pertama yang menjadi titik lanjut
+            self.data["failure"] = {"session": session_index, "flow": flow_name, "index": index, "state": state}
+            # Sesi yang gagal sebelum menyelesaikan satu alur pun memakai keadaan awal (mis. dari run yang dilanjutkan)
+            self.data["sessions"].setdefault(str(session_index), {"after_flow": None, "state": self.data["initial_state"]})
+            self._save_locked()
+
+    def save(self):
+        with self._lock: self._save_locked()
+
+    def _save_locked(self):
+        self.data["updated_at"] = self._now()
+        write_private_json(self.path, self.data)
+
+
+class SessionCache:
+    """Snapshot sesi setelah login berhasil, satu file per browser, environment (URL) dan kredensial. Kunci file
+    diturunkan dari hash kredensial sehingga password tidak pernah ditulis dan snapshot otomatis tidak terpakai
+    saat password berubah. Snapshot kedaluwarsa setelah `ttl_minutes` atau saat cookie berumur terpendek habis."""
+    DEFAULT_TTL_MINUTES = 30
+
+    def __init__(self, browser, url, username, password, ttl_minutes=DEFAULT_TTL_MINUTES):
+        key = hashlib.sha256("\0".join((browser, url, username, password)).encode("utf-8")).hexdigest()[:24]
+        self.path = os.path.join(SESSION_CACHE_DIR, f"{key}.json")
+        self.ttl = ttl_minutes * 60
+
+    def load(self):
+        """Keadaan browser dari snapshot yang masih berlaku, atau None."""
+        snapshot = load_checkpoint(self.path)
+        if not snapshot: return None
+        if snapshot.get("expires_at", 0) <= time.time():
+            self.invalidate(); return None
+        return snapshot["state"]
+
+    def save(self, url, username, state):
+        now = time.time()
+        expires_at = min([now + self.ttl, *(cookie["expiry"] for cookie in state["cookies"] if "expiry" in cookie)])
+        if expires_at <= now: return None
+        write_private_json(self.path, {"url": url, "username": username, "created_at": now, "expires_at": expires_at, "state": state})
+        return expires_at
+
+    def invalidate(self):
+        try: os.remove(self.path)
+        except FileNotFoundError: pass
@@ -0,0 +1,288 @@
+"""Command line TMC tanpa Qt.
+
+    python -m tmc run --env "SUUD DEV" --flows 01,02 --browser firefox --headless
+    python -m tmc resume --env "SUUD DEV" --browser firefox
+    python -m tmc run --env "SUUD DEV" --headless --shard 2/4      # lalu: python -m tmc merge Result/shards/*.json
+    python -m tmc report --flaky
+
+Kode keluar: 0 semua lolos, 1 ada run gagal, 2 kesalahan konfigurasi/argumen, 130 dihentikan (Ctrl+C).
+"""
+import os
+import sys
+import json
+import time
+import copy
+import argparse
+import threading
+from datetime import datetime
+
+from tmc import RESULT_DIR, RUN_LOG_DIR, RESULT_DB_FILE
+from tmc.history import RunLog, ResultStore
+from tmc.checkpoint import checkpoint_path, load_checkpoint, resume_point
+from tmc.shard import parse_shard, setup_flows, plan_shards, estimate_durations, merge_shard_results, check_shard_document, check_shard_set
+
+EXIT_OK, EXIT_FAILED, EXIT_USAGE, EXIT_INTERRUPTED = 0, 1, 2, 130
+
+
+class UsageError(Exception):
+    """Argumen atau file konfigurasi tidak valid; dilaporkan dengan kode keluar EXIT_USAGE."""
+
+
+def select_flows(all_flows, spec):
+    """Memilih alur dari `--flows` (dipisah koma). Token cocok dengan nama lengkap atau nomor di depan nama ("01" -> "01. Login")."""
+    if not spec: return dict(all_flows)
+    selected = set()
+    for token in filter(None, (token.strip() for token in spec.split(","))):
+        matches = [name for name in all_flows if name == token or name.split(".", 1)[0].strip() == token]
+        if not matches: raise UsageError(f"Alur '{token}' tidak ditemukan di file flows.")
+        selected.update(matches)
+    return {name: data for name, data in all_flows.items() if name in selected}
+
+
+def resolve_environments(args):
+    """Daftar (nama env, url, username, password, role) dari --env-file dan/atau --url/--username/--password/--role."""
+    env_names = [name.strip() for value in args.env or [] for name in value.split(",") if name.strip()]
+    password = args.password or os.environ.get("TMC_PASSWORD")
+    if not env_names:
+        if not (args.url and args.username and password):
+            raise UsageError("Tentukan --env (dengan --env-file) atau --url, --username dan --password/TMC_PASSWORD.")
+        return [("cli", args.url, args.username, password, args.role or "")]
+
+    try:
+        with open(args.env_file, 'r', encoding='utf-8') as f: environments = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError) as e:
+        raise UsageError(f"File environment '{args.env_file}' tidak ditemukan atau rusak: {e}")
+    resolved = []
+    for env_name in env_names:
+        if env_name not in environments: raise UsageError(f"Environment '{env_name}' tidak ada di {args.env_file}.")
+        env_details = environments[env_name]
+        username = args.username or env_details.get("active_credential", "")
+        target_cred = next((c for c in env_details.get("credentials", []) if c.get("username") == username), None)
+        if not target_cred and not password:
+            raise UsageError(f"Kredensial '{username}' tidak ditemukan di environment '{env_name}'.")
+        target_cred = target_cred or {}
+        resolved.append((env_name, args.url or env_details.get("url", ""), username, password or target_cred.get("password", ""),
+                         args.role if args.role is not None else target_cred.get("role", "")))
+    return resolved
+
+
+def run_environment(engine, env_name, tagged, run_log):
+    """Menjalankan satu engine di thread terpisah agar Ctrl+C bisa menghentikannya dengan rapi."""
+    from tmc.events import RunEvent
+    state = {"started_at": None, "artifacts": [], "result": None}
+    prefix = f"[{env_name}] " if tagged else ""
+
+    def on_progress(message):
+        print(f"{prefix}{message}", flush=True); run_log.log(env_name, message)
+
+    def on_event(event):
+        run_log.event(env_name, event)
+        if event.kind == RunEvent.RUN_START: state["started_at"] = datetime.fromtimestamp(event.ts).isoformat(timespec="milliseconds")
+        elif event.kind == RunEvent.ARTIFACT:
+            state["artifacts"].append({"flow": event.flow, "index": event.index,
+                                       "created_at": datetime.fromtimestamp(event.ts).isoformat(timespec="milliseconds"), **event.data})
+
+    def target():
+        try: state["result"] = engine.run_tests()
+        finally: done.set()
+
+    engine.progress.connect(on_progress); engine.run_event.connect(on_event)
+    done = threading.Event()
+    threading.Thread(target=target, name="tmc-cli-run", daemon=True).start()
+    interrupted = False
+    while not done.is_set():
+        try: done.wait(0.2)
+        except KeyboardInterrupt:
+            if interrupted: raise
+            interrupted = True; engine.stop()
+            print(">>> Menunggu aksi yang sedang berjalan selesai (Ctrl+C lagi untuk keluar paksa)...", flush=True)
+    return state, interrupted
+
+
+def select_shard(args, flows, shard, is_login_flow):
+    """Alur milik shard `shard` (k, n), dibagi berdasarkan p50 durasi historis dari --db."""
+    history = ResultStore(args.db).flow_durations() if os.path.exists(args.db) else {}
+    shards, loads = plan_shards(flows, shard[1], estimate_durations(flows, history), is_login_flow)
+    names = shards[shard[0] - 1]
+    print(f"--- Shard {shard[0]}/{shard[1]}: {len(names)} dari {len(flows)} alur, perkiraan {loads[shard[0] - 1] / 1000:.0f} dtk"
+          f" (riwayat durasi untuk {sum(name in history for name in flows)} alur) ---", flush=True)
+    return {name: flows[name] for name in names}
+
+
+def report_result(store, env_name, url, browser, username, started_at, result, flows, artifacts):
+    """Menyimpan satu run ke riwayat (bila ada) dan mencetak ringkasan hasilnya."""
+    success, message, screenshot_path = result
+    if store:
+        try:
+            run_id = store.record_run(env_name, url, browser, username, started_at, result, flows, artifacts)
+            print(f"--- Hasil tes disimpan ke {store.path} (run #{run_id}) ---")
+        except Exception as e:
+            print(f"(Peringatan: Gagal menyimpan laporan hasil tes: {e})")
+    print(f"--- RESULT {env_name}: {'COMPLETED' if success else 'FAILED'} ---\n{message}")
+    if screenshot_path: print(f"Error screenshot: {os.path.abspath(screenshot_path)}")
+    return success
+
+
+def command_run(args):
+    from tmc.engine import FlowEngine
+    try:
+        with open(args.flows_file, 'r', encoding='utf-8') as f: all_flows = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError) as e:
+        raise UsageError(f"File flows '{args.flows_file}' tidak ditemukan atau rusak: {e}")
+    flows_to_run = select_flows(all_flows, args.flows)
+    if not flows_to_run: raise UsageError("Tidak ada alur untuk dijalankan.")
+    environments = resolve_environments(args)
+    shard = None
+    if args.shard:
+        try: shard = parse_shard(args.shard)
+        except ValueError as e: raise UsageError(str(e))
+        order = list(flows_to_run); setup = setup_flows(flows_to_run, FlowEngine.is_login_flow)
+        flows_to_run = select_shard(args, flows_to_run, shard, FlowEngine.is_login_flow)
+    checkpoint_tag = f"shard{shard[0]}of{shard[1]}" if shard else None
+    flow_settings = {"headless": args.headless, "parallel_sessions": args.parallel, "smart_sleep": args.smart_sleep,
+                     "batch_actions": args.batch_actions, "trace": args.trace, "step_screenshots": args.step_screenshots,
+                     "flight_recorder_frames": args.flight_recorder, "flight_recorder_mb": args.flight_recorder_mb, "negative_window_ms": args.negative_window_ms,
+                     "screenshot_format": args.screenshot_format, "screenshot_quality": args.screenshot_quality,
+                     "checkpoints": not args.no_checkpoint, "auth_cache": args.auth_cache, "auth_cache_minutes": args.auth_cache_minutes,
+                     "retry_budget": args.retry_budget, "checkpoint_tag": checkpoint_tag}
+
+    run_log = RunLog(os.path.join(RUN_LOG_DIR, f"run_{time.strftime('%Y%m%d-%H%M%S')}.jsonl"))
+    # Run shard ditulis ke file hasil shard; riwayat diisi sekali oleh `merge` agar tidak tercatat ganda
+    store = None if args.no_history or shard else ResultStore(args.db)
+    outcomes = []; shard_runs = []
+    try:
+        for env_name, url, username, password, role in environments:
+            engine_flows, point = flows_to_run, None
+            if args.command == "resume":
+                try: point = resume_point(load_checkpoint(checkpoint_path(url, username, checkpoint_tag)), args.from_action, flows_to_run)
+                except ValueError as e: raise UsageError(f"{env_name}: {e}")
+                if not point:
+                    print(f"--- {env_name}: tidak ada run gagal untuk dilanjutkan ({checkpoint_path(url, username, checkpoint_tag)}) ---")
+                    outcomes.append(True); continue
+                engine_flows = {name: flows_to_run[name] for name in point["flows"] if name in flows_to_run}
+                print(f"--- Melanjutkan {env_name} dari '{point['start_flow']}'"
+                      + (f" aksi #{point['start_index'] + 1}" if point["start_index"] else "")
+                      + (f" (iframe dimasuki ulang lewat aksi {', '.join(f'#{i + 1}' for i in point['frame_steps'])})" if point["frame_steps"] else "")
+                      + " ---", flush=True)
+            engine = FlowEngine(args.browser, url, username, password, role, flow_settings, copy.deepcopy(engine_flows), resume=point)
+            state, interrupted = run_environment(engine, env_name, len(environments) > 1, run_log)
+            result = state["result"] or (False, "Pengujian dihentikan.", None)
+            outcomes.append(report_result(store, env_name, url, args.browser, username, state["started_at"], result,
+                                          engine.test_flows_data, state["artifacts"]))
+            shard_runs.append({"env": env_name, "url": url, "browser": args.browser, "username": username, "started_at": state["started_at"],
+                               "result": list(result), "flows": engine.test_flows_data, "artifacts": state["artifacts"]})
+            if interrupted: return EXIT_INTERRUPTED
+    finally:
+        run_log.close()
+        print(f"Log run: {run_log.path}", flush=True)
+        if shard:
+            output = args.shard_output or os.path.join(RESULT_DIR, "shards", f"shard-{shard[0]}of{shard[1]}.json")
+            os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+            with open(output, 'w', encoding='utf-8') as f:
+                json.dump({"shard": list(shard), "selected": list(flows_to_run), "setup": [name for name in order if name in setup],
+                           "order": order, "runs": shard_runs}, f, ensure_ascii=False, indent=2, default=str)
+            print(f"Hasil shard: {output}", flush=True)
+    if len(outcomes) > 1: print(f"Ringkasan: {sum(outcomes)} dari {len(outcomes)} environment berhasil.")
+    return EXIT_OK if all(outcomes) else EXIT_FAILED
+
+
+def command_merge(args):
+    documents = []
+    for path in args.files:
+        try:
+            with open(path, 'r', encoding='utf-8') as f: document = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            raise UsageError(f"File hasil shard '{path}' tidak bisa dibaca: {e}")
+        try: check_shard_document(document)
+        except ValueError as e: raise UsageError(f"File '{path}' bukan hasil shard yang valid: {e}")
+        documents.append(document)
+    try: check_shard_set(documents)
+    except ValueError as e: raise UsageError(str(e))
+    store = None if args.no_history else ResultStore(args.db)
+    outcomes = [report_result(store, run["env"], run["url"], run["browser"], run["username"], run["started_at"], run["result"],
+                              run["flows"], run["artifacts"]) for run in merge_shard_results(documents)]
+    if len(outcomes) > 1: print(f"Ringkasan: {sum(outcomes)} dari {len(outcomes)} environment berhasil.")
+    return EXIT_OK if all(outcomes) else EXIT_FAILED
+
+
+def command_report(args):
+    if not os.path.exists(args.db):
+        print(f"Database riwayat tidak ditemukan: {args.db}"); return EXIT_FAILED
+    store = ResultStore(args.db); store.refresh_stats()
+    rows = [ResultStore.format_report_row(entry) for entry in store.step_report(args.flow, args.min_runs) if entry["flaky"] or not args.flaky]
+    widths = [min(60, max(len(text) for text in column)) for column in zip(ResultStore.REPORT_COLUMNS, *rows)]
+    for row in (ResultStore.REPORT_COLUMNS, *rows):
+        print("  ".join(text[:width].ljust(width) for text, width in zip(row, widths)).rstrip())
+    return EXIT_OK
+
+
+def add_run_arguments(run):
+    run.add_argument("--env", action="append", help="Nama environment dari --env-file (boleh diulang atau dipisah koma).")
+    run.add_argument("--env-file", default="environments.json", help="JSON environment (format sama dengan pengaturan GUI).")
+    run.add_argument("--url", help="URL target (menimpa URL environment).")
+    run.add_argument("--username", help="Username (default: kredensial aktif environment).")
+    run.add_argument("--password", help="Password (default: dari --env-file atau variabel TMC_PASSWORD).")
+    run.add_argument("--role", help="Role untuk placeholder {ROLE}.")
+    run.add_argument("--flows", help="Alur yang dijalankan, mis. 01,02 atau nama lengkap (default: semua).")
+    run.add_argument("--flows-file", default="flows.json", help="Lokasi flows.json.")
+    run.add_argument("--browser", choices=("chrome", "firefox"), default="chrome")
+    run.add_argument("--headless", action="store_true")
+    run.add_argument("--parallel", type=int, default=1, help="Jumlah sesi browser paralel.")
+    run.add_argument("--smart-sleep", action="store_true", help="Aksi 'Tidur' berhenti lebih awal saat halaman idle.")
+    run.add_argument("--batch-actions", action="store_true", help="Gabungkan aksi form berurutan dalam satu skrip.")
+    run.add_argument("--trace", action="store_true", help="Simpan trace Perfetto ke folder Result.")
+    run.add_argument("--negative-window-ms", type=int, default=0, help="Jendela stabil untuk 'Verifikasi Elemen TIDAK Muncul'.")
+    run.add_argument("--step-screenshots", action="store_true", help="Ambil frame (dedup, terkompresi) setelah setiap aksi.")
+    run.add_argument("--flight-recorder", type=int, default=0, metavar="N",
+                     help="Simpan N frame terakhir per sesi di memori; ditulis sebagai animasi hanya saat gagal.")
+    run.add_argument("--flight-recorder-mb", type=float, default=16, help="Batas memori rekaman per sesi (MB).")
+    run.add_argument("--screenshot-format", choices=("png", "jpeg", "webp"), default="png", help="Format file screenshot.")
+    run.add_argument("--screenshot-quality", type=int, default=85, help="Kualitas JPEG/WebP (1-100).")
+    run.add_argument("--db", default=RESULT_DB_FILE, help="Lokasi results.db.")
+    run.add_argument("--no-history", action="store_true", help="Jangan simpan hasil ke results.db.")
+    run.add_argument("--auth-cache", action="store_true", help="Lewati alur login dengan snapshot sesi login yang masih berlaku.")
+    run.add_argument("--auth-cache-minutes", type=float, default=30, help="Masa berlaku snapshot sesi login (menit).")
+    run.add_argument("--retry-budget", type=int, default=20,
+                     help="Retry maksimum per run untuk exception sementara (kebijakan per aksi di flows.json); 0 mematikan retry.")
+    run.add_argument("--shard", metavar="K/N", help="Jalankan hanya shard K dari N (dibagi berdasarkan durasi historis di --db).")
+    run.add_argument("--shard-output", help="File hasil shard (default: Result/shards/shard-KofN.json).")
+    run.add_argument("--no-checkpoint", action="store_true", help="Jangan simpan checkpoint sesi setelah setiap alur.")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m tmc", description="Menjalankan alur flows.json tanpa GUI.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="Jalankan alur tes.")
+    add_run_arguments(run)
+    run.set_defaults(handler=command_run)
+
+    resume = commands.add_parser("resume", help="Lanjutkan run terakhir yang gagal dari checkpoint (browser baru, sesi dipulihkan).")
+    add_run_arguments(resume)
+    resume.add_argument("--from-action", action="store_true",
+                        help="Lanjut tepat dari aksi yang gagal (default: ulangi alur yang gagal dari awal).")
+    resume.set_defaults(handler=command_run)
+
+    merge = commands.add_parser("merge", help="Gabungkan file hasil --shard menjadi satu run di riwayat.")
+    merge.add_argument("files", nargs="+", help="File hasil shard (default ditulis ke Result/shards/).")
+    merge.add_argument("--db", default=RESULT_DB_FILE, help="Lokasi results.db.")
+    merge.add_argument("--no-history", action="store_true", help="Hanya tampilkan hasil gabungan, jangan simpan ke results.db.")
+    merge.set_defaults(handler=command_merge)
+
+    report = commands.add_parser("report", help="Laporan flakiness & kecepatan dari riwayat run.")
+    report.add_argument("--flow", help="Hanya tampilkan alur ini.")
+    report.add_argument("--flaky", action="store_true", help="Hanya tampilkan langkah flaky.")
+    report.add_argument("--min-runs", type=int, default=1, help="Abaikan langkah dengan jumlah run lebih sedikit.")
+    report.add_argument("--db", default=RESULT_DB_FILE, help="Lokasi results.db.")
+    report.set_defaults(handler=command_report)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        return args.handler(args)
+    except UsageError as e:
+        print(f"Error: {e}", file=sys.stderr); return EXIT_USAGE
+    except KeyboardInterrupt:
+        return EXIT_INTERRUPTED
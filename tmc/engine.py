@@ -0,0 +1,1261 @@
+"""Engine eksekusi alur TMC: menjalankan flows.json dengan Selenium tanpa import PyQt."""
+import time
+import copy
+import json
+import os
+import re
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, wait as wait_futures
+
+# Selenium Imports
+from selenium import webdriver
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException, InvalidArgumentException, WebDriverException
+from selenium.webdriver.chrome.service import Service as ChromeService
+from selenium.webdriver.firefox.service import Service as FirefoxService
+from selenium.webdriver.chrome.options import Options as ChromeOptions
+from selenium.webdriver.firefox.options import Options as FirefoxOptions
+from webdriver_manager.chrome import ChromeDriverManager
+from webdriver_manager.firefox import GeckoDriverManager
+from webdriver_manager.core.os_manager import OperationSystemManager, ChromeType
+
+from tmc import RESULT_DIR, FRAMES_DIR, DRIVER_CACHE_FILE
+from tmc.actions import ACTIONS_WITHOUT_LOCATOR, ACTIONS_WITH_VALUE
+from tmc.events import RunEvent, Callbacks
+from tmc.artifacts import (ArtifactProcessor, FrameStore, FrameRecorder, IMAGE_FORMATS, DEFAULT_QUALITY, save_screenshot, screenshot_path,
+                           save_animation, animation_path)
+from tmc.scheduler import JobQueue, FlowGraph
+from tmc.retry import RetryPolicy, RetryBudget
+from tmc.checkpoint import CheckpointFile, SessionCache, checkpoint_path, capture_state, restore_state, clear_state
+
+
+# --- Skrip JavaScript untuk Memeriksa Halaman ---
+# Memasang penghitung XHR/fetch tertunda dan MutationObserver (sekali per dokumen), lalu
+# mendefinisikan fungsi bantu yang dipakai oleh skrip-skrip di bawahnya.
+JS_PAGE_PROBES = """
+    var w = window;
+    if (!w.__tmcIdle) {
+        var state = w.__tmcIdle = {pending: 0, lastMutation: Date.now()};
+        var originalSend = XMLHttpRequest.prototype.send;
+        XMLHttpRequest.prototype.send = function() {
+            var settled = false, settle = function() { if (!settled) { settled = true; state.pending--; } };
+            state.pending++; this.addEventListener('loadend', settle);
+            try { return originalSend.apply(this, arguments); } catch (e) { settle(); throw e; }
+        };
+        if (w.fetch) {
+            var originalFetch = w.fetch;
+            w.fetch = function() {
+                state.pending++;
+                return originalFetch.apply(this, arguments).finally(function() { state.pending--; });
+            };
+        }
+        if (w.MutationObserver && document.documentElement) {
+            new MutationObserver(function() { state.lastMutation = Date.now(); }).observe(document.documentElement,
+                {childList: true, subtree: true, attributes: true, characterData: true});
+        }
+    }
+    function tmcVisible(el) {
+        if (!el) return false;
+        var style = w.getComputedStyle(el);
+        if (style.visibility === 'hidden' || style.display === 'none' || style.opacity === '0') return false;
+        return !!(el.offsetWidth || el.offsetHeight || el.getClientRects().length);
+    }
+    function tmcFind(by, selector) {
+        var d = document, found = [];
+        if (by === 'id') { var el = d.getElementById(selector); return el ? [el] : []; }
+        if (by === 'xpath') {
+            var nodes = d.evaluate(selector, d, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+            for (var i = 0; i < nodes.snapshotLength; i++) found.push(nodes.snapshotItem(i));
+            return found;
+        }
+        if (by === 'name') return Array.prototype.slice.call(d.getElementsByName(selector));
+        if (by === 'class name') return Array.prototype.slice.call(d.getElementsByClassName(selector));
+        if (by === 'css selector') return Array.prototype.slice.call(d.querySelectorAll(selector));
+        if (by === 'link text') return Array.prototype.filter.call(d.getElementsByTagName('a'), function(a) { return a.textContent.trim() === selector; });
+        return [];
+    }
+    function tmcPageState(spinners) {
+        var busy = 0;
+        for (var i = 0; i < (spinners || []).length && !busy; i++) {
+            var nodes = document.evaluate(spinners[i], document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+            for (var j = 0; j < nodes.snapshotLength; j++) { if (tmcVisible(nodes.snapshotItem(j))) { busy++; break; } }
+        }
+        return {ready: document.readyState, pending: w.__tmcIdle.pending + ((w.jQuery && w.jQuery.active) || 0),
+                busy: busy, quiet_ms: Date.now() - w.__tmcIdle.lastMutation};
+    }
+"""
+PAGE_IDLE_SCRIPT = JS_PAGE_PROBES + "return tmcPageState(arguments[0]);"
+# arguments: by, selector, spinners. 'visible' mengikuti elemen pertama, sama seperti visibility_of_element_located
+NEGATIVE_PROBE_SCRIPT = JS_PAGE_PROBES + """
+    var result = tmcPageState(arguments[2]);
+    result.visible = tmcVisible(tmcFind(arguments[0], arguments[1])[0]);
+    return result;
+"""
+
+
+# arguments[0]: daftar [jenis, by, selector, nilai]. Berhenti pada langkah pertama yang tidak bisa
+# diselesaikan di sini ('missing' -> dijalankan ulang lewat jalur biasa dengan WebDriverWait).
+BATCH_ACTIONS_SCRIPT = JS_PAGE_PROBES + """
+    var steps = arguments[0], results = [];
+    for (var i = 0; i < steps.length; i++) {
+        var kind = steps[i][0], value = steps[i][3], el = tmcFind(steps[i][1], steps[i][2])[0];
+        var needsVisible = kind === 'fill' || kind === 'verify_text';
+        if (!el || (needsVisible && !tmcVisible(el))) return {results: results, stop: {index: i, reason: 'missing'}};
+        try {
+            if (kind === 'fill') {
+                if (!('value' in el) || el.disabled || el.readOnly) return {results: results, stop: {index: i, reason: 'missing'}};
+                var setter = Object.getOwnPropertyDescriptor(Object.getPrototypeOf(el), 'value');
+                el.focus();
+                if (setter && setter.set) setter.set.call(el, value); else el.value = value;
+                el.dispatchEvent(new Event('input', {bubbles: true}));
+                el.dispatchEvent(new Event('change', {bubbles: true}));
+                results.push({changed: true});
+            } else if (kind === 'check' || kind === 'uncheck') {
+                var wanted = kind === 'check', changed = !!el.checked !== wanted;
+                if (changed) el.click();
+                results.push({changed: changed});
+            } else if (kind === 'verify_checked' || kind === 'verify_unchecked') {
+                if (!!el.checked !== (kind === 'verify_checked')) return {results: results, stop: {index: i, reason: 'assert'}};
+                results.push({changed: false});
+            } else if (kind === 'scroll') {
+                el.scrollIntoView({block: 'center', inline: 'center'});
+                results.push({changed: false});
+            } else if (kind === 'verify_text') {
+                var text = el.innerText || el.textContent || '';
+                if (text.indexOf(value) === -1) return {results: results, stop: {index: i, reason: 'assert', text: text}};
+                results.push({changed: false, text: text});
+            }
+        } catch (e) {
+            return {results: results, stop: {index: i, reason: 'missing', error: String(e)}};
+        }
+    }
+    return {results: results, stop: null};
+"""
+
+
+# --- Cache Driver Lokal ---
+class DriverCache:
+    """Menyimpan path binary driver yang sudah di-resolve, dipin ke versi browser terpasang.
+
+    webdriver-manager hanya dipanggil saat belum ada cache untuk versi browser saat ini.
+    Bila pemanggilan itu gagal (mis. runner tanpa jaringan), binary terakhir yang masih ada dipakai.
+    """
+    _lock = threading.Lock()
+    _browser_versions = {} # Deteksi versi browser cukup sekali per proses
+
+    def __init__(self, cache_file=DRIVER_CACHE_FILE, log=None):
+        self.cache_file = cache_file
+        self.log = log or (lambda message: None)
+
+    def _load(self):
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f: return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _save(self, data):
+        os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
+        tmp_path = f"{self.cache_file}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f: json.dump(data, f, indent=4)
+        os.replace(tmp_path, self.cache_file)
+
+    def _detect_browser_version(self, browser):
+        if browser not in self._browser_versions:
+            browser_type = ChromeType.GOOGLE if browser == "chrome" else browser
+            try: version = OperationSystemManager().get_browser_version_from_os(browser_type)
+            except Exception: version = None
+            self._browser_versions[browser] = version
+        return self._browser_versions[browser]
+
+    def _install(self, browser):
+        if browser == "chrome": return ChromeDriverManager().install()
+        if browser == "firefox": return GeckoDriverManager().install()
+        raise ValueError(f"Browser '{browser}' tidak didukung.")
+
+    def get_driver_path(self, browser):
+        with self._lock:
+            data = self._load()
+            entry = data.get(browser) or {}
+            cached_path = entry.get("driver_path")
+            cached_path_ok = bool(cached_path) and os.path.isfile(cached_path)
+            browser_version = self._detect_browser_version(browser)
+
+            if cached_path_ok and (browser_version is None or browser_version == entry.get("browser_version")):
+                self.log(f"Driver {browser} diambil dari cache lokal (browser {entry.get('browser_version') or 'versi tidak terdeteksi'}).")
+                return cached_path
+
+            if cached_path_ok:
+                self.log(f"Versi browser berubah ({entry.get('browser_version')} -> {browser_version}), memperbarui driver...")
+            try:
+                driver_path = self._install(browser)
+            except Exception as e:
+                if not cached_path_ok: raise
+                self.log(f"(Peringatan: Gagal memperbarui driver: {e}. Menggunakan driver cache terakhir.)")
+                return cached_path
+
+            data[browser] = {"driver_path": driver_path, "browser_version": browser_version,
+                             "resolved_at": time.strftime("%Y-%m-%d %H:%M:%S")}
+            try: self._save(data)
+            except OSError as e: self.log(f"(Peringatan: Gagal menyimpan cache driver: {e})")
+            return driver_path
+
+
+# --- Pool Browser Hangat ---
+class BrowserPool:
+    """Menyimpan sesi browser yang masih hidup agar bisa dipakai ulang antar run.
+
+    Sesi dikembalikan ke pool dalam keadaan bersih (cookie & storage dihapus, about:blank)
+    dan diperiksa kesehatannya sebelum dipinjamkan lagi; sesi yang mati diganti baru.
+    """
+    RESET_SCRIPT = "try { window.localStorage.clear(); } catch (e) {} try { window.sessionStorage.clear(); } catch (e) {}"
+
+    def __init__(self, max_idle=8):
+        self.max_idle = max_idle
+        self._idle = [] # list of (key, driver)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _is_alive(driver):
+        try:
+            driver.current_url; return bool(driver.window_handles)
+        except Exception:
+            return False
+
+    @staticmethod
+    def _quit_quietly(driver):
+        try: driver.quit()
+        except Exception: pass
+
+    def _reset(self, driver):
+        driver.switch_to.default_content()
+        handles = driver.window_handles
+        for handle in handles[1:]:
+            driver.switch_to.window(handle); driver.close()
+        driver.switch_to.window(handles[0])
+        driver.delete_all_cookies()
+        driver.execute_script(self.RESET_SCRIPT)
+        driver.get("about:blank")
+
+    def acquire(self, key, factory, log=None):
+        log = log or (lambda message: None)
+        while True:
+            with self._lock:
+                index = next((i for i, (idle_key, _) in enumerate(self._idle) if idle_key == key), None)
+                driver = self._idle.pop(index)[1] if index is not None else None
+            if driver is None:
+                return factory()
+            if self._is_alive(driver):
+                log("Menggunakan browser hangat dari pool.")
+                return driver
+            log("Browser di pool sudah tidak merespons, diganti dengan sesi baru.")
+            self._quit_quietly(driver)
+
+    def release(self, key, driver, log=None):
+        log = log or (lambda message: None)
+        try:
+            self._reset(driver)
+        except Exception as e:
+            log(f"Browser gagal dibersihkan ({type(e).__name__}), sesi ditutup.")
+            self._quit_quietly(driver); return
+        with self._lock:
+            if len(self._idle) < self.max_idle:
+                self._idle.append((key, driver)); log("Browser dikembalikan ke pool (tetap hangat untuk run berikutnya)."); return
+        self._quit_quietly(driver)
+
+    def shutdown(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for _, driver in idle: self._quit_quietly(driver)
+
+    def __len__(self):
+        with self._lock: return len(self._idle)
+
+
+# --- Rencana Eksekusi Alur ---
+class PlannedAction:
+    """Satu langkah alur yang sudah dikompilasi: handler, locator dan nilai sudah di-resolve."""
+    __slots__ = ("index", "action", "by_string", "by", "selector", "value", "handler", "label", "source", "retry")
+
+    def __init__(self, index, action, by_string, by, selector, value, handler, source=None, label=None, retry=None):
+        self.index = index; self.action = action; self.by_string = by_string; self.by = by
+        self.selector = selector; self.value = value; self.handler = handler; self.source = source
+        self.retry = retry # RetryPolicy yang sudah di-resolve, atau None bila retry mati
+        # Label log dibuat dari nilai tersamar (lihat FlowEngine._compile_action) agar password tidak masuk log
+        self.label = label or f"  - Aksi: {action}, By: {by_string or 'N/A'}, Selector: {selector or 'N/A'}, Value: {value or 'N/A'}"
+
+    @property
+    def locator(self):
+        return (self.by, self.selector)
+
+    def bind(self, source):
+        """Salinan langkah ini yang terikat ke dict aksi milik run saat ini (untuk penandaan status)."""
+        return PlannedAction(self.index, self.action, self.by_string, self.by, self.selector, self.value, self.handler, source, self.label, self.retry)
+
+
+# --- Perekam Trace (Chrome Trace Event / Perfetto) ---
+class TraceRecorder:
+    """Mengumpulkan span "complete" (ph: X) dalam format Trace Event agar run bisa dibuka di
+    chrome://tracing atau ui.perfetto.dev. Setiap sesi browser menjadi satu track (tid)."""
+    def __init__(self, process_name="TMC"):
+        self._origin = time.perf_counter()
+        self._events = [{"name": "process_name", "ph": "M", "pid": 1, "tid": 0, "args": {"name": process_name}}]
+        self._lock = threading.Lock()
+
+    def name_track(self, tid, name):
+        with self._lock: self._events.append({"name": "thread_name", "ph": "M", "pid": 1, "tid": tid, "args": {"name": name}})
+
+    def complete(self, name, category, tid, started, finished, args=None):
+        event = {"name": name, "cat": category, "ph": "X", "pid": 1, "tid": tid,
+                 "ts": round((started - self._origin) * 1e6, 1), "dur": round((finished - started) * 1e6, 1)}
+        if args: event["args"] = args
+        with self._lock: self._events.append(event)
+
+    def write(self, path):
+        with self._lock: events = list(self._events)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+
+# --- Instrumentasi Waktu ---
+class SessionMetrics:
+    """Penghitung kumulatif per sesi browser: round trip driver, waktu perintah, waktu tunggu, polling, tidur dan retry.
+
+    Waktu round trip yang terjadi di dalam sebuah tunggu (polling WebDriverWait) dihitung sebagai waktu
+    tunggu, bukan waktu perintah, sehingga durasi aksi ~= tunggu + tidur + perintah + overhead runner.
+    Bila `tracer` diberikan, tunggu, tidur dan span lain juga dicatat ke track `tid`.
+    """
+    def __init__(self, tracer=None, tid=0, on_wait=None):
+        self.round_trips = 0; self.polls = 0
+        self.command_s = 0.0; self.wait_s = 0.0; self.sleep_s = 0.0
+        self.retries = 0; self.retry_s = 0.0
+        self._wait_depth = 0; self._wait_polls = 0
+        self.tracer = tracer; self.tid = tid; self.on_wait = on_wait
+
+    def snapshot(self):
+        return (self.round_trips, self.polls, self.command_s, self.wait_s, self.sleep_s, self.retries, self.retry_s)
+
+    def record_command(self, elapsed):
+        self.round_trips += 1
+        if not self._wait_depth: self.command_s += elapsed
+
+    @contextmanager
+    def waiting(self, name="wait"):
+        started = time.perf_counter(); self._wait_depth += 1
+        if self._wait_depth == 1: self._wait_polls = self.polls
+        try: yield
+        finally:
+            self._wait_depth -= 1
+            if not self._wait_depth:
+                finished = time.perf_counter(); self.wait_s += finished - started
+                if self.tracer: self.tracer.complete(name, "wait", self.tid, started, finished)
+                if self.on_wait: self.on_wait(name, round((finished - started) * 1000, 1), self.polls - self._wait_polls)
+
+    def sleep(self, duration):
+        started = time.perf_counter()
+        try: time.sleep(duration)
+        finally:
+            finished = time.perf_counter(); self.sleep_s += finished - started
+            if self.tracer: self.tracer.complete("Tidur", "sleep", self.tid, started, finished)
+
+    def backoff(self, duration, name="Retry"):
+        """Jeda sebelum retry; dihitung sebagai retry (jumlah & waktu jeda), bukan tidur."""
+        started = time.perf_counter(); self.retries += 1
+        try: time.sleep(duration)
+        finally:
+            finished = time.perf_counter(); self.retry_s += finished - started
+            if self.tracer: self.tracer.complete(name, "retry", self.tid, started, finished)
+
+    @contextmanager
+    def span(self, name, category):
+        started = time.perf_counter()
+        try: yield
+        finally:
+            if self.tracer: self.tracer.complete(name, category, self.tid, started, time.perf_counter())
+
+    def measure(self, name=None, category=None, args=None):
+        return TimingSpan(self, name, category, args)
+
+
+class TimingSpan:
+    """Rentang waktu satu aksi/alur; finish() mengembalikan selisih metrik sesi sejak rentang dimulai
+    (dan mencatatnya sebagai span trace bila rentang diberi nama)."""
+    def __init__(self, metrics, name=None, category=None, args=None):
+        self.metrics = metrics; self.name = name; self.category = category; self.args = args
+        self.started_at = datetime.now().isoformat(timespec="milliseconds")
+        self.start = time.perf_counter(); self.base = metrics.snapshot()
+
+    def finish(self, **extra):
+        round_trips, polls, command_s, wait_s, sleep_s, retries, retry_s = (now - then for now, then in zip(self.metrics.snapshot(), self.base))
+        timing = {"started_at": self.started_at, "duration_ms": round((time.perf_counter() - self.start) * 1000, 1),
+                  "wait_ms": round(wait_s * 1000, 1), "sleep_ms": round(sleep_s * 1000, 1), "command_ms": round(command_s * 1000, 1),
+                  "polls": polls, "round_trips": round_trips, "retries": retries, "retry_ms": round(retry_s * 1000, 1)}
+        timing.update(extra)
+        if self.name and self.metrics.tracer:
+            self.metrics.tracer.complete(self.name, self.category, self.metrics.tid, self.start, self.start + timing["duration_ms"] / 1000,
+                                         dict(self.args or {}, **timing))
+        return timing
+
+
+class TimedWait(WebDriverWait):
+    """WebDriverWait yang mencatat lama menunggu dan jumlah polling ke SessionMetrics."""
+    def __init__(self, driver, timeout, metrics):
+        super().__init__(driver, timeout)
+        self._metrics = metrics
+
+    def _counted(self, method):
+        def poll(driver):
+            self._metrics.polls += 1
+            return method(driver)
+        return poll
+
+    def until(self, method, message=""):
+        with self._metrics.waiting(): return super().until(self._counted(method), message)
+
+    def until_not(self, method, message=""):
+        with self._metrics.waiting(): return super().until_not(self._counted(method), message)
+
+
+# --- Sesi Browser untuk Worker ---
+class BrowserSession:
+    """Satu sesi browser milik worker; menyimpan driver, label sesi untuk log dan metrik waktunya."""
+    def __init__(self, index, driver, emit, tagged=False, tracer=None, on_wait=None):
+        self.index = index; self.driver = driver
+        self._emit = emit
+        self.tag = f"[S{index + 1}] " if tagged else ""
+        self._waits = {}
+        self.recorder = None # FrameRecorder bila rekaman frame terakhir aktif
+        self.metrics = SessionMetrics(tracer, tid=index + 1, on_wait=on_wait)
+        self._instrument_driver()
+
+    def _instrument_driver(self):
+        # Semua perintah (termasuk dari WebElement) lewat driver.execute; bungkus sekali per sesi.
+        # Driver dari pool hangat menyimpan execute aslinya agar tidak terbungkus berlapis.
+        driver = self.driver
+        if not hasattr(driver, "_tmc_original_execute"): driver._tmc_original_execute = driver.execute
+        original_execute, metrics = driver._tmc_original_execute, self.metrics
+        def execute(driver_command, params=None):
+            started = time.perf_counter()
+            try: return original_execute(driver_command, params)
+            finally: metrics.record_command(time.perf_counter() - started)
+        driver.execute = execute
+
+    def wait(self, timeout=10):
+        """WebDriverWait untuk timeout tertentu, dibuat sekali per sesi lalu dipakai ulang."""
+        if timeout not in self._waits: self._waits[timeout] = TimedWait(self.driver, timeout, self.metrics)
+        return self._waits[timeout]
+
+    def log(self, message):
+        if not self.tag: self._emit(message); return
+        stripped = message.lstrip("\n")
+        self._emit(f"{message[:len(message) - len(stripped)]}{self.tag}{stripped}")
+
+
+# --- Engine Eksekusi Alur ---
+class FlowEngine:
+    """Menjalankan alur flows.json dengan Selenium tanpa bergantung pada Qt. Progres dikirim lewat `progress` (str),
+    event terstruktur lewat `run_event` (RunEvent) dan hasil akhir lewat `finished` (tuple hasil, data flow)."""
+
+    BY_MAP = {
+        "ID": By.ID, "XPath": By.XPATH, "Name": By.NAME, "Class Name": By.CLASS_NAME,
+        "CSS Selector": By.CSS_SELECTOR, "Link Text": By.LINK_TEXT,
+    }
+
+    # Nama aksi (seperti tersimpan di flows.json) -> nama method handler
+    ACTION_HANDLERS = {
+        "Buka URL": "_do_open_url", "Klik Elemen": "_do_click", "Isi Teks": "_do_fill_text",
+        "Beralih ke Iframe": "_do_switch_to_iframe", "Beralih ke Konten Utama": "_do_switch_to_default",
+        "Tunggu Elemen Ada di DOM": "_do_wait_present",
+        "Centang Checkbox (Ensure Checked)": "_do_ensure_checked", "Hapus Centang Checkbox (Ensure Unchecked)": "_do_ensure_unchecked",
+        "Verifikasi Checkbox Tercentang": "_do_verify_checked", "Verifikasi Checkbox Tidak Tercentang": "_do_verify_unchecked",
+        "Tunggu Elemen Muncul": "_do_wait_visible", "Tunggu URL Mengandung": "_do_wait_url_contains",
+        "Verifikasi Teks Elemen": "_do_verify_text", "Tunggu Elemen Hilang": "_do_wait_invisible",
+        "Verifikasi Elemen TIDAK Muncul": "_do_verify_not_visible", "Tidur": "_do_sleep",
+        "Gulir ke Elemen": "_do_scroll_into_view", "Klik Elemen via JS": "_do_js_click",
+        "Tunggu Elemen Siap Diklik": "_do_wait_clickable", "Tunggu Halaman Siap": "_do_wait_page_idle",
+    }
+    ACTIONS_WITHOUT_LOCATOR = ACTIONS_WITHOUT_LOCATOR
+    DEFAULT_RETRY_BUDGET = 20 # Retry maksimum per run (semua sesi); 0 mematikan retry
+    ACTIONS_WITH_VALUE = ACTIONS_WITH_VALUE
+
+    # Overlay loading aplikasi yang menandakan halaman belum siap (lihat test_scripts/test_login.py)
+    SPINNER_XPATHS = [
+        "//*[contains(text(), 'Tab is loading')]", "//*[contains(text(), 'Processing')]",
+        "//div[contains(@class, 'blockUI') and contains(@class, 'blockOverlay')]",
+    ]
+    # Aksi yang boleh digabung menjadi satu eksekusi skrip (lihat BATCH_ACTIONS_SCRIPT)
+    BATCHABLE_ACTIONS = {
+        "Isi Teks": "fill", "Centang Checkbox (Ensure Checked)": "check", "Hapus Centang Checkbox (Ensure Unchecked)": "uncheck",
+        "Verifikasi Checkbox Tercentang": "verify_checked", "Verifikasi Checkbox Tidak Tercentang": "verify_unchecked",
+        "Gulir ke Elemen": "scroll", "Verifikasi Teks Elemen": "verify_text",
+    }
+    DEFAULT_IDLE_TIMEOUT = 10
+    NEGATIVE_CHECK_TIMEOUT = 5
+    IDLE_POLL_INTERVAL = 0.1
+    PLACEHOLDER_PATTERN = re.compile(r"\{(URL|USERNAME|PASSWORD|ROLE)\}")
+    PLAN_CACHE_SIZE = 64
+    _plan_cache = {}
+    _plan_cache_lock = threading.Lock()
+
+    def __init__(self, browser, url, username, password, role, flow_settings, test_flows_data, browser_pool=None, resume=None):
+        self.finished = Callbacks(); self.progress = Callbacks(); self.run_event = Callbacks()
+        self.browser = browser; self.url = url; self.username = username
+        self.password = password; self.role = role
+        self.flow_settings = flow_settings; self.test_flows_data = test_flows_data; self.driver = None
+        self.browser_pool = browser_pool
+        self.resume = resume # Titik lanjut dari tmc.checkpoint.resume_point()
+        self.tracer = None; self.frame_store = None; self.checkpoint = None
+        self.session_cache = None; self._login_flows = set()
+        self.retry_budget = RetryBudget(0)
+        self._pending_artifacts = []; self._artifacts_lock = threading.Lock()
+        self._flow_runs = []; self._flow_runs_lock = threading.Lock()
+        self._is_stopped = False
+
+    def stop(self):
+        self._is_stopped = True
+        self.progress.emit(">>> Perintah berhenti diterima oleh worker...")
+
+    def _emit_event(self, kind, session=None, flow=None, index=None, **data):
+        self.run_event.emit(RunEvent(kind, session.index + 1 if session else None, flow, index, data))
+
+    # --- Artefak (diproses di latar oleh ArtifactProcessor) ---
+    ARTIFACT_TID = 100 # Track trace untuk pasca-proses artefak
+    _font_notice_shown = False
+
+    def _submit_artifact(self, work, done):
+        """Menjalankan `work` di executor latar lalu `done(hasil, error)` di dalam task yang sama. Pencatatan hasil
+        (event ARTIFACT, id frame) sudah selesai saat future selesai, jadi `_drain_artifacts()` tidak mendahuluinya;
+        callback future baru dipanggil setelah thread yang menunggu dibangunkan."""
+        def task():
+            try: result = work()
+            except Exception as e: done(None, e)
+            else: done(result, None)
+
+        future = ArtifactProcessor.shared().submit(task)
+        with self._artifacts_lock: self._pending_artifacts.append(future)
+
+    def _capture_screenshot(self, session, flow_name, index, base_path, watermark=None, color=(255, 0, 0, 255)):
+        """Mengambil screenshot sebagai bytes lalu menyerahkan watermark, encode dan tulis ke executor latar.
+        Mengembalikan path final segera; file tersedia setelah `_drain_artifacts()`."""
+        image_format = self.flow_settings.get("screenshot_format", "png")
+        if image_format not in IMAGE_FORMATS: image_format = "png"
+        quality = int(self.flow_settings.get("screenshot_quality", DEFAULT_QUALITY) or DEFAULT_QUALITY)
+        path = screenshot_path(base_path, image_format)
+        with session.metrics.span("Screenshot", "artifact"): png_bytes = session.driver.get_screenshot_as_png()
+
+        def process():
+            started = time.perf_counter()
+            font_found = save_screenshot(png_bytes, path, image_format, quality, watermark, color)
+            if self.tracer: self.tracer.complete(f"Simpan {os.path.basename(path)}", "artifact", self.ARTIFACT_TID, started, time.perf_counter())
+            return font_found
+
+        def done(font_found, error):
+            if error:
+                session.log(f"Gagal menyimpan screenshot: {error}"); return
+            if font_found is False and not FlowEngine._font_notice_shown:
+                FlowEngine._font_notice_shown = True
+                session.log("      (Info: Font Arial tidak ditemukan, menggunakan font default untuk watermark.)")
+            session.log(f"Screenshot {'error ' if watermark else ''}disimpan di {path}" + (f" (watermark '{watermark}')" if watermark else ""))
+            self._emit_event(RunEvent.ARTIFACT, session, flow_name, index, artifact="screenshot", path=path)
+
+        self._submit_artifact(process, done)
+        return path
+
+    def _capture_frame(self, session, flow_name, steps):
+        """Frame setelah aksi, dipakai bersama oleh rekaman frame terakhir (di memori) dan mode screenshot per langkah
+        (dikecilkan, di-dedup dan disimpan di latar; aksi merujuk frame lewat `frame` di data flow hasil)."""
+        try:
+            with session.metrics.span("Frame", "artifact"): png_bytes = session.driver.get_screenshot_as_png()
+        except WebDriverException as e:
+            session.log(f"      (Peringatan: Gagal mengambil frame: {e.msg})"); return
+        if session.recorder is not None: session.recorder.add(png_bytes, f"{flow_name} #{steps[-1].index + 1} {steps[-1].action}")
+        if not self.frame_store: return
+
+        def done(frame, error):
+            if error: session.log(f"      (Peringatan: Gagal menyimpan frame: {error})"); return
+            for step in steps: step.source['frame'] = frame
+
+        self._submit_artifact(lambda: self.frame_store.add(png_bytes), done)
+
+    def _dump_recording(self, session, flow_name, index, base_path):
+        """Menulis isi rekaman frame terakhir sesi (ditambah frame saat gagal bila browser masih bisa diakses)
+        sebagai animasi di samping screenshot error. Mengembalikan path-nya, atau None bila rekaman kosong."""
+        frames = session.recorder.frames() if session.recorder is not None else []
+        if not frames: return None
+        try:
+            with session.metrics.span("Frame", "artifact"): frames.append((session.driver.get_screenshot_as_png(), "FAILED"))
+        except WebDriverException:
+            pass # Browser sudah tidak bisa diakses; rekaman tetap berisi frame sebelum gagal
+        path = animation_path(f"{base_path}_rekaman")
+
+        def done(_, error):
+            if error: session.log(f"Gagal menyimpan rekaman frame: {error}"); return
+            session.log(f"Rekaman {len(frames)} frame terakhir disimpan di {path}")
+            self._emit_event(RunEvent.ARTIFACT, session, flow_name, index, artifact="recording", path=path, frames=len(frames))
+
+        self._submit_artifact(lambda: save_animation(frames, path), done)
+        return path
+
+    @staticmethod
+    def _error_base_path(flow_name):
+        safe_flow_name = re.sub(r'[\\/*?:"<>|]', "", flow_name).replace(" ", "_")
+        return os.path.join(RESULT_DIR, f"error_{time.strftime('%Y%m%d-%H%M%S')}_{safe_flow_name}")
+
+    # --- Checkpoint & Lanjut dari Kegagalan ---
+    def _save_checkpoint(self, session, flow_name):
+        try:
+            with session.metrics.span("Checkpoint", "artifact"): state = capture_state(session.driver)
+            self.checkpoint.flow_done(session.index + 1, flow_name, state)
+        except (WebDriverException, OSError) as e:
+            session.log(f"      (Peringatan: Gagal menyimpan checkpoint: {e})")
+
+    def _checkpoint_failure(self, session, flow_name, index, log):
+        if not self.checkpoint or flow_name not in self.test_flows_data: return
+        state = None
+        if session:
+            try: state = capture_state(session.driver)
+            except WebDriverException: pass # Browser sudah tidak bisa diakses; lanjut dari checkpoint alur terakhir
+        try: self.checkpoint.failed(session.index + 1 if session else 1, flow_name, index, state)
+        except OSError as e: log(f"Gagal menyimpan checkpoint: {e}")
+
+    def _restore_session(self, session):
+        with session.metrics.span("Pulihkan sesi", "setup"): restored = restore_state(session.driver, self.resume["state"])
+        session.log(f"Sesi browser dipulihkan dari checkpoint ({restored} cookie) di {self.resume['state']['url']}")
+
+    def _resume_plan(self, flow_name, plan):
+        """Saat melanjutkan dari aksi yang gagal, aksi sebelumnya pada alur tersebut dilewati kecuali langkah yang
+        memasuki kembali iframe tempat aksi itu gagal."""
+        if not self.resume or flow_name != self.resume["start_flow"] or not self.resume["start_index"]: return plan
+        frame_steps = set(self.resume.get("frame_steps", []))
+        return [step for step in plan if step.index >= self.resume["start_index"] or step.index in frame_steps]
+
+    # --- Cache Sesi Login ---
+    @staticmethod
+    def is_login_flow(flow_data):
+        """Alur login ditandai 'login': true, atau otomatis bila mengisi {PASSWORD} ke sebuah field."""
+        return flow_data.get("login", any(action.get("action") == "Isi Teks" and action.get("value") == "{PASSWORD}"
+                                          for action in flow_data.get("actions", [])))
+
+    def _session_valid(self, session, flow_name, plan):
+        """Satu pemeriksaan murah setelah snapshot dipasang: elemen 'session_check' alur harus ada, atau (default)
+        field password dari form login tidak muncul lagi."""
+        check = self.test_flows_data[flow_name].get("session_check")
+        if check:
+            return bool(session.driver.find_elements(self.BY_MAP[check["by"]], self._replace_placeholders(check["selector"])))
+        password_step = next((step for unit in plan for step in unit if step.source.get("value") == "{PASSWORD}"), None)
+        return password_step is not None and not session.driver.find_elements(password_step.by, password_step.selector)
+
+    def _login_from_cache(self, session, flow_name, plan):
+        """Memasang snapshot sesi login bila ada dan masih valid. Mengembalikan True bila alur login bisa dilewati."""
+        state = self.session_cache.load()
+        if not state: return False
+        with session.metrics.span("Pulihkan sesi login", "setup"):
+            restore_state(session.driver, state); valid = self._session_valid(session, flow_name, plan)
+        if valid:
+            session.log("Login dilewati: sesi dipulihkan dari cache snapshot.")
+            for unit in plan:
+                for step in unit: self._emit_event(RunEvent.ACTION_END, session, flow_name, step.index, action=step.action, status='SKIPPED')
+            return True
+        session.log("Snapshot sesi login tidak valid lagi; cache dihapus dan login diulang.")
+        self.session_cache.invalidate(); clear_state(session.driver)
+        return False
+
+    def _save_login_snapshot(self, session):
+        try:
+            expires_at = self.session_cache.save(self.url, self.username, capture_state(session.driver))
+        except (WebDriverException, OSError) as e:
+            session.log(f"      (Peringatan: Gagal menyimpan snapshot sesi login: {e})"); return
+        if expires_at: session.log(f"Snapshot sesi login disimpan (berlaku hingga {datetime.fromtimestamp(expires_at):%H:%M}).")
+
+    def _capturing_frames(self, session):
+        return self.frame_store is not None or session.recorder is not None
+
+    def _drain_artifacts(self):
+        """Menunggu artefak yang masih diproses agar semua file ada sebelum run dilaporkan selesai."""
+        with self._artifacts_lock: pending, self._pending_artifacts = self._pending_artifacts, []
+        if not pending: return
+        if any(not future.done() for future in pending): self.progress.emit(f"Menunggu {len(pending)} artefak selesai diproses...")
+        wait_futures(pending)
+
+
+    def _replace_placeholders(self, value, mask_password=False):
+        if not isinstance(value, str): return value
+        replacements = {"URL": self.url, "USERNAME": self.username, "PASSWORD": "********" if mask_password else self.password, "ROLE": self.role}
+        return self.PLACEHOLDER_PATTERN.sub(lambda match: replacements[match.group(1)], value)
+
+    def _plan_cache_key(self, flow_name, flow_data, actions):
+        raw_actions = [(a.get("action"), a.get("by"), a.get("selector"), a.get("value"), a.get("retry")) for a in actions]
+        return (flow_name, self.url, self.username, self.password, self.role, json.dumps(raw_actions), json.dumps(flow_data.get("retry")))
+
+    def _compile_action(self, index, action_data, flow_retry=None):
+        action = action_data.get("action")
+        by_string = action_data.get("by")
+        by = self.BY_MAP.get(by_string)
+        selector = self._replace_placeholders(action_data.get("selector"))
+        value = self._replace_placeholders(action_data.get("value"))
+
+        handler_name = self.ACTION_HANDLERS.get(action)
+        if not handler_name:
+            raise ValueError(f"Aksi '{action}' tidak dikenali.")
+        if action not in self.ACTIONS_WITHOUT_LOCATOR and (not by or not selector):
+            raise ValueError(f"Aksi '{action}' memerlukan 'By' dan 'Selector' yang valid.")
+        if action == "Tidur" or (action in ("Tunggu Halaman Siap", "Verifikasi Elemen TIDAK Muncul") and value):
+            try: float(value)
+            except (TypeError, ValueError): raise ValueError(f"Aksi '{action}' memerlukan durasi berupa angka, bukan '{value}'.")
+        shown_value = self._replace_placeholders(action_data.get("value"), mask_password=True)
+        if action == "Buka URL" and (value == "{URL}" or not value):
+            value = shown_value = self.url
+        if "retry" in action_data:
+            try: RetryPolicy.check(action_data["retry"])
+            except ValueError as e: raise ValueError(f"retry: {e}") from e
+        label = (f"  - Aksi: {action}, By: {by_string or 'N/A'}, Selector: {self._replace_placeholders(action_data.get('selector'), mask_password=True) or 'N/A'}, "
+                 f"Value: {shown_value or 'N/A'}")
+        return PlannedAction(index, action, by_string, by, selector, value, getattr(FlowEngine, handler_name), label=label,
+                             retry=RetryPolicy.resolve(action, flow_retry, action_data.get("retry")))
+
+    def compile_flow(self, flow_name, flow_data):
+        """Mengompilasi aksi sebuah alur menjadi daftar PlannedAction sebelum browser dijalankan.
+
+        Hasil kompilasi di-cache per alur dan environment; aksi yang tidak valid ditandai FAILED
+        dan menimbulkan ValueError sehingga kesalahan konfigurasi ketahuan sebelum tes berjalan.
+        """
+        actions = flow_data.get('actions', [])
+        check = flow_data.get("session_check")
+        if check is not None and (not isinstance(check, dict) or check.get("by") not in self.BY_MAP or not check.get("selector")):
+            raise ValueError(f"Alur '{flow_name}', session_check: memerlukan 'by' ({', '.join(self.BY_MAP)}) dan 'selector' yang valid.")
+        flow_retry = flow_data.get("retry")
+        if "retry" in flow_data:
+            try: RetryPolicy.check_flow_overrides(flow_retry, self.ACTION_HANDLERS)
+            except ValueError as e: raise ValueError(f"Alur '{flow_name}', retry{'' if str(e).startswith('[') else ': '}{e}") from e
+        cache_key = self._plan_cache_key(flow_name, flow_data, actions)
+        with self._plan_cache_lock:
+            template = self._plan_cache.get(cache_key)
+        if template is None:
+            template = []
+            for position, action_data in enumerate(actions, start=1):
+                try:
+                    template.append(self._compile_action(position - 1, action_data, flow_retry))
+                except ValueError as e:
+                    action_data['status'] = 'FAILED'
+                    raise ValueError(f"Alur '{flow_name}', aksi #{position}: {e}") from e
+            with self._plan_cache_lock:
+                if len(self._plan_cache) >= self.PLAN_CACHE_SIZE: self._plan_cache.clear()
+                self._plan_cache[cache_key] = template
+        return [step.bind(action_data) for step, action_data in zip(template, actions)]
+
+    def group_batches(self, plan):
+        """Membagi plan menjadi unit eksekusi: deretan (>= 2) aksi yang bisa digabung menjadi satu unit,
+        aksi lain berdiri sendiri. Tanpa flow_settings['batch_actions'] setiap aksi adalah unit tunggal."""
+        if not self.flow_settings.get("batch_actions"):
+            return [[step] for step in plan]
+        units, run = [], []
+        for step in plan:
+            if step.action in self.BATCHABLE_ACTIONS:
+                run.append(step); continue
+            units.extend([run] if len(run) > 1 else [[s] for s in run]); run = []
+            units.append([step])
+        units.extend([run] if len(run) > 1 else [[s] for s in run])
+        return units
+
+    def _run_batch(self, session, flow_name, steps):
+        """Menjalankan beberapa aksi dalam satu round trip. Mengembalikan (jumlah aksi selesai, kegagalan)
+        dengan kegagalan berupa (step, pesan) bila sebuah verifikasi gagal; langkah yang belum bisa diselesaikan
+        (elemen belum ada/terlihat) dikembalikan ke pemanggil untuk dijalankan lewat jalur biasa."""
+        payload = [[self.BATCHABLE_ACTIONS[step.action], step.by, step.selector, step.value or ""] for step in steps]
+        # ACTION_START dikirim sebelum skrip berjalan; langkah yang dikembalikan ke jalur biasa tidak mengirimnya lagi
+        for step in steps: self._emit_event(RunEvent.ACTION_START, session, flow_name, step.index, action=step.action, batch_size=len(steps))
+        span = session.metrics.measure(f"Batch ({len(steps)} aksi)", "action", {"actions": [step.action for step in steps]})
+        result = session.driver.execute_script(BATCH_ACTIONS_SCRIPT, payload) or {}
+        batch_timing = span.finish(batch_size=len(steps))
+        results = result.get("results") or []
+        stop = result.get("stop")
+        attempted = len(results) + (1 if stop and stop.get("reason") == "assert" else 0)
+        for position, (step, step_result) in enumerate(zip(steps, results)):
+            session.log(step.label)
+            self._log_batched_step(session, step, step_result)
+            timing = self._batch_share(batch_timing, attempted, position)
+            step.source['status'] = 'DONE'; step.source['timing'] = timing
+            self._emit_event(RunEvent.ACTION_END, session, flow_name, step.index, action=step.action, status='DONE', timing=timing)
+        if stop and stop.get("reason") == "assert":
+            step = steps[stop["index"]]
+            timing = step.source['timing'] = self._batch_share(batch_timing, attempted, len(results))
+            session.log(step.label)
+            self._emit_event(RunEvent.ACTION_END, session, flow_name, step.index, action=step.action, status='FAILED', timing=timing)
+            if step.action == "Verifikasi Teks Elemen":
+                return len(results), (step, f"Verifikasi Gagal! Teks '{step.value}' tidak ditemukan di elemen. Teks aktual: '{stop.get('text', '')}'")
+            if step.action == "Verifikasi Checkbox Tercentang":
+                return len(results), (step, f"Verifikasi Gagal! Checkbox '{step.selector}' tidak tercentang.")
+            return len(results), (step, f"Verifikasi Gagal! Checkbox '{step.selector}' seharusnya tidak tercentang.")
+        if len(results) > 1: session.log(f"    -> {len(results)} aksi dijalankan dalam satu batch.")
+        return len(results), None
+
+    @staticmethod
+    def _batch_share(batch_timing, count, position):
+        """Bagian satu langkah dari waktu batch: durasi dibagi rata ke `count` langkah yang dijalankan skrip, round
+        trip dan polling dihitung pada langkah pertama, sehingga jumlah per langkah sama dengan total batch.
+        'batch_ms' menyimpan durasi batch utuh."""
+        timing = dict(batch_timing, batch_ms=batch_timing["duration_ms"])
+        for field in ("duration_ms", "wait_ms", "sleep_ms", "command_ms", "retry_ms"): timing[field] = round(batch_timing[field] / count, 1)
+        if position:
+            for field in ("polls", "round_trips", "retries"): timing[field] = 0
+        return timing
+
+    def _log_batched_step(self, session, step, step_result):
+        kind = self.BATCHABLE_ACTIONS[step.action]
+        if kind == "check": session.log("    -> Checkbox dicentang." if step_result.get("changed") else "    -> Checkbox sudah dalam keadaan tercentang.")
+        elif kind == "uncheck": session.log("    -> Centang pada checkbox dihapus." if step_result.get("changed") else "    -> Checkbox sudah dalam keadaan tidak tercentang.")
+        elif kind == "verify_checked": session.log("    -> Verifikasi Berhasil: Checkbox tercentang.")
+        elif kind == "verify_unchecked": session.log("    -> Verifikasi Berhasil: Checkbox tidak tercentang.")
+        elif kind == "scroll": session.log(f"    -> Elemen '{step.selector}' digulir ke tengah layar.")
+        elif kind == "verify_text": session.log("  - Verifikasi Teks Berhasil!")
+
+    @staticmethod
+    def _format_flow_timing(timing):
+        return (f"    (Waktu alur: {timing['duration_ms'] / 1000:.2f} dtk | tunggu {timing['wait_ms'] / 1000:.2f} dtk, "
+                f"tidur {timing['sleep_ms'] / 1000:.2f} dtk, perintah {timing['command_ms'] / 1000:.2f} dtk, "
+                f"{timing['round_trips']} round trip, {timing['polls']} polling"
+                + (f", {timing['retries']} retry ({timing['retry_ms'] / 1000:.2f} dtk jeda)" if timing.get('retries') else "") + ")")
+
+    def _run_step(self, session, step):
+        if self._is_stopped: raise InterruptedError("Pengujian dihentikan oleh pengguna.")
+        session.log(step.label)
+        step.handler(self, session, step)
+
+    def _run_step_with_retry(self, session, flow_name, step):
+        """Menjalankan aksi; exception yang cocok dengan kebijakan retry aksi (di-resolve saat kompilasi) diulang
+        dengan backoff selama percobaan dan anggaran retry run masih ada."""
+        retry_number = 0; policy = step.retry
+        while True:
+            try:
+                self._run_step(session, step); return
+            except Exception as e:
+                if policy is None or not policy.retries(e) or retry_number + 1 >= policy.attempts or self._is_stopped: raise
+                if not self.retry_budget.take():
+                    session.log(f"      (Anggaran retry run ({self.retry_budget.total}) habis; {type(e).__name__} tidak di-retry.)"); raise
+                retry_number += 1; delay = policy.delay(retry_number)
+                session.log(f"      (Retry {retry_number}/{policy.attempts - 1} setelah {type(e).__name__}, jeda {delay:.2f} dtk)")
+                self._emit_event(RunEvent.RETRY, session, flow_name, step.index, action=step.action, error=type(e).__name__,
+                                 attempt=retry_number + 1, delay_ms=round(delay * 1000, 1))
+                session.metrics.backoff(delay, f"Retry {step.action}")
+
+    # --- Handler Aksi ---
+    def _do_open_url(self, session, step):
+        session.driver.get(step.value)
+
+    def _do_click(self, session, step):
+        session.wait().until(EC.element_to_be_clickable(step.locator)).click()
+
+    def _do_fill_text(self, session, step):
+        element = session.wait().until(EC.visibility_of_element_located(step.locator))
+        element.clear(); element.send_keys(step.value)
+
+    def _do_switch_to_iframe(self, session, step):
+        session.log(f"    -> Beralih fokus ke iframe '{step.selector}'...")
+        session.wait().until(EC.frame_to_be_available_and_switch_to_it(step.locator))
+        session.log("    -> Berhasil beralih ke iframe.")
+
+    def _do_switch_to_default(self, session, step):
+        session.log("    -> Kembali ke konteks halaman utama...")
+        session.driver.switch_to.default_content()
+        session.log("    -> Berhasil kembali ke halaman utama.")
+
+    def _do_wait_present(self, session, step):
+        session.wait().until(EC.presence_of_element_located(step.locator))
+        session.log("    -> Elemen ditemukan di dalam DOM.")
+
+    def _do_ensure_checked(self, session, step):
+        element = session.wait().until(EC.presence_of_element_located(step.locator))
+        if not element.is_selected(): element.click(); session.log("    -> Checkbox dicentang.")
+        else: session.log("    -> Checkbox sudah dalam keadaan tercentang.")
+
+    def _do_ensure_unchecked(self, session, step):
+        element = session.wait().until(EC.presence_of_element_located(step.locator))
+        if element.is_selected(): element.click(); session.log("    -> Centang pada checkbox dihapus.")
+        else: session.log("    -> Checkbox sudah dalam keadaan tidak tercentang.")
+
+    def _do_verify_checked(self, session, step):
+        element = session.wait().until(EC.presence_of_element_located(step.locator))
+        if not element.is_selected(): raise AssertionError(f"Verifikasi Gagal! Checkbox '{step.selector}' tidak tercentang.")
+        session.log("    -> Verifikasi Berhasil: Checkbox tercentang.")
+
+    def _do_verify_unchecked(self, session, step):
+        element = session.wait().until(EC.presence_of_element_located(step.locator))
+        if element.is_selected(): raise AssertionError(f"Verifikasi Gagal! Checkbox '{step.selector}' seharusnya tidak tercentang.")
+        session.log("    -> Verifikasi Berhasil: Checkbox tidak tercentang.")
+
+    def _do_wait_visible(self, session, step):
+        session.wait().until(EC.visibility_of_element_located(step.locator))
+
+    def _do_wait_url_contains(self, session, step):
+        session.wait().until(EC.url_contains(step.value))
+
+    def _do_verify_text(self, session, step):
+        element_text = session.wait().until(EC.visibility_of_element_located(step.locator)).text
+        if step.value not in element_text:
+            raise AssertionError(f"Verifikasi Gagal! Teks '{step.value}' tidak ditemukan di elemen. Teks aktual: '{element_text}'")
+        session.log(f"  - Verifikasi Teks Berhasil!")
+
+    def _do_wait_invisible(self, session, step):
+        session.log(f"    -> Menunggu elemen '{step.selector}' untuk hilang...")
+        session.wait(25).until(EC.invisibility_of_element_located(step.locator))
+        session.log(f"    -> Elemen '{step.selector}' berhasil hilang.")
+
+    def _do_verify_not_visible(self, session, step):
+        # Nilai aksi (opsional) = jendela stabil dalam ms; 0 berarti menunggu penuh seperti semula
+        window_ms = float(step.value) if step.value else self.flow_settings.get("negative_window_ms", 0)
+        if window_ms > 0:
+            self._verify_not_visible_stable(session, step, window_ms); return
+        session.log(f"  - Verifikasi: Memastikan elemen '{step.selector}' TIDAK muncul (max {self.NEGATIVE_CHECK_TIMEOUT} detik)...")
+        try:
+            session.wait(self.NEGATIVE_CHECK_TIMEOUT).until(EC.visibility_of_element_located(step.locator))
+            raise AssertionError(f"Verifikasi Gagal! Elemen '{step.selector}' seharusnya TIDAK muncul, tapi ditemukan.")
+        except TimeoutException:
+            session.log("    -> Verifikasi Berhasil: Elemen tidak muncul seperti yang diharapkan.")
+
+    def _verify_not_visible_stable(self, session, step, window_ms):
+        """Verifikasi negatif yang lolos begitu elemen tetap tidak terlihat selama `window_ms` setelah
+        mutasi DOM terakhir dan setelah request jaringan selesai; batas atasnya tetap NEGATIVE_CHECK_TIMEOUT."""
+        session.log(f"  - Verifikasi: Memastikan elemen '{step.selector}' TIDAK muncul (stabil {window_ms:.0f} ms, max {self.NEGATIVE_CHECK_TIMEOUT} detik)...")
+        spinners = self.flow_settings.get("spinner_xpaths") or self.SPINNER_XPATHS
+        started = time.monotonic(); deadline = started + self.NEGATIVE_CHECK_TIMEOUT; network_idle_since = None
+        with session.metrics.waiting():
+            while not self._is_stopped:
+                session.metrics.polls += 1
+                now = time.monotonic()
+                try: state = session.driver.execute_script(NEGATIVE_PROBE_SCRIPT, step.by, step.selector, spinners) or {}
+                except WebDriverException: state = {} # Halaman sedang berpindah; ulangi pada polling berikutnya
+                if state.get("visible"):
+                    raise AssertionError(f"Verifikasi Gagal! Elemen '{step.selector}' seharusnya TIDAK muncul, tapi ditemukan.")
+                if state and state.get("ready") == "complete" and not state.get("pending") and not state.get("busy"):
+                    if network_idle_since is None: network_idle_since = now
+                    stable_ms = min(state.get("quiet_ms", 0), (now - network_idle_since) * 1000)
+                    if stable_ms >= window_ms:
+                        session.log(f"    -> Verifikasi Berhasil: Elemen tidak muncul, halaman stabil setelah {now - started:.2f} detik.")
+                        return
+                else:
+                    network_idle_since = None
+                if now >= deadline: break
+                time.sleep(min(self.IDLE_POLL_INTERVAL, deadline - now))
+        if self._is_stopped: raise InterruptedError("Pengujian dihentikan oleh pengguna.")
+        # Sama seperti mode tunggu penuh: elemen tidak muncul selama batas waktu, tapi halaman tidak pernah stabil
+        session.log(f"    -> Verifikasi Berhasil: Elemen tidak muncul selama {self.NEGATIVE_CHECK_TIMEOUT} detik "
+                    f"(Peringatan: halaman tidak stabil {window_ms:.0f} ms dalam batas waktu).")
+
+    def _do_sleep(self, session, step):
+        duration = float(step.value)
+        if self.flow_settings.get("smart_sleep"):
+            session.log(f"    -> Jeda pintar: maks {duration} detik, berhenti saat halaman idle...")
+            started = time.monotonic()
+            if self._wait_for_page_idle(session, duration): session.log(f"    -> Halaman idle setelah {time.monotonic() - started:.2f} detik.")
+            else: session.log("    -> Batas jeda tercapai sebelum halaman idle.")
+            return
+        session.log(f"    -> Jeda selama {duration} detik...")
+        session.metrics.sleep(duration)
+
+    def _do_wait_page_idle(self, session, step):
+        timeout = float(step.value or self.DEFAULT_IDLE_TIMEOUT)
+        session.log(f"    -> Menunggu halaman siap (maks {timeout} detik)...")
+        started = time.monotonic()
+        if not self._wait_for_page_idle(session, timeout):
+            raise TimeoutException(f"Halaman belum siap setelah {timeout} detik (request/overlay loading masih aktif).")
+        session.log(f"    -> Halaman siap setelah {time.monotonic() - started:.2f} detik.")
+
+    def _wait_for_page_idle(self, session, timeout):
+        """Menunggu sampai dokumen selesai dimuat, tidak ada XHR/fetch tertunda dan tidak ada overlay
+        loading yang terlihat, berturut-turut selama jendela tenang. Mengembalikan False bila timeout habis."""
+        quiet_period = self.flow_settings.get("idle_quiet_ms", 300) / 1000
+        spinners = self.flow_settings.get("spinner_xpaths") or self.SPINNER_XPATHS
+        deadline = time.monotonic() + timeout; idle_since = None
+        with session.metrics.waiting():
+            while not self._is_stopped:
+                session.metrics.polls += 1
+                now = time.monotonic()
+                try: state = session.driver.execute_script(PAGE_IDLE_SCRIPT, spinners) or {}
+                except WebDriverException: state = {} # Halaman sedang berpindah; anggap belum idle
+                if state.get("ready") == "complete" and not state.get("pending") and not state.get("busy"):
+                    if idle_since is None: idle_since = now
+                    if now - idle_since >= quiet_period: return True
+                else:
+                    idle_since = None
+                if now >= deadline: return False
+                time.sleep(min(self.IDLE_POLL_INTERVAL, deadline - now))
+        return False
+
+    def _do_scroll_into_view(self, session, step):
+        element = session.wait().until(EC.presence_of_element_located(step.locator))
+        session.driver.execute_script("arguments[0].scrollIntoView({block: 'center', inline: 'center'});", element)
+        session.log(f"    -> Elemen '{step.selector}' digulir ke tengah layar.")
+
+    def _do_js_click(self, session, step):
+        element = session.wait().until(EC.presence_of_element_located(step.locator))
+        session.driver.execute_script("arguments[0].click();", element)
+        session.log("    -> Elemen diklik menggunakan JavaScript.")
+
+    def _do_wait_clickable(self, session, step):
+        session.wait().until(EC.element_to_be_clickable(step.locator))
+        session.log("    -> Elemen siap untuk diklik.")
+
+    def _create_driver(self, log=None):
+        driver_path = DriverCache(log=log or self.progress.emit).get_driver_path(self.browser)
+        if self.browser == "chrome":
+            options = ChromeOptions();
+            if self.flow_settings.get("headless"): options.add_argument("--headless=new")
+            service = ChromeService(driver_path); driver = webdriver.Chrome(service=service, options=options)
+        elif self.browser == "firefox":
+            options = FirefoxOptions()
+            if self.flow_settings.get("headless"): options.add_argument("--headless")
+            service = FirefoxService(driver_path); driver = webdriver.Firefox(service=service, options=options)
+        else:
+            raise ValueError(f"Browser '{self.browser}' tidak didukung.")
+        driver.maximize_window()
+        return driver
+
+    def _pool_key(self):
+        return (self.browser, bool(self.flow_settings.get("headless")))
+
+    def _acquire_driver(self, log):
+        if self.browser_pool is None: return self._create_driver(log)
+        return self.browser_pool.acquire(self._pool_key(), lambda: self._create_driver(log), log)
+
+    def _release_driver(self, driver, log):
+        if self.browser_pool is not None and not self._is_stopped:
+            self.browser_pool.release(self._pool_key(), driver, log); return
+        log("Menutup browser...");
+        try:
+            if not self.flow_settings.get("headless") and not self._is_stopped: time.sleep(3)
+            driver.quit()
+        except Exception as quit_e:
+            log(f"Error saat menutup browser: {quit_e}")
+
+    def _build_jobs(self, session_count):
+        """Mengelompokkan alur menjadi job. Alur biasa tetap berurutan dalam satu job,
+        alur bertanda 'independent' menjadi job tersendiri bila mode paralel aktif."""
+        if session_count <= 1:
+            return [list(self.test_flows_data.keys())]
+        sequential = [name for name, data in self.test_flows_data.items() if not data.get("independent")]
+        independent = [[name] for name, data in self.test_flows_data.items() if data.get("independent")]
+        return ([sequential] if sequential else []) + independent
+
+    def _run_session(self, index, scheduler, plans, tagged):
+        """Menjalankan job dari antrean pada satu sesi browser. Mengembalikan tuple hasil (success, message, screenshot)."""
+        session = None
+        log = (lambda message: self.progress.emit(f"[S{index + 1}] {message}")) if tagged else self.progress.emit
+        current_flow_name = "unknown_flow"
+        current_action_data = None # Untuk melacak aksi yang gagal
+        current_index = None
+
+        try:
+            if self._is_stopped: raise InterruptedError("Pengujian dihentikan oleh pengguna sebelum dimulai.")
+            log(f"Menyiapkan driver untuk {self.browser}...")
+            setup_started = time.perf_counter()
+            session = BrowserSession(index, self._acquire_driver(log), self.progress.emit, tagged, self.tracer,
+                                     on_wait=lambda name, duration_ms, polls: self._emit_event(
+                                         RunEvent.WAIT, session, current_flow_name, None, name=name, duration_ms=duration_ms, polls=polls))
+            if self.tracer:
+                self.tracer.name_track(index + 1, f"Sesi {index + 1}")
+                self.tracer.complete("Menyiapkan driver", "setup", index + 1, setup_started, time.perf_counter(), {"browser": self.browser})
+            if index == 0: self.driver = session.driver
+            if self.resume and self.resume.get("state"): self._restore_session(session)
+            recorder_frames = int(self.flow_settings.get("flight_recorder_frames", 0) or 0)
+            if recorder_frames > 0:
+                session.recorder = FrameRecorder(recorder_frames, self.flow_settings.get("flight_recorder_mb", FrameRecorder.DEFAULT_MAX_MB))
+
+            while True:
+                job = scheduler.next_job(index)
+                if job is None: break
+                for flow_name in job:
+                    current_flow_name = flow_name; current_action_data = current_index = None
+                    if self._is_stopped: raise InterruptedError("Pengujian dihentikan oleh pengguna.")
+                    session.log(f"\n--- Menjalankan Alur: {flow_name} ---")
+                    self._emit_event(RunEvent.FLOW_START, session, flow_name)
+                    flow_span = session.metrics.measure(flow_name, "flow"); flow_status = 'FAILED'
+                    # Alur setup/login bisa jalan di beberapa sesi sekaligus: tiap sesi menandai salinan datanya sendiri
+                    flow_copy = copy.deepcopy(self.test_flows_data[flow_name])
+                    units = [[step.bind(flow_copy['actions'][step.index]) for step in unit] for unit in plans[flow_name]]
+                    try:
+                        cached_login = flow_name in self._login_flows and self._login_from_cache(session, flow_name, units)
+                        for unit in ([] if cached_login else units):
+                            if self._is_stopped: raise InterruptedError("Pengujian dihentikan oleh pengguna.")
+                            completed = 0
+                            if len(unit) > 1:
+                                completed, failure = self._run_batch(session, flow_name, unit)
+                                if failure:
+                                    current_action_data = failure[0].source; current_index = failure[0].index
+                                    raise AssertionError(failure[1])
+                                if completed and self._capturing_frames(session): self._capture_frame(session, flow_name, unit[:completed])
+                            for step in unit[completed:]:
+                                current_action_data = step.source; current_index = step.index
+                                if self._is_stopped: raise InterruptedError("Pengujian dihentikan oleh pengguna.")
+                                if len(unit) == 1: self._emit_event(RunEvent.ACTION_START, session, flow_name, step.index, action=step.action)
+                                action_span = session.metrics.measure(step.action, "action", {"by": step.by_string, "selector": step.selector})
+                                action_status = 'FAILED'
+                                try:
+                                    self._run_step_with_retry(session, flow_name, step); action_status = 'DONE'
+                                finally:
+                                    timing = step.source['timing'] = action_span.finish()
+                                    self._emit_event(RunEvent.ACTION_END, session, flow_name, step.index, action=step.action, status=action_status, timing=timing)
+                                step.source['status'] = 'DONE' # --- PERUBAHAN ---: Menandai aksi berhasil
+                                if self._capturing_frames(session): self._capture_frame(session, flow_name, [step])
+                        flow_status = 'CACHED' if cached_login else 'DONE'
+                        if flow_name in self._login_flows and not cached_login: self._save_login_snapshot(session)
+                        if self.checkpoint: self._save_checkpoint(session, flow_name)
+                        scheduler.flow_done(index, flow_name)
+                    finally:
+                        if flow_status == 'FAILED' and flow_name in self._login_flows: self.session_cache.invalidate()
+                        flow_timing = flow_copy['timing'] = flow_span.finish()
+                        with self._flow_runs_lock: self._flow_runs.append((flow_name, index, flow_status, flow_copy))
+                        session.log(self._format_flow_timing(flow_timing))
+                        self._emit_event(RunEvent.FLOW_END, session, flow_name, status=flow_status, timing=flow_timing)
+
+            return (True, "Semua alur tes berhasil diselesaikan.", None)
+
+        except InterruptedError as e:
+            error_message = f"Pengujian dihentikan: {str(e)}"
+            log(error_message)
+            self._emit_event(RunEvent.ERROR, session, current_flow_name, current_index, error="stopped", message=error_message)
+            self._checkpoint_failure(session, current_flow_name, current_index, log)
+            return (False, error_message, None)
+        except (InvalidArgumentException, ValueError) as e:
+            error_message = f"Error Konfigurasi Aksi: {str(e)}"
+            log(error_message)
+            if current_action_data: current_action_data.update(status='FAILED', error=type(e).__name__)
+            self._emit_event(RunEvent.ERROR, session, current_flow_name, current_index, error=type(e).__name__, message=error_message)
+            self._checkpoint_failure(session, current_flow_name, current_index, log)
+            return (False, error_message, None)
+        except WebDriverException as e:
+            error_message = f"Error WebDriver: Browser mungkin ditutup atau terjadi masalah koneksi.\nDetail: {e.msg}"
+            log(error_message)
+            if current_action_data: current_action_data.update(status='FAILED', error=type(e).__name__)
+            self._emit_event(RunEvent.ERROR, session, current_flow_name, current_index, error=type(e).__name__, message=error_message)
+            if session:
+                try: self._dump_recording(session, current_flow_name, current_index, self._error_base_path(current_flow_name))
+                except Exception as rec_e: log(f"Gagal menyimpan rekaman frame: {rec_e}")
+            self._checkpoint_failure(session, current_flow_name, current_index, log)
+            return (False, error_message, None)
+        except Exception as e:
+            if current_action_data: current_action_data.update(status='FAILED', error=type(e).__name__)
+            
+            error_message = f"Error pada rangkaian tes '{current_flow_name}': {type(e).__name__}: {str(e)}"
+            log(error_message)
+            self._emit_event(RunEvent.ERROR, session, current_flow_name, current_index, error=type(e).__name__, message=error_message)
+
+            screenshot_path = None
+            if session:
+                base_path = self._error_base_path(current_flow_name)
+                try:
+                    # --- PERUBAHAN ---: Menyimpan screenshot di folder Result (watermark & encode di latar)
+                    screenshot_path = self._capture_screenshot(session, current_flow_name, current_index, base_path,
+                                                               watermark="FAILED", color=(255, 0, 0, 255))
+                except Exception as ss_e:
+                    log(f"Gagal menyimpan screenshot: {ss_e}")
+                try: self._dump_recording(session, current_flow_name, current_index, base_path)
+                except Exception as rec_e: log(f"Gagal menyimpan rekaman frame: {rec_e}")
+            self._checkpoint_failure(session, current_flow_name, current_index, log)
+            return (False, error_message, screenshot_path)
+        finally:
+            if session: self._release_driver(session.driver, log)
+
+    def run_tests(self):
+        """Menjalankan semua alur. Tuple hasil (success, message, screenshot) dikirim lewat `finished` dan dikembalikan."""
+        self.progress.emit("Memulai rangkaian pengujian...")
+        if not all([self.url, self.username, self.password, self.test_flows_data]):
+            result = (False, "Pengujian dibatalkan. Data/alur tes tidak lengkap.", None)
+            self.finished.emit(result, {}); return result
+        
+        # --- PERUBAHAN ---: Membuat folder Result jika belum ada
+        os.makedirs(RESULT_DIR, exist_ok=True)
+        self._flow_runs = []
+
+        try:
+            plans = {flow_name: self.group_batches(self._resume_plan(flow_name, self.compile_flow(flow_name, flow_data)))
+                     for flow_name, flow_data in self.test_flows_data.items()}
+            graph = FlowGraph(self.test_flows_data, self.is_login_flow) if FlowGraph.declared(self.test_flows_data) else None
+        except ValueError as e:
+            error_message = f"Error Konfigurasi Aksi: {str(e)}"
+            self.progress.emit(error_message)
+            result = (False, error_message, None)
+            self.finished.emit(result, self.test_flows_data); return result
+
+        if self.flow_settings.get("trace"):
+            self.tracer = TraceRecorder(f"TMC {self.browser} - {self.url}"); self.tracer.name_track(self.ARTIFACT_TID, "Artefak")
+        self._emit_event(RunEvent.RUN_START, browser=self.browser, url=self.url, flows=list(plans),
+                         total_actions=sum(len(unit) for units in plans.values() for unit in units))
+        if self.flow_settings.get("step_screenshots"): self.frame_store = FrameStore(FRAMES_DIR)
+        self.retry_budget = RetryBudget(int(self.flow_settings.get("retry_budget", self.DEFAULT_RETRY_BUDGET)))
+        if self.flow_settings.get("auth_cache"):
+            self.session_cache = SessionCache(self.browser, self.url, self.username, self.password,
+                                              self.flow_settings.get("auth_cache_minutes", SessionCache.DEFAULT_TTL_MINUTES))
+            self._login_flows = {flow_name for flow_name, flow_data in self.test_flows_data.items() if self.is_login_flow(flow_data)}
+        if self.flow_settings.get("checkpoints"):
+            self.checkpoint = CheckpointFile(checkpoint_path(self.url, self.username, self.flow_settings.get("checkpoint_tag")), self.browser, self.url, self.username, plans,
+                                             initial_state=self.resume.get("flow_state") if self.resume else None)
+        result = self._run_sessions(plans, graph)
+        self._drain_artifacts()
+        self._merge_flow_runs()
+        if self.frame_store:
+            stats = self.frame_store.stats
+            self.progress.emit(f"Frame per langkah: {stats['frames']} diambil, {stats['duplicates']} duplikat, "
+                               f"{stats['stored']} file baru ({stats['bytes'] / 1024:.0f} KB) di {FRAMES_DIR}")
+        if result[2] and not os.path.exists(result[2]): result = (result[0], result[1], None)
+        if self.retry_budget.used:
+            self.progress.emit(f"Retry: {self.retry_budget.used} dari anggaran {self.retry_budget.total} terpakai.")
+        if self.checkpoint and self.checkpoint.data["failure"]:
+            self.progress.emit(f"Checkpoint disimpan di {self.checkpoint.path}. Lanjutkan dari alur yang gagal dengan: python -m tmc resume")
+        if self.tracer: self._write_trace()
+        self._emit_event(RunEvent.RUN_END, success=result[0], message=result[1], screenshot=result[2])
+        self.finished.emit(result, self.test_flows_data)
+        return result
+
+    def _merge_flow_runs(self):
+        """Menulis salinan data alur milik sesi kembali ke test_flows_data. Bila alur jalan di beberapa sesi, salinan
+        yang gagal menang atas DONE/CACHED, lalu sesi dengan nomor terkecil, tidak bergantung urutan selesainya sesi."""
+        rank = {'FAILED': 0, 'DONE': 1, 'CACHED': 2}; chosen = {}
+        for flow_name, index, status, flow_copy in self._flow_runs:
+            if any(action.get('status') == 'FAILED' for action in flow_copy.get('actions', [])): status = 'FAILED'
+            key = (rank[status], index)
+            if flow_name not in chosen or key < chosen[flow_name][0]: chosen[flow_name] = (key, flow_copy)
+        for flow_name, (_, flow_copy) in chosen.items(): self.test_flows_data[flow_name] = flow_copy
+
+    def _run_sessions(self, plans, graph=None):
+        session_count = max(1, int(self.flow_settings.get("parallel_sessions", 1) or 1))
+        if graph:
+            scheduler = graph; session_count = min(session_count, len(graph.order))
+            self.progress.emit(f"Penjadwalan requires/provides: {len(graph.order)} alur, jalur kritis {graph.critical_path} aksi, {session_count} sesi browser.")
+            if graph.assumed: self.progress.emit(f"Token tanpa alur penyedia dianggap terpenuhi: {', '.join(graph.assumed)}")
+            if graph.defaulted:
+                self.progress.emit(f"(Peringatan: {len(graph.defaulted)} alur tanpa requires/provides dijalankan berurutan sesuai flows.json, "
+                                   f"di sesi alur sebelumnya: {', '.join(graph.defaulted)})")
+        else:
+            scheduler = JobQueue(self._build_jobs(session_count)); session_count = min(session_count, scheduler.size)
+        if session_count <= 1:
+            return self._run_session(0, scheduler, plans, tagged=False)
+
+        if not graph: self.progress.emit(f"Mode paralel: {scheduler.size} job dibagi ke {session_count} sesi browser.")
+
+        def run(index):
+            result = self._run_session(index, scheduler, plans, tagged=True)
+            if not result[0]: scheduler.abort()
+            return result
+
+        with ThreadPoolExecutor(max_workers=session_count, thread_name_prefix="tmc-session") as executor:
+            results = list(executor.map(run, range(session_count)))
+
+        failures = [result for result in results if not result[0]]
+        if not failures:
+            return (True, "Semua alur tes berhasil diselesaikan.", None)
+        success, message, screenshot_path = next((r for r in failures if r[2]), failures[0])
+        if len(failures) > 1: message = f"{message}\n({len(failures)} dari {session_count} sesi gagal.)"
+        return (False, message, screenshot_path)
+
+    def _write_trace(self):
+        safe_host = re.sub(r'[^A-Za-z0-9._-]', "_", re.sub(r'^\w+://', "", self.url)).strip("_")
+        trace_path = os.path.join(RESULT_DIR, f"trace_{time.strftime('%Y%m%d-%H%M%S')}_{safe_host}.json")
+        try:
+            self.tracer.write(trace_path)
+            self.progress.emit(f"Trace run disimpan di {trace_path} (buka di ui.perfetto.dev atau chrome://tracing)")
+            self._emit_event(RunEvent.ARTIFACT, artifact="trace", path=trace_path)
+        except OSError as e:
+            self.progress.emit(f"(Peringatan: Gagal menyimpan trace: {e})")
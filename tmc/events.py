@@ -0,0 +1,38 @@
+"""Event run dan callback sederhana tanpa Qt/Selenium, aman diimpor saat startup GUI."""
+import time
+
+
+# --- Event Run Terstruktur ---
+class RunEvent:
+    """Event run yang ringkas dan bertipe. Dikirim lewat callback FlowEngine.run_event sehingga GUI,
+    logger file maupun runner lain tidak perlu mem-parsing teks log."""
+    RUN_START = "run_start"; RUN_END = "run_end"
+    FLOW_START = "flow_start"; FLOW_END = "flow_end"
+    ACTION_START = "action_start"; ACTION_END = "action_end"
+    WAIT = "wait"; RETRY = "retry"; ARTIFACT = "artifact"; ERROR = "error"
+    __slots__ = ("kind", "ts", "session", "flow", "index", "data")
+
+    def __init__(self, kind, session=None, flow=None, index=None, data=None):
+        self.kind = kind; self.ts = time.time()
+        self.session = session; self.flow = flow; self.index = index; self.data = data or {}
+
+    def as_dict(self):
+        return {"kind": self.kind, "ts": round(self.ts, 3), "session": self.session, "flow": self.flow, "index": self.index, **self.data}
+
+    def __repr__(self):
+        return f"RunEvent({self.as_dict()!r})"
+
+
+# --- Callback Tanpa Qt ---
+class Callbacks:
+    """Pengganti pyqtSignal yang minimal: `connect(fn)` lalu `emit(*args)` memanggil semua fn secara langsung."""
+    __slots__ = ("_handlers",)
+
+    def __init__(self):
+        self._handlers = []
+
+    def connect(self, handler):
+        self._handlers.append(handler)
+
+    def emit(self, *args):
+        for handler in self._handlers: handler(*args)
@@ -0,0 +1,288 @@
+"""Log run (JSONL) dan riwayat hasil tes (SQLite). Modul ini tidak bergantung pada Qt maupun Selenium."""
+import os
+import json
+import math
+import shutil
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+
+# --- Log Run ke Disk (JSONL) ---
+class RunLog:
+    """Menulis log dan event run ke file JSONL secara bertahap. Baris ditampung lalu di-flush berkala oleh thread
+    latar (atau saat buffer penuh); file diputar saat melewati max_bytes sehingga memori dan disk tetap datar."""
+    FLUSH_INTERVAL = 1.0
+    FLUSH_LINES = 200
+
+    def __init__(self, path, max_bytes=5 * 1024 * 1024, backup_count=5):
+        self.path = path; self.max_bytes = max_bytes; self.backup_count = backup_count
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock(); self._buffer = []
+        self._file = open(path, 'a', encoding='utf-8')
+        self._closed = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_loop, name="tmc-runlog", daemon=True); self._flusher.start()
+
+    def write(self, record):
+        line = json.dumps(record, ensure_ascii=False, default=str)
+        with self._lock:
+            if self._file is None: return
+            self._buffer.append(line)
+            if len(self._buffer) >= self.FLUSH_LINES: self._flush_locked()
+
+    def log(self, env, message):
+        self.write({"ts": datetime.now().isoformat(timespec="milliseconds"), "env": env, "type": "log", "message": message})
+
+    def event(self, env, event):
+        self.write({"ts": datetime.fromtimestamp(event.ts).isoformat(timespec="milliseconds"), "env": env, "type": "event", **event.as_dict()})
+
+    def flush(self):
+        with self._lock: self._flush_locked()
+
+    def _flush_locked(self):
+        if self._file is None or not self._buffer: return
+        self._file.write("\n".join(self._buffer) + "\n"); self._buffer.clear()
+        self._file.flush()
+        if self.max_bytes and self._file.tell() >= self.max_bytes: self._rotate_locked()
+
+    def _rotate_locked(self):
+        self._file.close()
+        for number in range(self.backup_count - 1, 0, -1):
+            if os.path.exists(f"{self.path}.{number}"): os.replace(f"{self.path}.{number}", f"{self.path}.{number + 1}")
+        if self.backup_count: os.replace(self.path, f"{self.path}.1")
+        self._file = open(self.path, 'w' if self.backup_count else 'a', encoding='utf-8')
+
+    def _flush_loop(self):
+        while not self._closed.wait(self.FLUSH_INTERVAL):
+            try: self.flush()
+            except OSError: pass
+
+    def files(self):
+        """File log dari yang paling lama hingga yang sedang ditulis."""
+        rotated = [f"{self.path}.{number}" for number in range(self.backup_count, 0, -1) if os.path.exists(f"{self.path}.{number}")]
+        return rotated + [self.path]
+
+    def export(self, destination):
+        self.flush()
+        with open(destination, 'wb') as target:
+            for part in self.files():
+                with open(part, 'rb') as source: shutil.copyfileobj(source, target)
+
+    def close(self):
+        self._closed.set()
+        with self._lock:
+            self._flush_locked()
+            if self._file: self._file.close(); self._file = None
+
+
+# --- Riwayat Hasil Tes (SQLite) ---
+class ResultStore:
+    """Riwayat run di SQLite (runs, flows, actions, artifacts). Satu transaksi per run; koneksi dibuka per operasi
+    sehingga aman dipanggil dari thread mana pun."""
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS runs (
+        id INTEGER PRIMARY KEY, env TEXT, url TEXT, browser TEXT, username TEXT,
+        started_at TEXT, finished_at TEXT, success INTEGER, message TEXT);
+    CREATE TABLE IF NOT EXISTS flows (
+        id INTEGER PRIMARY KEY, run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+        position INTEGER, name TEXT, status TEXT, started_at TEXT, duration_ms REAL, wait_ms REAL,
+        sleep_ms REAL, command_ms REAL, polls INTEGER, round_trips INTEGER, retries INTEGER, retry_ms REAL);
+    CREATE TABLE IF NOT EXISTS actions (
+        id INTEGER PRIMARY KEY, run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+        flow_id INTEGER NOT NULL REFERENCES flows(id) ON DELETE CASCADE,
+        position INTEGER, action TEXT, by TEXT, selector TEXT, value TEXT, status TEXT, started_at TEXT,
+        duration_ms REAL, wait_ms REAL, sleep_ms REAL, command_ms REAL, polls INTEGER, round_trips INTEGER, retries INTEGER, retry_ms REAL,
+        batch_size INTEGER, error TEXT, frame TEXT);
+    CREATE TABLE IF NOT EXISTS artifacts (
+        id INTEGER PRIMARY KEY, run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+        flow_id INTEGER REFERENCES flows(id) ON DELETE CASCADE, action_position INTEGER,
+        kind TEXT, path TEXT, created_at TEXT);
+    CREATE INDEX IF NOT EXISTS idx_runs_env_started ON runs(env, started_at);
+    CREATE INDEX IF NOT EXISTS idx_runs_started ON runs(started_at);
+    CREATE INDEX IF NOT EXISTS idx_flows_name_run ON flows(name, run_id);
+    CREATE INDEX IF NOT EXISTS idx_actions_flow ON actions(flow_id);
+    CREATE INDEX IF NOT EXISTS idx_actions_selector ON actions(selector, started_at);
+    CREATE INDEX IF NOT EXISTS idx_artifacts_run ON artifacts(run_id);
+    CREATE TABLE IF NOT EXISTS step_stats (
+        kind TEXT NOT NULL, flow TEXT NOT NULL, action TEXT NOT NULL, by TEXT NOT NULL, selector TEXT NOT NULL,
+        runs INTEGER, passes INTEGER, failures INTEGER, timeouts INTEGER, recent_outcomes TEXT, recent_durations TEXT,
+        first_seen TEXT, last_seen TEXT, PRIMARY KEY (kind, flow, action, by, selector));
+    CREATE TABLE IF NOT EXISTS stats_state (name TEXT PRIMARY KEY, value INTEGER);
+    """
+    MIGRATIONS = {"flows": {"retries": "INTEGER", "retry_ms": "REAL"},
+                  "actions": {"error": "TEXT", "frame": "TEXT", "retries": "INTEGER", "retry_ms": "REAL"}}
+    TIMING_FIELDS = ("started_at", "duration_ms", "wait_ms", "sleep_ms", "command_ms", "polls", "round_trips", "retries", "retry_ms")
+
+    def __init__(self, path):
+        self.path = path
+        self._schema_ready = False; self._lock = threading.Lock()
+
+    @contextmanager
+    def _connect(self):
+        if not self._schema_ready: os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        connection = sqlite3.connect(self.path, timeout=10)
+        try:
+            connection.execute("PRAGMA foreign_keys = ON")
+            if not self._schema_ready:
+                with self._lock:
+                    connection.execute("PRAGMA journal_mode = WAL"); connection.executescript(self.SCHEMA)
+                    for table, columns in self.MIGRATIONS.items():
+                        existing = {row[1] for row in connection.execute(f"PRAGMA table_info({table})")}
+                        for column, column_type in columns.items():
+                            if column not in existing: connection.execute(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}")
+                    connection.commit()
+                    self._schema_ready = True
+            yield connection
+        finally:
+            connection.close()
+
+    @staticmethod
+    def _flow_status(actions):
+        statuses = [action.get('status') for action in actions]
+        if 'FAILED' in statuses: return 'FAILED'
+        if statuses and all(status == 'DONE' for status in statuses): return 'DONE'
+        return 'SKIPPED' if not any(statuses) else 'INCOMPLETE'
+
+    def record_run(self, env, url, browser, username, started_at, result, flows, artifacts=()):
+        """Menyimpan satu run lengkap dalam satu transaksi. Mengembalikan id run."""
+        success, message, _ = result
+        finished_at = datetime.now().isoformat(timespec="milliseconds")
+        with self._connect() as connection, connection:
+            run_id = connection.execute(
+                "INSERT INTO runs (env, url, browser, username, started_at, finished_at, success, message) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (env, url, browser, username, started_at or finished_at, finished_at, int(bool(success)), message)).lastrowid
+            flow_ids = {}
+            for position, (flow_name, flow_data) in enumerate(flows.items()):
+                actions = flow_data.get('actions', []); timing = flow_data.get('timing') or {}
+                flow_ids[flow_name] = flow_id = connection.execute(
+                    "INSERT INTO flows (run_id, position, name, status, started_at, duration_ms, wait_ms, sleep_ms, command_ms, polls, round_trips,"
+                    " retries, retry_ms) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (run_id, position, flow_name, self._flow_status(actions), *(timing.get(field) for field in self.TIMING_FIELDS))).lastrowid
+                connection.executemany(
+                    "INSERT INTO actions (run_id, flow_id, position, action, by, selector, value, status, started_at, duration_ms, wait_ms,"
+                    " sleep_ms, command_ms, polls, round_trips, retries, retry_ms, batch_size, error, frame)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    [(run_id, flow_id, index, action.get('action'), action.get('by'), action.get('selector'), action.get('value'), action.get('status'),
+                      *((action.get('timing') or {}).get(field) for field in self.TIMING_FIELDS), (action.get('timing') or {}).get('batch_size'),
+                      action.get('error'), action.get('frame')) for index, action in enumerate(actions)])
+            connection.executemany(
+                "INSERT INTO artifacts (run_id, flow_id, action_position, kind, path, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                [(run_id, flow_ids.get(artifact.get('flow')), artifact.get('index'), artifact.get('artifact'), artifact.get('path'),
+                  artifact.get('created_at', finished_at)) for artifact in artifacts])
+            self._refresh_stats(connection)
+        return run_id
+
+    # --- Statistik inkremental ---
+    STATS_WINDOW = 50 # Jumlah hasil/durasi terakhir yang disimpan per langkah untuk persentil, tren & flakiness
+    TIMEOUT_ERRORS = ("TimeoutException",)
+
+    def refresh_stats(self):
+        """Memproses baris flows/actions yang belum masuk step_stats. Mengembalikan jumlah baris yang diproses."""
+        with self._connect() as connection, connection:
+            return self._refresh_stats(connection)
+
+    def _refresh_stats(self, connection):
+        state = dict(connection.execute("SELECT name, value FROM stats_state").fetchall())
+        last_flow_id, last_action_id = state.get("last_flow_id", 0), state.get("last_action_id", 0)
+        flow_rows = connection.execute(
+            "SELECT id, name, status, duration_ms, NULL, COALESCE(started_at, '') FROM flows WHERE id > ? AND status IN ('DONE', 'FAILED') ORDER BY id",
+            (last_flow_id,)).fetchall()
+        action_rows = connection.execute(
+            "SELECT a.id, f.name, a.action, COALESCE(a.by, ''), COALESCE(a.selector, ''), a.status, a.duration_ms, a.error, COALESCE(a.started_at, '')"
+            " FROM actions a JOIN flows f ON f.id = a.flow_id WHERE a.id > ? AND a.status IN ('DONE', 'FAILED') ORDER BY a.id",
+            (last_action_id,)).fetchall()
+        samples = [(("flow", name, "", "", ""), status, duration, error, seen) for _, name, status, duration, error, seen in flow_rows]
+        samples += [(("action", flow, action, by, selector), status, duration, error, seen)
+                    for _, flow, action, by, selector, status, duration, error, seen in action_rows]
+        if not samples:
+            return 0
+
+        stats = {}
+        for key in {sample[0] for sample in samples}:
+            row = connection.execute("SELECT runs, passes, failures, timeouts, recent_outcomes, recent_durations, first_seen, last_seen FROM step_stats"
+                                     " WHERE kind = ? AND flow = ? AND action = ? AND by = ? AND selector = ?", key).fetchone()
+            stats[key] = ([*row[:4], row[4], json.loads(row[5]), row[6], row[7]] if row else [0, 0, 0, 0, "", [], None, None])
+        for key, status, duration, error, seen in samples:
+            entry = stats[key]; passed = status == 'DONE'
+            entry[0] += 1; entry[1] += passed; entry[2] += not passed; entry[3] += error in self.TIMEOUT_ERRORS
+            entry[4] = (entry[4] + ("P" if passed else "F"))[-self.STATS_WINDOW:]
+            if duration is not None: entry[5] = (entry[5] + [duration])[-self.STATS_WINDOW:]
+            entry[6] = entry[6] or seen; entry[7] = max(entry[7] or "", seen)
+        connection.executemany(
+            "INSERT OR REPLACE INTO step_stats (kind, flow, action, by, selector, runs, passes, failures, timeouts, recent_outcomes, recent_durations,"
+            " first_seen, last_seen) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [(*key, *entry[:5], json.dumps(entry[5]), *entry[6:]) for key, entry in stats.items()])
+        connection.executemany("INSERT OR REPLACE INTO stats_state (name, value) VALUES (?, ?)",
+                               [("last_flow_id", flow_rows[-1][0] if flow_rows else last_flow_id),
+                                ("last_action_id", action_rows[-1][0] if action_rows else last_action_id)])
+        return len(samples)
+
+    @staticmethod
+    def _percentile(values, percent):
+        if not values: return None
+        ordered = sorted(values)
+        return ordered[max(0, math.ceil(percent / 100 * len(ordered)) - 1)]
+
+    @staticmethod
+    def _trend(durations):
+        """Rasio rata-rata paruh terbaru terhadap paruh lama jendela durasi (1.2 = 20% lebih lambat)."""
+        if len(durations) < 6: return None
+        half = len(durations) // 2
+        older, newer = durations[:half], durations[half:]
+        older_mean = sum(older) / len(older)
+        return round((sum(newer) / len(newer)) / older_mean, 2) if older_mean else None
+
+    def step_report(self, flow_name=None, min_runs=1):
+        """Ringkasan flakiness & kecepatan per alur dan per langkah (action, by, selector), dibaca dari step_stats."""
+        query = ("SELECT kind, flow, action, by, selector, runs, passes, failures, timeouts, recent_outcomes, recent_durations, last_seen"
+                 " FROM step_stats WHERE runs >= ?")
+        params = [min_runs]
+        if flow_name: query += " AND flow = ?"; params.append(flow_name)
+        with self._connect() as connection:
+            rows = connection.execute(query + " ORDER BY flow, kind DESC, action, selector", params).fetchall()
+        report = []
+        for kind, flow, action, by, selector, runs, passes, failures, timeouts, outcomes, durations, last_seen in rows:
+            durations = json.loads(durations)
+            report.append({
+                "kind": kind, "flow": flow, "action": action, "by": by, "selector": selector, "runs": runs,
+                "pass_rate": round(passes / runs, 3) if runs else None, "timeout_rate": round(timeouts / runs, 3) if runs else None,
+                "p50_ms": self._percentile(durations, 50), "p95_ms": self._percentile(durations, 95), "trend": self._trend(durations),
+                # Flaky: pernah gagal lalu lolos lagi tanpa perubahan alur dalam jendela terakhir
+                "flaky": "FP" in outcomes, "recent": outcomes, "last_seen": last_seen})
+        return report
+
+    REPORT_COLUMNS = ("Alur", "Langkah", "Selector", "Run", "Lolos", "p50", "p95", "Timeout", "Tren", "Flaky", "Terakhir")
+
+    @staticmethod
+    def format_report_row(entry):
+        """Baris laporan siap tampil (GUI maupun CLI) sesuai REPORT_COLUMNS."""
+        percent = lambda value: "-" if value is None else f"{value * 100:.0f}%"
+        millis = lambda value: "-" if value is None else f"{value / 1000:.2f}s"
+        trend = "-" if entry["trend"] is None else f"{(entry['trend'] - 1) * 100:+.0f}%"
+        step = "(alur)" if entry["kind"] == "flow" else entry["action"]
+        selector = f"{entry['by']}: {entry['selector']}" if entry["selector"] else ""
+        return (entry["flow"], step, selector, str(entry["runs"]), percent(entry["pass_rate"]), millis(entry["p50_ms"]),
+                millis(entry["p95_ms"]), percent(entry["timeout_rate"]), trend, "YA" if entry["flaky"] else "", (entry["last_seen"] or "")[:16])
+
+    def flow_durations(self):
+        """p50 durasi (ms) per alur dari jendela statistik terakhir, untuk membagi alur ke shard."""
+        self.refresh_stats()
+        with self._connect() as connection:
+            rows = connection.execute("SELECT flow, recent_durations FROM step_stats WHERE kind = 'flow'").fetchall()
+        return {flow: duration for flow, durations in rows if (duration := self._percentile(json.loads(durations), 50)) is not None}
+
+    def recent_flow_runs(self, flow_name, limit=100):
+        """Riwayat terbaru satu alur: (run_id, env, started_at, status, duration_ms)."""
+        with self._connect() as connection:
+            return connection.execute(
+                "SELECT r.id, r.env, COALESCE(f.started_at, r.started_at), f.status, f.duration_ms FROM flows f JOIN runs r ON r.id = f.run_id"
+                " WHERE f.name = ? ORDER BY f.run_id DESC LIMIT ?", (flow_name, limit)).fetchall()
+
+    def slowest_selectors(self, since=None, limit=20):
+        """Selector dengan rata-rata durasi tertinggi sejak `since` (ISO): (action, by, selector, count, avg_ms, max_ms)."""
+        with self._connect() as connection:
+            return connection.execute(
+                "SELECT action, by, selector, COUNT(*), ROUND(AVG(duration_ms), 1), MAX(duration_ms) FROM actions"
+                " WHERE selector != '' AND duration_ms IS NOT NULL AND started_at >= ? GROUP BY action, by, selector"
+                " ORDER BY AVG(duration_ms) DESC LIMIT ?", (since or "", limit)).fetchall()
@@ -0,0 +1,101 @@
+"""Kebijakan retry per aksi dan anggaran retry per run.
+
+Kebijakan digabung berlapis, yang belakangan menimpa yang sebelumnya:
+
+1. `RetryPolicy.DEFAULTS` ("*" lalu jenis aksi),
+2. `"retry"` pada alur di flows.json, berupa peta jenis aksi (atau "*") ke kebijakan,
+3. `"retry"` pada aksi itu sendiri.
+
+Kebijakan: {"on": [nama kelas exception], "attempts": total percobaan, "backoff_ms": jeda awal, "factor": pengali
+jeda, "max_backoff_ms": batas jeda}. Nama kelas dicocokkan dengan kelas exception beserta kelas induknya, jadi
+"WebDriverException" juga mencakup turunannya (termasuk TimeoutException). `"retry": false` pada aksi/alur
+mematikan retry; `false` untuk "*" atau jenis aksi di peta alur mematikannya untuk jenis aksi tersebut.
+"""
+import threading
+
+# Exception yang hampir selalu sementara: elemen diganti DOM (mis. DataTables redraw) atau tertutup overlay/animasi.
+TRANSIENT_ERRORS = ["StaleElementReferenceException", "ElementClickInterceptedException"]
+
+
+class RetryPolicy:
+    DEFAULTS = {
+        "*": {"on": ["StaleElementReferenceException"], "attempts": 2, "backoff_ms": 250, "factor": 2.0, "max_backoff_ms": 5000},
+        "Klik Elemen": {"on": TRANSIENT_ERRORS, "attempts": 3},
+        "Klik Elemen via JS": {"on": TRANSIENT_ERRORS, "attempts": 3},
+        "Isi Teks": {"on": TRANSIENT_ERRORS + ["ElementNotInteractableException"], "attempts": 3},
+        "Centang Checkbox (Ensure Checked)": {"on": TRANSIENT_ERRORS, "attempts": 3},
+        "Hapus Centang Checkbox (Ensure Unchecked)": {"on": TRANSIENT_ERRORS, "attempts": 3},
+        "Gulir ke Elemen": {"on": TRANSIENT_ERRORS, "attempts": 3},
+    }
+
+    KEYS = ("on", "attempts", "backoff_ms", "factor", "max_backoff_ms")
+
+    def __init__(self, on=(), attempts=1, backoff_ms=0, factor=1.0, max_backoff_ms=None):
+        self.on = frozenset(on); self.attempts = max(1, int(attempts))
+        self.backoff_ms = float(backoff_ms); self.factor = float(factor); self.max_backoff_ms = max_backoff_ms
+
+    @classmethod
+    def check(cls, policy):
+        """ValueError bila `policy` (nilai "retry" di flows.json) bukan false atau kebijakan yang valid."""
+        if policy is False: return
+        if not isinstance(policy, dict): raise ValueError("harus berupa objek kebijakan atau false")
+        unknown = [key for key in policy if key not in cls.KEYS]
+        if unknown: raise ValueError(f"kunci tidak dikenal: {', '.join(unknown)} (yang valid: {', '.join(cls.KEYS)})")
+        if "on" in policy and not (isinstance(policy["on"], list) and all(isinstance(name, str) for name in policy["on"])):
+            raise ValueError("'on' harus berupa daftar nama kelas exception")
+        if "attempts" in policy and not (type(policy["attempts"]) is int and policy["attempts"] >= 1):
+            raise ValueError("'attempts' harus berupa bilangan bulat >= 1")
+        for key in ("backoff_ms", "factor", "max_backoff_ms"):
+            if key in policy and not (type(policy[key]) in (int, float) or (key == "max_backoff_ms" and policy[key] is None)):
+                raise ValueError(f"'{key}' harus berupa angka")
+
+    @classmethod
+    def check_flow_overrides(cls, overrides, actions):
+        """ValueError bila "retry" alur bukan false atau peta jenis aksi (dari `actions`, atau "*") ke kebijakan."""
+        if overrides is False: return
+        if not isinstance(overrides, dict): raise ValueError("harus berupa peta jenis aksi ke kebijakan, atau false")
+        for action, policy in overrides.items():
+            if action != "*" and action not in actions: raise ValueError(f"jenis aksi '{action}' tidak dikenali")
+            try: cls.check(policy)
+            except ValueError as e: raise ValueError(f"['{action}']: {e}") from e
+
+    @classmethod
+    def resolve(cls, action, flow_overrides=None, action_override=None):
+        """Kebijakan efektif untuk sebuah aksi, atau None bila retry dimatikan."""
+        layers = [cls.DEFAULTS["*"], cls.DEFAULTS.get(action)]
+        if flow_overrides is False or action_override is False: return None
+        if isinstance(flow_overrides, dict): layers += [flow_overrides.get("*"), flow_overrides.get(action)]
+        layers.append(action_override)
+        merged = {}; disabled = False
+        for layer in layers:
+            # false pada "*" atau jenis aksi di peta alur mematikan retry, kecuali dinyalakan lagi oleh lapisan berikutnya
+            if layer is False: disabled = True
+            elif isinstance(layer, dict): merged.update(layer); disabled = False
+        if disabled: return None
+        return cls(**{key: merged[key] for key in cls.KEYS if key in merged})
+
+    def retries(self, error):
+        return any(klass.__name__ in self.on for klass in type(error).__mro__)
+
+    def delay(self, retry_number):
+        """Jeda (detik) sebelum retry ke-`retry_number` (mulai 1)."""
+        delay_ms = self.backoff_ms * self.factor ** (retry_number - 1)
+        if self.max_backoff_ms is not None: delay_ms = min(delay_ms, self.max_backoff_ms)
+        return delay_ms / 1000
+
+
+class RetryBudget:
+    """Jumlah retry maksimum untuk seluruh run (semua sesi), agar environment yang rusak tidak di-retry terus."""
+
+    def __init__(self, total):
+        self.total = total; self.used = 0
+        self._lock = threading.Lock()
+
+    def take(self):
+        with self._lock:
+            if self.used >= self.total: return False
+            self.used += 1; return True
+
+    @property
+    def exhausted(self):
+        return self.used >= self.total
@@ -0,0 +1,163 @@
+"""Penjadwal alur untuk sesi browser: antrean job berurutan (bawaan) atau graf dependensi requires/provides.
+
+Alur dapat mendeklarasikan token yang dibutuhkan dan disediakan, mis.
+
+    "01. Test_login_akurat": {"provides": ["session:logged_in"], ...}
+    "02. Master Barang - ...": {"requires": ["session:logged_in"], "provides": ["data:kelompok_barang"], ...}
+    "05. test_logout": {"requires": ["session:logged_in", "data:kelompok_barang"], "revokes": ["session:logged_in"], ...}
+
+Token berawalan `session:` atau `page:` adalah keadaan browser, jadi berlaku per sesi: alur penyedianya dijalankan
+ulang sebagai setup di setiap sesi yang membutuhkannya. Token lain bersifat global (urutan saja) dan terpenuhi
+sekali alur penyedianya selesai di sesi mana pun. Token tanpa penyedia di antara alur terpilih (mis. saat
+melanjutkan run atau memilih sebagian alur) dianggap sudah terpenuhi.
+
+Alur tanpa deklarasi tetap berjalan seperti pada mode berurutan: setelah alur tanpa deklarasi sebelumnya selesai
+(token global `flow:<nama>`), di sesi yang sama dengan alur tepat sebelumnya di flows.json (token `session:after:<nama>`,
+tidak bisa dipenuhi lewat setup), dan dengan token sesi yang dimiliki sesi setelah alur-alur sebelumnya (alur login
+tanpa deklarasi menyediakan `session:login:<nama>`, jadi sesi tersebut login lebih dulu bila perlu).
+"""
+import queue
+import threading
+
+SESSION_SCOPES = ("session:", "page:")
+AFFINITY_SCOPE = "session:after:" # Token implisit: alur sebelumnya sudah berjalan di sesi ini
+
+
+def is_session_token(token):
+    return token.startswith(SESSION_SCOPES)
+
+
+class JobQueue:
+    """Penjadwal bawaan: setiap job (daftar alur yang dijalankan berurutan) diambil oleh sesi yang sedang kosong."""
+
+    def __init__(self, jobs):
+        self.size = len(jobs)
+        self._queue = queue.Queue()
+        for job in jobs: self._queue.put(job)
+
+    def next_job(self, session_index):
+        try: return self._queue.get_nowait()
+        except queue.Empty: return None
+
+    def flow_done(self, session_index, flow_name):
+        pass
+
+    def abort(self):
+        pass
+
+
+class FlowGraph:
+    """DAG dari requires/provides. Sesi meminta job berikutnya: alur siap dengan prioritas jalur kritis tertinggi
+    (total aksi terpanjang hingga akhir graf), didahului alur setup yang belum dijalankan di sesi itu."""
+
+    def __init__(self, flows, is_login_flow=None):
+        self.order = list(flows)
+        self.requires = {name: list(data.get("requires", [])) for name, data in flows.items()}
+        self.provides = {name: list(data.get("provides", [])) for name, data in flows.items()}
+        self.revokes = {name: list(data.get("revokes", [])) for name, data in flows.items()}
+        self.defaulted = [name for name, data in flows.items() if not any(data.get(key) for key in ("requires", "provides", "revokes"))]
+        self._chain_defaulted(flows, is_login_flow or (lambda flow_data: False))
+        self.providers = {}
+        for name in self.order:
+            for token in self.provides[name]: self.providers.setdefault(token, []).append(name)
+        self.assumed = sorted({token for tokens in self.requires.values() for token in tokens if token not in self.providers})
+        self.dependencies = {name: {provider for token in self.requires[name] for provider in self.providers.get(token, []) if provider != name}
+                             for name in self.order}
+        self._check_acyclic()
+        weights = {name: len(data.get("actions", [])) for name, data in flows.items()}
+        self.priority = {}
+        for name in reversed(self._topological_order):
+            self.priority[name] = weights[name] + max((self.priority[other] for other in self.order if name in self.dependencies[other]), default=0)
+
+        self._condition = threading.Condition()
+        self._pending = list(self.order); self._running = []; self._aborted = False
+        self._global_tokens = {token for token in self.assumed if not is_session_token(token)}
+        self._session_tokens = {}
+
+    def _chain_defaulted(self, flows, is_login_flow):
+        """Dependensi implisit untuk alur tanpa deklarasi (lihat docstring modul)."""
+        session_tokens = []; previous_defaulted = None
+        for position, name in enumerate(self.order):
+            if name in self.defaulted:
+                self.requires[name] = list(session_tokens)
+                if position:
+                    previous = self.order[position - 1]
+                    self.provides[previous].append(AFFINITY_SCOPE + previous); self.requires[name].append(AFFINITY_SCOPE + previous)
+                if previous_defaulted:
+                    self.provides[previous_defaulted].append(f"flow:{previous_defaulted}"); self.requires[name].append(f"flow:{previous_defaulted}")
+                if is_login_flow(flows[name]): self.provides[name].append(f"session:login:{name}")
+                previous_defaulted = name
+            session_tokens += [token for token in self.provides[name] if is_session_token(token)
+                               and not token.startswith(AFFINITY_SCOPE) and token not in session_tokens]
+            session_tokens = [token for token in session_tokens if token not in self.revokes[name]]
+
+    @staticmethod
+    def declared(flows):
+        return any(data.get("requires") or data.get("provides") for data in flows.values())
+
+    @property
+    def critical_path(self):
+        """Jumlah aksi pada jalur kritis (batas bawah durasi suite dengan sesi tak terbatas)."""
+        return max(self.priority.values(), default=0)
+
+    def _check_acyclic(self):
+        remaining = {name: set(dependencies) for name, dependencies in self.dependencies.items()}
+        self._topological_order = []
+        while remaining:
+            ready = [name for name in self.order if name in remaining and not remaining[name]]
+            if not ready:
+                raise ValueError(f"Dependensi requires/provides membentuk siklus (alur terlibat atau terdampak: {', '.join(name for name in self.order if name in remaining)})")
+            for name in ready:
+                del remaining[name]; self._topological_order.append(name)
+                for dependencies in remaining.values(): dependencies.discard(name)
+
+    def _setup_for(self, name, tokens, chain=None):
+        """Alur penyedia token sesi yang belum dimiliki sesi, berurutan sesuai dependensinya."""
+        chain = [] if chain is None else chain
+        for token in self.requires[name]:
+            if not is_session_token(token) or token.startswith(AFFINITY_SCOPE) or token in tokens or any(token in self.provides[other] for other in chain): continue
+            provider = self.providers[token][0]
+            if provider == name or provider in chain: continue
+            self._setup_for(provider, tokens, chain); chain.append(provider)
+        return chain
+
+    def _ready(self, job, tokens):
+        """Token global sudah tersedia, dan token `session:after:` dimiliki sesi atau disediakan setup sebelumnya di job."""
+        available = set(tokens)
+        for name in job:
+            for token in self.requires[name]:
+                if token.startswith(AFFINITY_SCOPE): ok = token in available
+                else: ok = is_session_token(token) or token in self._global_tokens
+                if not ok: return False
+            available.update(self.provides[name])
+        return True
+
+    def next_job(self, session_index):
+        """Daftar alur (setup + alur tujuan) untuk sesi ini, menunggu bila belum ada yang siap. None bila selesai."""
+        with self._condition:
+            tokens = self._session_tokens.setdefault(session_index, {token for token in self.assumed if is_session_token(token)})
+            while not self._aborted and self._pending:
+                candidates = [(self._setup_for(name, tokens) + [name], name) for name in self._pending]
+                ready = [(job, name) for job, name in candidates if self._ready(job, tokens)]
+                if ready:
+                    job, _ = min(ready, key=lambda item: (-self.priority[item[1]], len(item[0]), self.order.index(item[1])))
+                    for name in job:
+                        if name in self._pending: self._pending.remove(name)
+                    self._running.extend(job)
+                    return job
+                if not self._running: return None # Tidak ada yang bisa menyediakan token yang ditunggu
+                self._condition.wait()
+            return None
+
+    def flow_done(self, session_index, flow_name):
+        with self._condition:
+            if flow_name in self._running: self._running.remove(flow_name)
+            tokens = self._session_tokens.setdefault(session_index, set())
+            for token in self.provides[flow_name]: (tokens if is_session_token(token) else self._global_tokens).add(token)
+            for token in self.revokes[flow_name]: tokens.discard(token)
+            self._condition.notify_all()
+
+    def abort(self):
+        """Dipanggil saat sebuah sesi gagal agar sesi lain tidak menunggu token yang tidak akan pernah tersedia."""
+        with self._condition:
+            self._aborted = True; self._condition.notify_all()
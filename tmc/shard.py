@@ -0,0 +1,146 @@
+"""Pembagian alur terpilih ke N shard (proses atau agen CI terpisah) berdasarkan durasi historis, dan penggabungan
+hasil shard menjadi satu run.
+
+Alur setup (alur login dan penyedia token `session:`/`page:`) ikut di setiap shard karena setiap shard punya
+browser sendiri. Alur yang terhubung lewat token global requires/provides selalu berada di shard yang sama.
+Semua shard harus membaca riwayat (results.db) yang sama agar pembagiannya identik.
+"""
+import re
+
+from tmc.scheduler import is_session_token
+
+DEFAULT_ACTION_MS = 1000 # Perkiraan durasi per aksi untuk alur tanpa riwayat bila belum ada riwayat sama sekali
+
+
+def parse_shard(spec):
+    """'2/4' -> (2, 4)."""
+    match = re.fullmatch(r"\s*(\d+)\s*/\s*(\d+)\s*", spec or "")
+    if not match or not 1 <= int(match.group(1)) <= int(match.group(2)):
+        raise ValueError(f"Format shard '{spec}' tidak valid; gunakan K/N dengan 1 <= K <= N, mis. 2/4.")
+    return int(match.group(1)), int(match.group(2))
+
+
+def setup_flows(flows, is_login_flow):
+    """Alur yang dijalankan di setiap shard: alur login dan penyedia token sesi yang dibutuhkan alur lain (transitif)."""
+    providers = {}
+    for name, data in flows.items():
+        for token in data.get("provides", []): providers.setdefault(token, []).append(name)
+    setup = {name for name, data in flows.items() if is_login_flow(data)}
+    pending = [token for data in flows.values() for token in data.get("requires", []) if is_session_token(token)]
+    while pending:
+        for provider in providers.get(pending.pop(), [])[:1]:
+            if provider in setup: continue
+            setup.add(provider)
+            pending.extend(token for token in flows[provider].get("requires", []) if is_session_token(token))
+    return setup
+
+
+def estimate_durations(flows, history):
+    """Durasi (ms) per alur: p50 historis, atau jumlah aksi x median ms per aksi alur lain yang punya riwayat."""
+    rates = sorted(history[name] / len(data.get("actions", [])) for name, data in flows.items()
+                   if name in history and data.get("actions"))
+    per_action = rates[len(rates) // 2] if rates else DEFAULT_ACTION_MS
+    return {name: history.get(name, max(1, len(data.get("actions", []))) * per_action) for name, data in flows.items()}
+
+
+def plan_shards(flows, count, durations, is_login_flow):
+    """Mengembalikan (nama alur per shard dalam urutan flows.json, perkiraan beban ms per shard). Unit (alur atau
+    kelompok alur yang saling bergantung lewat token global) dibagi dengan LPT: unit terlama lebih dulu ke shard
+    dengan total perkiraan terkecil."""
+    order = list(flows)
+    setup = setup_flows(flows, is_login_flow)
+    parent = {name: name for name in order if name not in setup}
+
+    def root(name):
+        while parent[name] != name: parent[name] = parent[parent[name]]; name = parent[name]
+        return name
+
+    providers = {}
+    for name in parent:
+        for token in flows[name].get("provides", []):
+            if not is_session_token(token): providers.setdefault(token, []).append(name)
+    for name in parent:
+        for token in flows[name].get("requires", []):
+            for provider in providers.get(token, []): parent[root(provider)] = root(name)
+
+    units = {}
+    for name in parent: units.setdefault(root(name), []).append(name)
+    loads = [0.0] * count; assigned = [set() for _ in range(count)]
+    for unit in sorted(units.values(), key=lambda unit: (-sum(durations[name] for name in unit), order.index(unit[0]))):
+        target = min(range(count), key=lambda shard: (loads[shard], shard))
+        loads[target] += sum(durations[name] for name in unit); assigned[target].update(unit)
+    return [[name for name in order if name in setup or name in assigned[shard]] for shard in range(count)], loads
+
+
+RUN_FIELDS = {"env": str, "url": str, "browser": str, "username": str, "result": list, "flows": dict, "artifacts": list}
+
+
+def check_shard_document(document):
+    """ValueError bila `document` bukan file hasil shard ({"shard": [k, n], "selected": [...], "setup": [...],
+    "order": [...], "runs": [...]}). `selected` berisi alur shard itu, `setup` alur yang ikut di setiap shard dan
+    `order` seluruh alur terpilih dalam urutan flows.json."""
+    if not isinstance(document, dict): raise ValueError("isi file bukan objek JSON hasil shard")
+    shard = document.get("shard")
+    if not (isinstance(shard, list) and len(shard) == 2 and all(type(value) is int for value in shard) and 1 <= shard[0] <= shard[1]):
+        raise ValueError("'shard' harus berupa [k, n] dengan 1 <= k <= n")
+    for field in ("selected", "setup", "order"):
+        if not (isinstance(document.get(field), list) and all(isinstance(name, str) for name in document[field])):
+            raise ValueError(f"'{field}' harus berupa daftar nama alur")
+    if not isinstance(document.get("runs"), list): raise ValueError("'runs' harus berupa daftar")
+    for position, run in enumerate(document["runs"], start=1):
+        if not isinstance(run, dict): raise ValueError(f"run #{position} bukan objek")
+        for field, kind in RUN_FIELDS.items():
+            if not isinstance(run.get(field), kind): raise ValueError(f"run #{position}: '{field}' tidak ada atau tidak valid")
+        if not isinstance(run.get("started_at", 0), (str, type(None))): raise ValueError(f"run #{position}: 'started_at' tidak valid")
+        if len(run["result"]) != 3: raise ValueError(f"run #{position}: 'result' harus berupa [success, message, screenshot]")
+        if not all(isinstance(flow_data, dict) for flow_data in run["flows"].values()): raise ValueError(f"run #{position}: 'flows' tidak valid")
+
+
+def check_shard_set(documents):
+    """ValueError bila file hasil shard (yang masing-masing sudah lolos check_shard_document) tidak berasal dari satu
+    pembagian: jumlah shard berbeda, shard yang sama muncul lebih dari sekali, atau alur non-setup ada di dua shard."""
+    if len({document["shard"][1] for document in documents}) > 1: raise ValueError("File hasil berasal dari jumlah shard yang berbeda.")
+    setup = {name for document in documents for name in document["setup"]}
+    shards = set(); owners = {}
+    for document in documents:
+        k, n = document["shard"]
+        if k in shards: raise ValueError(f"Hasil shard {k}/{n} diberikan lebih dari sekali.")
+        shards.add(k)
+        for name in document["selected"]:
+            if name in setup: continue
+            if name in owners: raise ValueError(f"Alur '{name}' ada di shard {owners[name]}/{n} dan {k}/{n}; file hasil berasal dari pembagian yang berbeda.")
+            owners[name] = k
+
+
+def _flow_failed(flow_data):
+    return any(action.get("status") == "FAILED" for action in flow_data.get("actions", []))
+
+
+def merge_shard_results(documents):
+    """Menggabungkan file hasil shard (lihat check_shard_document dan check_shard_set) menjadi satu run per
+    environment dalam bentuk argumen ResultStore.record_run (env, url, browser, username, started_at, result,
+    flows, artifacts). Alur setup yang ada di beberapa shard diambil dari shard pertama, kecuali ada yang gagal."""
+    documents = sorted(documents, key=lambda document: document["shard"][0])
+    count = max(document["shard"][1] for document in documents)
+    order = list(dict.fromkeys(name for document in documents for name in document["order"]))
+    by_env = {}
+    for document in documents:
+        for run in document["runs"]: by_env.setdefault(run["env"], []).append((tuple(document["shard"]), run))
+
+    merged = []
+    for env, parts in by_env.items():
+        flows = {}
+        for _, run in parts:
+            for name, flow_data in run["flows"].items():
+                if name not in flows or (_flow_failed(flow_data) and not _flow_failed(flows[name])): flows[name] = flow_data
+        failures = [(shard, run) for shard, run in parts if not run["result"][0]]
+        missing = sorted(set(range(1, count + 1)) - {shard[0] for shard, _ in parts})
+        messages = [f"[shard {k}/{n}] {run['result'][1]}" for (k, n), run in failures]
+        messages += [f"Hasil shard {k}/{count} tidak ditemukan." for k in missing]
+        result = (not messages, "\n".join(messages) or f"Semua alur tes berhasil diselesaikan ({count} shard).",
+                  next((run["result"][2] for _, run in failures if run["result"][2]), None))
+        first = parts[0][1]
+        merged.append({"env": env, "url": first["url"], "browser": first["browser"], "username": first["username"],
+                       "started_at": min((run["started_at"] for _, run in parts if run["started_at"]), default=None), "result": result,
+                       "flows": {name: flows[name] for name in order if name in flows}, "artifacts": [a for _, run in parts for a in run["artifacts"]]})
+    return merged